@@ -1,16 +1,121 @@
-from openai import OpenAI
+import atexit
+import threading
+import time
+from typing import TYPE_CHECKING, Iterator, Optional
+from urllib.parse import urlparse
+
+from answer_cache import depends_on_history, get_answer_cache
 from config import Config
-from formatting import create_multi_summary
+from data_service import get_analytics
+from deadline import Deadline, DeadlineExceeded
+from formatting import create_prompt_summary
+from metrics import REGISTRY, span
 from models import StockData
+from outbound import Upstream, get_upstream
+from parsing import asks_about_history
+from tokens import estimate_message_tokens, estimate_tokens
+
+if TYPE_CHECKING:
+    from openai import OpenAI
+
+    from analytics import Analytics
+
+_clients: dict[Config, "OpenAI"] = {}
+_clients_lock = threading.Lock()
+
+
+def get_client(config: Config) -> "OpenAI":
+    """Return a shared client for `config`, keeping its connection pool alive between questions.
+
+    The OpenAI SDK and httpx are imported here rather than at module load, so
+    the CLI banner and cached answers never wait on them.
+    """
+    with _clients_lock:
+        client = _clients.get(config)
+        if client is None:
+            import httpx
+            from openai import OpenAI
+
+            http_client = httpx.Client(
+                timeout=config.request_timeout_seconds,
+                limits=httpx.Limits(
+                    max_connections=config.max_connections,
+                    max_keepalive_connections=config.max_keepalive_connections,
+                ),
+            )
+            client = OpenAI(
+                api_key=config.api_key,
+                base_url=config.base_url or None,
+                timeout=config.request_timeout_seconds,
+                http_client=http_client,
+                # Retries go through the shared outbound scheduler so they respect its pacing.
+                max_retries=0,
+            )
+            _clients[config] = client
+        return client
+
+
+def _upstream(config: Config) -> Upstream:
+    """The rate limiter shared by every call to `config`'s endpoint."""
+    host = urlparse(config.base_url).netloc if config.base_url else "api.openai.com"
+    return get_upstream(f"llm:{host}")
+
+
+def _time_limit(deadline: Optional[Deadline]) -> dict:
+    """Per-request timeout for the SDK; evaluated per attempt so a retry only gets what is left."""
+    remaining = deadline.remaining() if deadline is not None else None
+    return {} if remaining is None else {"timeout": remaining}
+
+
+def close_clients() -> None:
+    with _clients_lock:
+        clients = list(_clients.values())
+        _clients.clear()
+    for client in clients:
+        client.close()
+
+
+atexit.register(close_clients)
 
 
-def _build_prompt(stock_data: list[StockData], user_question: str) -> str:
-    summary = create_multi_summary(stock_data)
+def _history_analytics(
+    stock_data: list[StockData],
+    user_question: str,
+    deadline: Deadline | None = None,
+    reserve: float = 0.0,
+) -> Optional["Analytics"]:
+    """Trailing statistics for questions about trends or periods; None for today-only questions.
+
+    Only history already on disk is used; missing sessions are synced in the
+    background for later questions. Loading it may not eat into the `reserve`
+    seconds the answer itself needs; if it runs late the statistics are dropped
+    and the cut is noted on `deadline`.
+    """
+    if not stock_data or not asks_about_history(user_question):
+        return None
+    timeout = deadline.remaining(reserve=reserve) if deadline is not None else None
+    try:
+        return get_analytics([item.symbol for item in stock_data], timeout=timeout, wait=False)
+    except DeadlineExceeded:
+        deadline.cut("trailing statistics")
+        return None
+    except Exception:
+        return None
+
+
+def _build_prompt(
+    stock_data: list[StockData],
+    user_question: str,
+    context: str | None = None,
+    analytics: Optional["Analytics"] = None,
+) -> str:
+    summary = create_prompt_summary(stock_data, analytics=analytics)
     plural = "these stocks" if len(stock_data) > 1 else "this stock"
+    note = f"{context}\n" if context else ""
 
     return (
         f'The user asked: "{user_question}"\n\n'
-        "Here's the current stock data:\n"
+        f"{note}Here's the current stock data:\n"
         f"{summary}\n\n"
         "Please provide a clear, beginner-friendly explanation that:\n"
         "1. Directly answers their question\n"
@@ -23,18 +128,28 @@ def _build_prompt(stock_data: list[StockData], user_question: str) -> str:
     )
 
 
-def explain_with_ai(
+def _build_messages(
     stock_data: list[StockData],
     user_question: str,
-    config: Config,
     history: list[dict[str, str]] | None = None,
-) -> str:
-    client = OpenAI(
-        api_key=config.api_key,
-        base_url=config.base_url or None,
-    )
+    context: str | None = None,
+    analytics: Optional["Analytics"] = None,
+) -> list[dict[str, str]]:
+    with span("prompt", symbols=len(stock_data)) as attrs:
+        messages = _assemble_messages(stock_data, user_question, history, context, analytics)
+        attrs["prompt_tokens_estimated"] = estimate_message_tokens(messages)
+        attrs["history_tokens_estimated"] = estimate_message_tokens(history or [])
+        return messages
 
-    prompt = _build_prompt(stock_data, user_question)
+
+def _assemble_messages(
+    stock_data: list[StockData],
+    user_question: str,
+    history: list[dict[str, str]] | None,
+    context: str | None = None,
+    analytics: Optional["Analytics"] = None,
+) -> list[dict[str, str]]:
+    prompt = _build_prompt(stock_data, user_question, context, analytics)
     messages: list[dict[str, str]] = [
         {
             "role": "system",
@@ -49,11 +164,153 @@ def explain_with_ai(
     if history:
         messages.extend(history)
     messages.append({"role": "user", "content": prompt})
-    response = client.chat.completions.create(
-        model=config.model,
-        messages=messages,
-        temperature=0.7,
-        max_tokens=500,
-    )
+    return messages
+
+
+def _record_usage(attrs: dict, prompt_tokens: int, completion_tokens: int, estimated: bool) -> None:
+    attrs.update(prompt_tokens=prompt_tokens, completion_tokens=completion_tokens, tokens_estimated=estimated)
+    REGISTRY.inc("llm_prompt_tokens_total", prompt_tokens)
+    REGISTRY.inc("llm_completion_tokens_total", completion_tokens)
+
+
+def _answer_cache_key(
+    stock_data: list[StockData],
+    user_question: str,
+    config: Config,
+    history: list[dict[str, str]] | None,
+    context: str | None = None,
+    analytics: Optional["Analytics"] = None,
+) -> str | None:
+    cache = get_answer_cache()
+    if depends_on_history(user_question, history):
+        cache.record_bypass()
+        return None
+    # An answer given before the history synced must not be served once statistics exist.
+    statistics = f"{','.join(analytics.symbols)}@{analytics.as_of}" if analytics is not None else None
+    return cache.make_key(config.model, user_question, stock_data, context, statistics)
+
+
+def explain_with_ai(
+    stock_data: list[StockData],
+    user_question: str,
+    config: Config,
+    history: list[dict[str, str]] | None = None,
+    context: str | None = None,
+    deadline: Deadline | None = None,
+) -> str:
+    """Explain `stock_data` in answer to `user_question`.
+
+    `context` is an extra line for the model about where the data came from,
+    such as which screen selected these rows. The request, including any
+    retries, gives up with a timeout error once `deadline` passes.
+    """
+    analytics = _history_analytics(stock_data, user_question, deadline, config.min_answer_seconds)
+    cache_key = _answer_cache_key(stock_data, user_question, config, history, context, analytics)
+    if cache_key:
+        cached = get_answer_cache().get(cache_key)
+        if cached is not None:
+            return cached
+
+    client = get_client(config)
+    messages = _build_messages(stock_data, user_question, history, context, analytics)
+    with span("llm", model=config.model) as attrs:
+        response = _upstream(config).call_before(
+            deadline,
+            lambda: client.chat.completions.create(
+                model=config.model,
+                messages=messages,
+                temperature=0.7,
+                max_tokens=500,
+                **_time_limit(deadline),
+            ),
+        )
+        answer = response.choices[0].message.content
+        usage = getattr(response, "usage", None)
+        if usage:
+            _record_usage(attrs, usage.prompt_tokens, usage.completion_tokens, estimated=False)
+        else:
+            _record_usage(attrs, estimate_message_tokens(messages), estimate_tokens(answer or ""), estimated=True)
+
+    if cache_key and answer:
+        get_answer_cache().put(cache_key, answer, attrs["prompt_tokens"] + attrs["completion_tokens"])
+    return answer
+
+
+def stream_explanation(
+    stock_data: list[StockData],
+    user_question: str,
+    config: Config,
+    history: list[dict[str, str]] | None = None,
+    context: str | None = None,
+    deadline: Deadline | None = None,
+) -> Iterator[str]:
+    """Like `explain_with_ai`, but yields text fragments as the model produces them.
+
+    If `deadline` passes mid-answer the stream stops where it is and the cut is
+    recorded on `deadline`; a truncated answer is not cached.
+    """
+    analytics = _history_analytics(stock_data, user_question, deadline, config.min_answer_seconds)
+    cache_key = _answer_cache_key(stock_data, user_question, config, history, context, analytics)
+    if cache_key:
+        cached = get_answer_cache().get(cache_key)
+        if cached is not None:
+            yield cached
+            return
+
+    client = get_client(config)
+    messages = _build_messages(stock_data, user_question, history, context, analytics)
+    parts: list[str] = []
+    with span("llm", model=config.model, stream=True) as attrs:
+        started = time.perf_counter()
+        # Only opening the stream is retried; once text has been yielded a failure propagates.
+        stream = _upstream(config).call_before(
+            deadline,
+            lambda: client.chat.completions.create(
+                model=config.model,
+                messages=messages,
+                temperature=0.7,
+                max_tokens=500,
+                stream=True,
+                # Ask for a final chunk with the real token counts.
+                stream_options={"include_usage": True},
+                **_time_limit(deadline),
+            ),
+        )
+        truncated = False
+        usage = None
+        try:
+            for chunk in stream:
+                if deadline is not None and deadline.expired:
+                    truncated = True
+                    break
+                usage = getattr(chunk, "usage", None) or usage
+                if not chunk.choices:
+                    continue
+                text = chunk.choices[0].delta.content
+                if text:
+                    if not parts:
+                        attrs["first_token_ms"] = round((time.perf_counter() - started) * 1000, 1)
+                    parts.append(text)
+                    yield text
+        except Exception:
+            # A read that timed out on the deadline after some text keeps what arrived.
+            if not (parts and deadline is not None and deadline.expired):
+                raise
+            truncated = True
+        finally:
+            stream.close()
+        if truncated:
+            deadline.cut("end of the AI answer")
+            attrs["truncated"] = True
+        answer = "".join(parts)
+        if usage:
+            _record_usage(attrs, usage.prompt_tokens, usage.completion_tokens, estimated=False)
+        else:
+            # Endpoints that ignore `include_usage`, and answers cut short, carry no usage block.
+            _record_usage(attrs, estimate_message_tokens(messages), estimate_tokens(answer), estimated=True)
+
+    if cache_key and answer and not truncated:
+        get_answer_cache().put(cache_key, answer, attrs["prompt_tokens"] + attrs["completion_tokens"])
+
 
-    return response.choices[0].message.content
+REGISTRY.register_collector("answer_cache", lambda: get_answer_cache().stats())
@@ -0,0 +1,185 @@
+"""Trend, volatility and relative-performance statistics for many symbols at once.
+
+Everything works on a (sessions x symbols) matrix of closes, so each statistic
+is a handful of whole-array NumPy operations however many symbols are asked
+about. Sessions a symbol did not trade (before its listing, holidays on its
+exchange) are NaN after alignment. Windowed statistics count each symbol's own
+sessions, so a holiday neither shortens a window nor adds a zero return; only
+correlation, which compares the same days, forward-fills the gaps. Statistics
+that need more history than a symbol has are NaN.
+"""
+
+from dataclasses import dataclass
+from typing import Optional, Sequence
+
+import numpy as np
+
+from history_store import PriceHistory
+
+DAY_SECONDS = 24 * 60 * 60
+TRADING_DAYS = 252
+RETURN_WINDOWS = {"1wk": 5, "1mo": 21, "3mo": 63, "1y": 252}
+MOVING_AVERAGE_WINDOWS = (50, 200)
+VOLATILITY_WINDOW = 21
+CORRELATION_WINDOW = 252
+
+
+@dataclass(frozen=True)
+class Analytics:
+    symbols: tuple[str, ...]
+    as_of: Optional[np.datetime64]
+    last_close: np.ndarray
+    # Percent change over each window in RETURN_WINDOWS.
+    returns: dict[str, np.ndarray]
+    # Annualised percent volatility of daily log returns; one row per session, counted
+    # back from each symbol's latest session.
+    rolling_volatility: np.ndarray
+    moving_averages: dict[int, np.ndarray]
+    # Percent below the running peak: the worst point, and where it is now.
+    max_drawdown: np.ndarray
+    drawdown: np.ndarray
+    correlation: Optional[np.ndarray]
+
+    @property
+    def volatility(self) -> np.ndarray:
+        if not len(self.rolling_volatility):
+            return np.full(len(self.symbols), np.nan)
+        return self.rolling_volatility[-1]
+
+
+def align_closes(histories: Sequence[PriceHistory]) -> tuple[np.ndarray, np.ndarray]:
+    """Stack closes onto the union of all sessions: (timestamps, closes[sessions, symbols]).
+
+    A symbol's close is NaN on sessions it has no bar for.
+    """
+    if not histories:
+        return np.empty(0, dtype=np.int64), np.empty((0, 0))
+    lengths = np.array([len(history) for history in histories])
+    stamps = np.concatenate([history.timestamp for history in histories])
+    values = np.concatenate([history.close for history in histories])
+    columns = np.repeat(np.arange(len(histories)), lengths)
+
+    # Stored bars are stamped at midnight UTC, so a day bitmap finds the union without sorting.
+    first = stamps.min()
+    days = (stamps - first) // DAY_SECONDS
+    present = np.zeros(days.max() + 1, dtype=bool)
+    present[days] = True
+    timestamps = first + np.flatnonzero(present) * DAY_SECONDS
+    rows = np.cumsum(present)[days] - 1
+    closes = np.full((len(timestamps), len(histories)), np.nan)
+    closes[rows, columns] = values
+    return timestamps, closes
+
+
+def _forward_fill(values: np.ndarray) -> np.ndarray:
+    valid = ~np.isnan(values)
+    index = np.where(valid, np.arange(len(values))[:, None], 0)
+    np.maximum.accumulate(index, axis=0, out=index)
+    filled = values[index, np.arange(values.shape[1])]
+    # Rows before a symbol's first close pointed at row 0; keep those missing.
+    filled[np.cumsum(valid, axis=0) == 0] = np.nan
+    return filled
+
+
+def _right_align(values: np.ndarray) -> np.ndarray:
+    """Move each column's non-NaN entries to the bottom, in order, so row -n is its n-th latest."""
+    # A stable sort on the validity flag puts the NaNs first and keeps the rest in session order.
+    order = np.argsort(~np.isnan(values), axis=0, kind="stable")
+    return np.take_along_axis(values, order, axis=0)
+
+
+def _rolling_sum(values: np.ndarray, window: int) -> tuple[np.ndarray, np.ndarray]:
+    """Windowed sums and counts of the non-NaN entries, via cumulative sums."""
+    valid = ~np.isnan(values)
+    padded = np.zeros((1, values.shape[1]))
+    sums = np.concatenate([padded, np.cumsum(np.where(valid, values, 0.0), axis=0)])
+    counts = np.concatenate([padded, np.cumsum(valid, axis=0)])
+    return sums[window:] - sums[:-window], counts[window:] - counts[:-window]
+
+
+def rolling_volatility(closes: np.ndarray, window: int = VOLATILITY_WINDOW) -> np.ndarray:
+    with np.errstate(divide="ignore", invalid="ignore"):
+        log_returns = np.diff(np.log(closes), axis=0)
+    if len(log_returns) < window:
+        return np.empty((0, closes.shape[1]))
+    sums, counts = _rolling_sum(log_returns, window)
+    squares, _ = _rolling_sum(log_returns**2, window)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        mean = sums / counts
+        variance = (squares - counts * mean**2) / (counts - 1)
+    variance = np.where(counts == window, np.maximum(variance, 0.0), np.nan)
+    return np.sqrt(variance * TRADING_DAYS) * 100
+
+
+def correlation_matrix(closes: np.ndarray, window: int = CORRELATION_WINDOW) -> np.ndarray:
+    """Pearson correlation of daily returns over the last `window` sessions.
+
+    Sessions where a symbol has no return yet count as a zero return.
+    """
+    recent = closes[-(window + 1):]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        returns = np.nan_to_num(recent[1:] / recent[:-1] - 1)
+    if len(returns) < 2:
+        return np.full((closes.shape[1], closes.shape[1]), np.nan)
+    centered = returns - returns.mean(axis=0)
+    norms = np.sqrt((centered**2).sum(axis=0))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        scaled = centered / norms
+    return np.clip(scaled.T @ scaled, -1.0, 1.0)
+
+
+def compute_analytics(
+    symbols: Sequence[str],
+    closes: np.ndarray,
+    timestamps: Optional[np.ndarray] = None,
+    correlation: bool = True,
+) -> Analytics:
+    """Statistics for every column of `closes` (sessions x symbols), oldest session first.
+
+    NaN marks a session the symbol did not trade; windows skip it rather than count it.
+    """
+    aligned = closes
+    closes = _right_align(closes)
+    sessions = len(closes)
+    last = closes[-1] if sessions else np.full(len(symbols), np.nan)
+
+    returns = {}
+    with np.errstate(divide="ignore", invalid="ignore"):
+        for name, window in RETURN_WINDOWS.items():
+            if sessions > window:
+                returns[name] = (last / closes[-1 - window] - 1) * 100
+            else:
+                returns[name] = np.full(len(symbols), np.nan)
+
+    moving_averages = {}
+    for window in MOVING_AVERAGE_WINDOWS:
+        if sessions >= window:
+            tail = closes[-window:]
+            moving_averages[window] = np.where(np.isnan(tail).any(axis=0), np.nan, tail.mean(axis=0))
+        else:
+            moving_averages[window] = np.full(len(symbols), np.nan)
+
+    if sessions:
+        peaks = np.fmax.accumulate(closes, axis=0)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            drawdowns = (closes / peaks - 1) * 100
+        max_drawdown = np.fmin.reduce(drawdowns, axis=0)
+        drawdown = drawdowns[-1]
+    else:
+        max_drawdown = drawdown = np.full(len(symbols), np.nan)
+
+    as_of = None
+    if timestamps is not None and len(timestamps):
+        as_of = np.datetime64(int(timestamps[-1]), "s").astype("datetime64[D]")
+
+    return Analytics(
+        symbols=tuple(symbols),
+        as_of=as_of,
+        last_close=last,
+        returns=returns,
+        rolling_volatility=rolling_volatility(closes),
+        moving_averages=moving_averages,
+        max_drawdown=max_drawdown,
+        drawdown=drawdown,
+        correlation=correlation_matrix(_forward_fill(aligned)) if correlation and len(symbols) > 1 else None,
+    )
@@ -0,0 +1,185 @@
+"""Cache of model explanations keyed by question, symbols and a bucketed quote snapshot."""
+
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Optional
+
+from models import StockData
+
+# Words that suggest the question leans on earlier turns, so a cached answer
+# produced without that context could be wrong.
+_REFERENTIAL_RE = re.compile(
+    r"\b(it|its|that|those|them|they|this one|earlier|previous|before|above|again|same|instead)\b",
+    re.IGNORECASE,
+)
+
+
+def normalize_question(question: str) -> str:
+    cleaned = re.sub(r"[^\w\s$.&-]", " ", question.lower())
+    return " ".join(cleaned.split())
+
+
+def snapshot_hash(stock_data: list[StockData], price_bucket_percent: float = 0.1) -> str:
+    """Hash the quote values an answer depends on, bucketed so tiny ticks still hit.
+
+    Prices are bucketed relative to their size, so a move of more than about
+    `price_bucket_percent` percent produces a different hash.
+    """
+    parts = []
+    for item in sorted(stock_data, key=lambda data: data.symbol):
+        bucket = max(item.current_price * price_bucket_percent / 100, 0.01)
+        parts.append(
+            (
+                item.symbol,
+                round(item.current_price / bucket),
+                round(item.previous_close, 2),
+                round(item.change_percent, 1),
+            )
+        )
+    return hashlib.sha1(json.dumps(parts).encode("utf-8")).hexdigest()
+
+
+def depends_on_history(question: str, history: Optional[list[dict[str, str]]]) -> bool:
+    return bool(history) and bool(_REFERENTIAL_RE.search(question))
+
+
+class AnswerCache:
+    def __init__(
+        self,
+        max_entries: int = 512,
+        ttl_seconds: float = 15 * 60,
+        path: Optional[str] = None,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[str, tuple[float, str, int]] = OrderedDict()
+        self._conn: Optional[sqlite3.Connection] = None
+        if path:
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+            self._conn = sqlite3.connect(path, check_same_thread=False)
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS answers ("
+                " key TEXT PRIMARY KEY,"
+                " stored_at REAL NOT NULL,"
+                " answer TEXT NOT NULL,"
+                " tokens INTEGER NOT NULL)"
+            )
+            self._conn.commit()
+        self.hits = 0
+        self.misses = 0
+        self.bypasses = 0
+        self.evictions = 0
+        self.saved_tokens = 0
+
+    @staticmethod
+    def make_key(
+        model: str,
+        question: str,
+        stock_data: list[StockData],
+        context: Optional[str] = None,
+        statistics: Optional[str] = None,
+    ) -> str:
+        """Key for an answer; `context` and `statistics` describe anything else the prompt included."""
+        symbols = ",".join(sorted({item.symbol for item in stock_data}))
+        raw = "\n".join(
+            (model, normalize_question(question), symbols, snapshot_hash(stock_data), context or "", statistics or "")
+        )
+        return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+    def _load(self, key: str) -> Optional[tuple[float, str, int]]:
+        entry = self._entries.get(key)
+        if entry is None and self._conn is not None:
+            row = self._conn.execute(
+                "SELECT stored_at, answer, tokens FROM answers WHERE key = ?", (key,)
+            ).fetchone()
+            if row:
+                entry = (row[0], row[1], row[2])
+                self._entries[key] = entry
+        return entry
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            entry = self._load(key)
+            if entry is None or self._clock() - entry[0] > self.ttl_seconds:
+                if entry is not None:
+                    self._delete(key)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            self.saved_tokens += entry[2]
+            return entry[1]
+
+    def put(self, key: str, answer: str, tokens: int) -> None:
+        with self._lock:
+            entry = (self._clock(), answer, tokens)
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            if self._conn is not None:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO answers (key, stored_at, answer, tokens) VALUES (?, ?, ?, ?)",
+                    (key, *entry),
+                )
+                self._conn.commit()
+            while len(self._entries) > self.max_entries:
+                oldest, _ = self._entries.popitem(last=False)
+                if self._conn is not None:
+                    self._conn.execute("DELETE FROM answers WHERE key = ?", (oldest,))
+                    self._conn.commit()
+                self.evictions += 1
+
+    def _delete(self, key: str) -> None:
+        self._entries.pop(key, None)
+        if self._conn is not None:
+            self._conn.execute("DELETE FROM answers WHERE key = ?", (key,))
+            self._conn.commit()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            if self._conn is not None:
+                self._conn.execute("DELETE FROM answers")
+                self._conn.commit()
+
+    def record_bypass(self) -> None:
+        with self._lock:
+            self.bypasses += 1
+
+    def stats(self) -> dict[str, float]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "bypasses": self.bypasses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "saved_tokens": self.saved_tokens,
+            }
+
+
+_default_cache: Optional[AnswerCache] = None
+_default_lock = threading.Lock()
+
+
+def get_answer_cache() -> AnswerCache:
+    """Process-wide cache; set ANSWER_CACHE_PATH to persist answers in SQLite."""
+    global _default_cache
+    with _default_lock:
+        if _default_cache is None:
+            _default_cache = AnswerCache(
+                max_entries=int(os.getenv("ANSWER_CACHE_SIZE", "512")),
+                ttl_seconds=float(os.getenv("ANSWER_CACHE_TTL_SECONDS", str(15 * 60))),
+                path=os.getenv("ANSWER_CACHE_PATH") or None,
+            )
+        return _default_cache
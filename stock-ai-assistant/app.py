@@ -1,17 +1,21 @@
-from datetime import datetime, timezone
+import os
+from datetime import datetime
 from typing import Optional
 
 import streamlit as st
-from dotenv import load_dotenv
 
-from ai_service import explain_with_ai
+from ai_service import stream_explanation
+from cache_warmer import start_cache_warmer
 from config import load_config
-from data_service import get_stock_data
-from formatting import create_multi_summary
+from conversation import RollingSummary, build_history
+from data_service import TIMED_OUT_MESSAGE, get_stock_data_many
+from deadline import Deadline, DeadlineExceeded
+from formatting import create_multi_summary, format_as_of
+from metrics import Trace, export_if_configured, log_if_configured, trace
+from markets import currency_sign_for_symbol
 from parsing import extract_symbols, get_supported_companies
-
-
-load_dotenv()
+from screener import screen_question
+from watchlist import Watchlist
 
 
 st.set_page_config(
@@ -20,6 +24,8 @@ st.set_page_config(
     layout="wide",
 )
 
+WATCHLIST_TICK_SECONDS = 5
+
 
 def _inject_styles() -> None:
     st.markdown(
@@ -264,6 +270,11 @@ def _init_state() -> None:
         st.session_state.messages = []
     if "show_companies" not in st.session_state:
         st.session_state.show_companies = False
+    if "history_summary" not in st.session_state:
+        st.session_state.history_summary = RollingSummary()
+    if "watchlist" not in st.session_state:
+        st.session_state.watchlist = Watchlist([])
+        st.session_state.watchlist_moves = {}
 
 
 def _toggle_companies() -> None:
@@ -328,6 +339,55 @@ def _render_header() -> None:
     )
 
 
+def _update_watchlist() -> None:
+    symbols = extract_symbols(st.session_state.watchlist_input)
+    st.session_state.watchlist.set_symbols(symbols)
+
+
+def _render_watchlist() -> None:
+    with st.expander("Watchlist", expanded=bool(st.session_state.watchlist.symbols)):
+        st.text_input(
+            "Tickers or company names to follow",
+            key="watchlist_input",
+            placeholder="AAPL, Microsoft, TCS.NS",
+            on_change=_update_watchlist,
+        )
+        _render_watchlist_rows()
+
+
+# Reruns on its own timer without rerunning the page; each tick only fetches
+# the symbols the watchlist says are due.
+@st.fragment(run_every=WATCHLIST_TICK_SECONDS)
+def _render_watchlist_rows() -> None:
+    watchlist: Watchlist = st.session_state.watchlist
+    if not watchlist.symbols:
+        return
+
+    moves = st.session_state.watchlist_moves
+    for delta in watchlist.poll():
+        if delta.data is not None and not delta.first and "current_price" in delta.changes:
+            old, new = delta.changes["current_price"]
+            moves[delta.symbol] = (new - old, datetime.now())
+
+    rows = []
+    for symbol, data, error in watchlist.snapshot():
+        if data is None:
+            rows.append({"Symbol": symbol, "Price": error or "Loading...", "Change %": None, "Volume": None, "Last move": ""})
+            continue
+        move = moves.get(symbol)
+        rows.append(
+            {
+                "Symbol": symbol,
+                "Price": f"{currency_sign_for_symbol(symbol)}{data.current_price:,.2f}",
+                "Change %": round(data.change_percent, 2),
+                "Volume": data.volume,
+                "Last move": f"{move[0]:+,.2f} at {move[1]:%H:%M:%S}" if move else "",
+            }
+        )
+    st.dataframe(rows, hide_index=True, use_container_width=True)
+    st.caption(f"Next refresh in {watchlist.seconds_until_next():.0f}s")
+
+
 def _render_chat() -> None:
     st.markdown('<div class="chat-shell">', unsafe_allow_html=True)
     if not st.session_state.messages:
@@ -359,23 +419,23 @@ def _append_message(role: str, content: str, meta: Optional[str] = None) -> None
     st.session_state.messages.append({"role": role, "content": content, "meta": meta})
 
 
-def _build_history(max_messages: int = 8) -> list[dict[str, str]]:
-    """Return recent chat history in OpenAI format (excluding the latest user prompt)."""
-    history: list[dict[str, str]] = []
+def _build_history(token_budget: int = 1500) -> list[dict[str, str]]:
+    """Return token-budgeted chat history in OpenAI format (excluding the latest user prompt)."""
     # Exclude the most recent message (the current user prompt).
     prior = st.session_state.messages[:-1]
-    if not prior:
-        return history
-    for msg in prior[-max_messages:]:
-        role = msg.get("role")
-        content = msg.get("content")
-        if role in {"user", "assistant"} and content:
-            history.append({"role": role, "content": content})
-    return history
+    return build_history(prior, st.session_state.history_summary, token_budget=token_budget)
 
 
 def _handle_question(question: str) -> None:
+    with trace() as question_trace:
+        _answer_question(question, question_trace)
+    export_if_configured()
+
+
+def _answer_question(question: str, question_trace: Trace) -> None:
     _append_message("user", question)
+    with st.chat_message("user", avatar=":material/person:"):
+        st.markdown(question)
 
     try:
         config = load_config()
@@ -390,20 +450,33 @@ def _handle_question(question: str) -> None:
         return
 
     symbols = extract_symbols(question)
-    if not symbols:
-        _append_message(
-            "assistant",
-            "I couldn't find a stock symbol or company name in your prompt. Try adding a ticker like AAPL, TSLA, or MSFT.",
-        )
-        return
-
-    stock_items = []
-    for symbol in symbols:
-        item = get_stock_data(symbol)
-        if item:
-            stock_items.append(item)
+    deadline = Deadline(config.request_timeout_seconds)
+    # Whatever is still loading when only the answer's share of the budget is left gets dropped.
+    fetch_timeout = deadline.remaining(reserve=config.min_answer_seconds)
+    with st.spinner("Fetching stock data..."):
+        screen = screen_question(question, symbols, timeout=fetch_timeout)
+        if screen is not None:
+            stock_items = screen.items
+            if screen.timed_out:
+                deadline.cut(f"{screen.timed_out} of {screen.universe} screened companies")
+        elif symbols:
+            results = get_stock_data_many(symbols, timeout=fetch_timeout)
+            stock_items = [result.data for result in results if result.data]
+            late = [result.symbol for result in results if result.error == TIMED_OUT_MESSAGE]
+            if late:
+                deadline.cut(f"data for {', '.join(late)}")
+        else:
+            _append_message(
+                "assistant",
+                "I couldn't find a stock symbol or company name in your prompt. Try adding a ticker like AAPL, TSLA, or MSFT.",
+            )
+            return
+    context = screen.describe() if screen is not None else None
 
     if not stock_items:
+        if deadline.cuts:
+            _append_message("assistant", "The stock data didn't arrive in time. Please try again in a moment.")
+            return
         _append_message(
             "assistant",
             "I couldn't fetch valid stock data for the detected symbols. Please check the ticker names and try again.",
@@ -411,26 +484,42 @@ def _handle_question(question: str) -> None:
         return
 
     try:
+        if not deadline.allows(config.min_answer_seconds):
+            raise DeadlineExceeded("Not enough time left for an AI explanation")
         history = _build_history()
-        answer = explain_with_ai(stock_items, question, config, history=history)
+        with st.chat_message("assistant", avatar=":material/assistant:"):
+            answer = st.write_stream(
+                stream_explanation(stock_items, question, config, history=history, context=context, deadline=deadline)
+            )
         if not answer:
             raise ValueError("Empty AI response")
         meta = f"Symbols used: {', '.join(item.symbol for item in stock_items)}"
+        if screen is not None:
+            meta = f"{meta} | Ranked from {screen.universe} companies"
     except Exception as exc:
+        if isinstance(exc, DeadlineExceeded) or deadline.expired:
+            deadline.cut("AI explanation")
         answer = (
             "I couldn't get an AI explanation right now, so here is the raw stock summary instead:\n\n"
             f"{create_multi_summary(stock_items)}"
         )
         meta = f"Fallback summary shown ({type(exc).__name__})."
 
-    timestamp = datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M:%S UTC")
-    _append_message("assistant", answer, meta=f"{meta} | Data as of: {timestamp}")
+    if deadline.cuts:
+        meta = f"{meta} | {deadline.describe_cuts()}"
+    meta = f"{meta} | Data as of: {format_as_of(stock_items)}"
+    if os.getenv("SHOW_STAGE_TIMINGS"):
+        meta = f"{meta} | Timings: {question_trace.breakdown()}"
+    _append_message("assistant", answer, meta=meta)
 
 
 def main() -> None:
+    log_if_configured()
     _inject_styles()
     _init_state()
+    start_cache_warmer()
     _render_header()
+    _render_watchlist()
 
     _render_chat()
 
@@ -441,8 +530,7 @@ def main() -> None:
     if prompt:
         cleaned = prompt.strip()
         if cleaned:
-            with st.spinner("Fetching stock data and generating response..."):
-                _handle_question(cleaned)
+            _handle_question(cleaned)
             st.rerun()
         else:
             st.warning("Enter a stock-related question to continue.")
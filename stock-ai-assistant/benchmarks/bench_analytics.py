@@ -0,0 +1,67 @@
+"""Batched analytics vs. one symbol at a time, on synthetic two-year price histories.
+
+The per-symbol column runs the same statistics once per symbol, as a loop over
+histories would; the batched column computes them for the whole close matrix.
+Correlation is timed separately since it grows with the square of the symbols.
+
+Run from the `stock-ai-assistant` directory:
+    python -m benchmarks.bench_analytics
+"""
+
+import timeit
+
+import numpy as np
+
+from analytics import align_closes, compute_analytics, correlation_matrix
+from history_store import PriceHistory
+
+SESSIONS = 504
+
+
+def make_histories(count: int, sessions: int = SESSIONS, seed: int = 5) -> list[PriceHistory]:
+    """Random-walk closes; every tenth symbol listed partway through, so alignment has gaps."""
+    rng = np.random.default_rng(seed)
+    start = np.datetime64("2024-01-01", "s").astype(np.int64)
+    stamps = start + np.arange(sessions, dtype=np.int64) * 86_400
+    closes = 100 * np.cumprod(1 + rng.normal(0, 0.02, (sessions, count)), axis=0)
+    histories = []
+    for index in range(count):
+        first = sessions // 3 if index % 10 == 0 else 0
+        close = closes[first:, index]
+        zeros = np.zeros_like(close)
+        histories.append(PriceHistory(f"S{index}", stamps[first:], close, close, close, close, zeros.astype(np.int64)))
+    return histories
+
+
+def _time_ms(func, number: int) -> float:
+    return timeit.timeit(func, number=number) / number * 1000
+
+
+def main() -> None:
+    print(
+        f"{'symbols':>8}  {'align ms':>9}  {'per-symbol ms':>14}  {'batched ms':>11}  {'speedup':>8}  {'corr ms':>9}"
+    )
+    for count in (100, 5_000):
+        histories = make_histories(count)
+        symbols = [history.symbol for history in histories]
+        number = 20 if count <= 100 else 2
+
+        align_ms = _time_ms(lambda: align_closes(histories), number)
+        timestamps, closes = align_closes(histories)
+        per_symbol_ms = _time_ms(
+            lambda: [
+                compute_analytics([symbol], closes[:, [index]], timestamps, correlation=False)
+                for index, symbol in enumerate(symbols)
+            ],
+            max(1, number // 2),
+        )
+        batched_ms = _time_ms(lambda: compute_analytics(symbols, closes, timestamps, correlation=False), number)
+        corr_ms = _time_ms(lambda: correlation_matrix(closes), number)
+        print(
+            f"{count:>8,}  {align_ms:>9.2f}  {per_symbol_ms:>14.2f}  {batched_ms:>11.2f}  "
+            f"{per_symbol_ms / batched_ms:>7.0f}x  {corr_ms:>9.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
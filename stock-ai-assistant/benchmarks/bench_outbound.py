@@ -0,0 +1,82 @@
+"""Throughput and 429 counts against a rate-limited model endpoint.
+
+Many threads send chat completions to a local stub that accepts at most
+`--limit` requests per second. "sdk retries" is the OpenAI client on its own
+(two retries, its own backoff, no shared pacing). "scheduler" sends the same
+calls through an `outbound.Upstream` configured at twice the real limit, so the
+adaptive bucket has to find the limit from the 429s.
+
+Run from the `stock-ai-assistant` directory:
+    python -m benchmarks.bench_outbound
+"""
+
+import argparse
+import threading
+import time
+
+from benchmarks.fakes import OpenAIStub
+from outbound import Upstream
+
+
+def _client(base_url: str, max_retries: int):
+    from openai import OpenAI
+
+    return OpenAI(api_key="benchmark", base_url=base_url, max_retries=max_retries, timeout=30)
+
+
+def drive(call, threads: int, duration: float) -> tuple[int, int]:
+    """Run `call` from `threads` threads for `duration` seconds; return (succeeded, failed)."""
+    counts = {"ok": 0, "failed": 0}
+    lock = threading.Lock()
+    stop = time.monotonic() + duration
+
+    def worker() -> None:
+        while time.monotonic() < stop:
+            try:
+                call()
+                outcome = "ok"
+            except Exception:
+                outcome = "failed"
+            with lock:
+                counts[outcome] += 1
+
+    workers = [threading.Thread(target=worker) for _ in range(threads)]
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    return counts["ok"], counts["failed"]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--threads", type=int, default=32)
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--limit", type=float, default=20.0, help="Requests per second the stub accepts.")
+    args = parser.parse_args()
+
+    messages = [{"role": "user", "content": "How is AAPL doing?"}]
+    print(f"{'mode':>14}  {'answers/s':>10}  {'of limit':>9}  {'failed':>7}  {'429s sent':>10}  {'retries':>8}")
+    for mode in ("sdk retries", "scheduler"):
+        with OpenAIStub(first_token_latency=0.05, completion_tokens=20, rate_limit=args.limit) as stub:
+            if mode == "sdk retries":
+                client = _client(stub.base_url, max_retries=2)
+                upstream = None
+                call = lambda: client.chat.completions.create(model="stub", messages=messages)  # noqa: E731
+            else:
+                client = _client(stub.base_url, max_retries=0)
+                upstream = Upstream("bench", rate=args.limit * 2, burst=args.limit, max_attempts=6)
+                call = lambda: upstream.call(client.chat.completions.create, model="stub", messages=messages)  # noqa: E731
+
+            ok, failed = drive(call, args.threads, args.duration)
+            retries = upstream.retries if upstream else stub.rejected - failed
+            rate = ok / args.duration
+            print(
+                f"{mode:>14}  {rate:>10.1f}  {rate / args.limit:>8.0%}  {failed:>7}  "
+                f"{stub.rejected:>10}  {retries:>8}"
+            )
+            client.close()
+
+
+if __name__ == "__main__":
+    main()
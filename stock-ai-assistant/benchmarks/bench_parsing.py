@@ -0,0 +1,58 @@
+"""Throughput of company-name matching: trie regex vs. the old per-name substring scan.
+
+Run from the `stock-ai-assistant` directory:
+    python -m benchmarks.bench_parsing
+"""
+
+import random
+import string
+import timeit
+
+from parsing import _COMPANY_MAP, _build_name_pattern
+
+QUESTIONS = [
+    "How is Tesla doing today?",
+    "Compare Microsoft and Google based on today's price movement",
+    "Tell me about Reliance Industries and Bharti Airtel, and explain the public pattern in simple terms",
+    "Is NVIDIA more volatile than AMD this week?",
+]
+
+
+def _legacy_scan(company_map: dict[str, str], text: str) -> list[str]:
+    lowered = text.lower()
+    return [ticker for name, ticker in company_map.items() if name in lowered]
+
+
+def _synthetic_map(size: int, seed: int = 7) -> dict[str, str]:
+    rng = random.Random(seed)
+    names = dict(_COMPANY_MAP)
+    while len(names) < size:
+        words = [
+            "".join(rng.choices(string.ascii_lowercase, k=rng.randint(3, 9)))
+            for _ in range(rng.randint(1, 3))
+        ]
+        names[" ".join(words)] = "".join(rng.choices(string.ascii_uppercase, k=4))
+    return names
+
+
+def _per_second(func, number: int) -> float:
+    elapsed = timeit.timeit(func, number=number)
+    return number * len(QUESTIONS) / elapsed
+
+
+def main() -> None:
+    print(f"{'names':>8}  {'build (ms)':>10}  {'legacy q/s':>12}  {'trie q/s':>12}  {'speedup':>8}")
+    for size in (len(_COMPANY_MAP), 1_000, 10_000, 50_000):
+        company_map = _synthetic_map(size)
+        started = timeit.default_timer()
+        pattern = _build_name_pattern(company_map)
+        build_ms = (timeit.default_timer() - started) * 1000
+
+        number = max(5, 20_000 // size)
+        legacy = _per_second(lambda: [_legacy_scan(company_map, q) for q in QUESTIONS], number)
+        trie = _per_second(lambda: [pattern.findall(q.lower()) for q in QUESTIONS], number * 20)
+        print(f"{size:>8}  {build_ms:>10.1f}  {legacy:>12,.0f}  {trie:>12,.0f}  {trie / legacy:>7.0f}x")
+
+
+if __name__ == "__main__":
+    main()
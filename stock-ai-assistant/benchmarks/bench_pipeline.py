@@ -0,0 +1,191 @@
+"""Per-stage and end-to-end latency of the question pipeline against offline stand-ins.
+
+Yahoo Finance, the model endpoint and Streamlit are replaced by the fakes in
+`benchmarks.fakes`, so results depend only on this code and the configured
+simulated latencies. Quote and answer caches are cleared before every
+iteration; the reference store is warmed once, as it would be in production.
+
+Run from the `stock-ai-assistant` directory:
+    python -m benchmarks.bench_pipeline --output bench_pipeline.json
+"""
+
+import argparse
+import builtins
+import contextlib
+import io
+import json
+import os
+import platform
+import statistics
+import tempfile
+import time
+from datetime import datetime, timezone
+from typing import Callable
+
+from benchmarks.fakes import FakeYFinance, OpenAIStub, install_fake_streamlit, install_fake_yfinance
+
+SYMBOL_COUNTS = (1, 5, 20, 100)
+
+
+def _question_for(count: int) -> str:
+    from parsing import SUPPORTED_COMPANIES
+
+    tickers = [ticker for _, _, _, ticker in SUPPORTED_COMPANIES[:count]]
+    return "Compare " + ", ".join(tickers) + " today"
+
+
+def _summarize(samples: list[float]) -> dict[str, float]:
+    ordered = sorted(samples)
+    p95_index = min(len(ordered) - 1, round(0.95 * (len(ordered) - 1)))
+    return {
+        "mean_ms": statistics.fmean(ordered) * 1000,
+        "p50_ms": statistics.median(ordered) * 1000,
+        "p95_ms": ordered[p95_index] * 1000,
+        "min_ms": ordered[0] * 1000,
+        "max_ms": ordered[-1] * 1000,
+    }
+
+
+def _timed(func: Callable[[], object]) -> tuple[float, object]:
+    started = time.perf_counter()
+    result = func()
+    return time.perf_counter() - started, result
+
+
+def _reset_caches() -> None:
+    from answer_cache import get_answer_cache
+    from quote_cache import get_quote_cache
+
+    get_quote_cache().clear()
+    get_answer_cache().clear()
+
+
+def _run_cli(question: str) -> None:
+    import stock_assistant
+
+    answers = iter([question])
+
+    def fake_input(prompt: str = "") -> str:
+        if "comma-separated" in prompt:
+            return ""
+        return next(answers, "quit")
+
+    original_input = builtins.input
+    builtins.input = fake_input
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            stock_assistant.main([])
+    finally:
+        builtins.input = original_input
+
+
+def run(repeat: int, counts: tuple[int, ...]) -> list[dict]:
+    import ai_service
+    import app
+    import streamlit as st
+    from config import load_config
+    from data_service import get_stock_data_many
+    from parsing import extract_symbols
+    from reference_store import get_reference_store
+
+    config = load_config()
+    results = []
+    for count in counts:
+        question = _question_for(count)
+        symbols = extract_symbols(question)
+        get_reference_store().get_many(symbols)
+
+        stages: dict[str, list[float]] = {
+            "parse": [],
+            "fetch": [],
+            "prompt": [],
+            "llm": [],
+            "app_end_to_end": [],
+            "cli_end_to_end": [],
+        }
+        for _ in range(repeat):
+            _reset_caches()
+            elapsed, found = _timed(lambda: extract_symbols(question))
+            stages["parse"].append(elapsed)
+            elapsed, fetched = _timed(lambda: get_stock_data_many(found))
+            stages["fetch"].append(elapsed)
+            items = [result.data for result in fetched if result.data]
+            elapsed, _ = _timed(lambda: ai_service._build_messages(items, question))
+            stages["prompt"].append(elapsed)
+            elapsed, _ = _timed(lambda: ai_service.explain_with_ai(items, question, config))
+            stages["llm"].append(elapsed)
+
+            _reset_caches()
+            st.session_state.clear()
+            app._init_state()
+            elapsed, _ = _timed(lambda: app._handle_question(question))
+            stages["app_end_to_end"].append(elapsed)
+
+            _reset_caches()
+            elapsed, _ = _timed(lambda: _run_cli(question))
+            stages["cli_end_to_end"].append(elapsed)
+
+        results.append(
+            {
+                "symbols": count,
+                "resolved_symbols": len(symbols),
+                "stages": {name: _summarize(samples) for name, samples in stages.items()},
+            }
+        )
+        app_p50 = results[-1]["stages"]["app_end_to_end"]["p50_ms"]
+        fetch_p50 = results[-1]["stages"]["fetch"]["p50_ms"]
+        print(f"[*] {count:>3} symbols: fetch p50 {fetch_p50:8.1f} ms, app end-to-end p50 {app_p50:8.1f} ms")
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--symbols", type=int, nargs="+", default=list(SYMBOL_COUNTS))
+    parser.add_argument("--yahoo-latency", type=float, default=0.05, help="Seconds per simulated Yahoo call.")
+    parser.add_argument("--yahoo-failure-rate", type=float, default=0.0)
+    parser.add_argument("--llm-first-token", type=float, default=0.2, help="Seconds before the stub answers.")
+    parser.add_argument("--llm-token-latency", type=float, default=0.002)
+    parser.add_argument("--llm-failure-rate", type=float, default=0.0)
+    parser.add_argument("--output", default="bench_pipeline.json")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="stock-bench-")
+    os.environ["REFERENCE_DB_PATH"] = os.path.join(workdir, "reference.sqlite3")
+    os.environ.pop("ANSWER_CACHE_PATH", None)
+    install_fake_streamlit()
+    market = FakeYFinance(latency=args.yahoo_latency, failure_rate=args.yahoo_failure_rate)
+    install_fake_yfinance(market)
+
+    stub = OpenAIStub(
+        first_token_latency=args.llm_first_token,
+        token_latency=args.llm_token_latency,
+        failure_rate=args.llm_failure_rate,
+    )
+    # Import the entry points first so config's load_dotenv() runs before the
+    # stub settings are applied; an empty token still wins over .env.
+    import app  # noqa: F401
+    import stock_assistant  # noqa: F401
+
+    with stub:
+        os.environ["GIT_ACCESS_TOKEN"] = ""
+        os.environ["OPENAI_API_KEY"] = "benchmark"
+        os.environ["OPENAI_BASE_URL"] = stub.base_url
+        os.environ["OPENAI_MODEL"] = "stub-model"
+        results = run(args.repeat, tuple(args.symbols))
+
+    report = {
+        "benchmark": "pipeline",
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "parameters": vars(args),
+        "upstream_calls": {"yahoo": market.calls, "llm_requests": stub.requests},
+        "results": results,
+    }
+    with open(args.output, "w", encoding="utf-8") as handle:
+        json.dump(report, handle, indent=2)
+    print(f"[*] Wrote {args.output}")
+
+
+if __name__ == "__main__":
+    main()
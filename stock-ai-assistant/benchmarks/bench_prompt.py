@@ -0,0 +1,63 @@
+"""Prompt size and build time of the prose vs. compact table stock encodings.
+
+Run from the `stock-ai-assistant` directory:
+    python -m benchmarks.bench_prompt
+"""
+
+import random
+import timeit
+
+from formatting import create_compact_table, create_multi_summary
+from models import StockData
+from parsing import SUPPORTED_COMPANIES
+from tokens import estimate_tokens
+
+
+def make_stock_data(count: int, seed: int = 11) -> list[StockData]:
+    rng = random.Random(seed)
+    items = []
+    for index in range(count):
+        _, _, name, ticker = SUPPORTED_COMPANIES[index % len(SUPPORTED_COMPANIES)]
+        symbol = ticker if index < len(SUPPORTED_COMPANIES) else f"{ticker.split('.')[0]}{index}"
+        previous = round(rng.uniform(20, 4000), 2)
+        price = round(previous * rng.uniform(0.95, 1.05), 2)
+        items.append(
+            StockData(
+                symbol=symbol,
+                name=name,
+                current_price=price,
+                previous_close=previous,
+                open_price=round(previous * rng.uniform(0.98, 1.02), 2),
+                day_high=round(max(price, previous) * 1.01, 2),
+                day_low=round(min(price, previous) * 0.99, 2),
+                volume=rng.randint(100_000, 90_000_000),
+                market_cap=rng.randint(10**10, 4 * 10**12),
+                week_52_high=round(price * rng.uniform(1.0, 1.6), 2),
+                week_52_low=round(price * rng.uniform(0.5, 1.0), 2),
+                change=round(price - previous, 2),
+                change_percent=round((price - previous) / previous * 100, 2),
+            )
+        )
+    return items
+
+
+def main() -> None:
+    print(f"{'symbols':>8}  {'prose tok':>10}  {'table tok':>10}  {'saved':>6}  {'prose ms':>9}  {'table ms':>9}")
+    for count in (1, 10, 100):
+        items = make_stock_data(count)
+        prose = create_multi_summary(items)
+        table = create_compact_table(items)
+        number = max(10, 2_000 // count)
+        prose_ms = timeit.timeit(lambda: create_multi_summary(items), number=number) / number * 1000
+        table_ms = timeit.timeit(lambda: create_compact_table(items), number=number) / number * 1000
+        prose_tokens = estimate_tokens(prose)
+        table_tokens = estimate_tokens(table)
+        saved = 1 - table_tokens / prose_tokens
+        print(
+            f"{count:>8}  {prose_tokens:>10,}  {table_tokens:>10,}  {saved:>6.0%}  "
+            f"{prose_ms:>9.3f}  {table_ms:>9.3f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
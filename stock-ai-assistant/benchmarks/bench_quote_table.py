@@ -0,0 +1,78 @@
+"""Memory and build time of a `StockData` list vs. a columnar `QuoteTable`.
+
+Both are built from the same per-field NumPy columns (the shape a bulk download
+arrives in). Memory is what each representation keeps alive, measured with
+tracemalloc; symbol and name strings are shared by both, so they are not counted.
+
+Run from the `stock-ai-assistant` directory:
+    python -m benchmarks.bench_quote_table
+"""
+
+import gc
+import timeit
+import tracemalloc
+
+import numpy as np
+
+from benchmarks.bench_prompt import make_stock_data
+from models import StockData
+from quote_table import FIELDS, QuoteTable
+
+ROWS = (1_000, 10_000)
+
+
+def make_columns(count: int) -> dict[str, np.ndarray]:
+    table = QuoteTable.from_stock_data(make_stock_data(count))
+    return {name: table.column(name) for name in FIELDS}
+
+
+def build_list(columns: dict[str, np.ndarray]) -> list[StockData]:
+    values = [columns[name].tolist() for name in FIELDS if name != "fetched_at"]
+    return [StockData(*row) for row in zip(*values)]
+
+
+def build_table(columns: dict[str, np.ndarray]) -> QuoteTable:
+    return QuoteTable.from_columns(**{name: values.copy() for name, values in columns.items()})
+
+
+def retained_bytes(build, columns: dict[str, np.ndarray]) -> int:
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    result = build(columns)
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del result
+    return after - before
+
+
+def _time_ms(func, number: int) -> float:
+    return timeit.timeit(func, number=number) / number * 1000
+
+
+def main() -> None:
+    print(
+        f"{'rows':>7}  {'list MB':>8}  {'table MB':>9}  {'list build ms':>14}  {'table build ms':>15}  "
+        f"{'list filter ms':>15}  {'table filter ms':>16}"
+    )
+    for count in ROWS:
+        columns = make_columns(count)
+        number = max(3, 20_000 // count)
+        items = build_list(columns)
+        table = build_table(columns)
+
+        list_mb = retained_bytes(build_list, columns) / 1e6
+        table_mb = retained_bytes(build_table, columns) / 1e6
+        list_ms = _time_ms(lambda: build_list(columns), number)
+        table_ms = _time_ms(lambda: build_table(columns), number)
+        # Gainers above 1%: a list comprehension vs. a mask over one column.
+        list_filter_ms = _time_ms(lambda: [item for item in items if item.change_percent > 1], number)
+        table_filter_ms = _time_ms(lambda: table.filter(table.column("change_percent") > 1), number)
+        print(
+            f"{count:>7,}  {list_mb:>8.2f}  {table_mb:>9.2f}  {list_ms:>14.2f}  {table_ms:>15.2f}  "
+            f"{list_filter_ms:>15.3f}  {table_filter_ms:>16.3f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
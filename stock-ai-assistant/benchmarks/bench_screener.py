@@ -0,0 +1,70 @@
+"""Screener latency and prompt size as the ranked universe grows.
+
+Synthetic universes are fetched from the offline Yahoo stand-in with a cold
+quote cache every iteration (the reference store is warmed once, as in
+production), then ranked. The prompt only ever carries the top rows, so its
+token count should not move with the universe size.
+
+Run from the `stock-ai-assistant` directory:
+    python -m benchmarks.bench_screener
+"""
+
+import argparse
+import os
+import statistics
+import tempfile
+import time
+
+from benchmarks.fakes import FakeYFinance, install_fake_yfinance
+
+UNIVERSE_SIZES = (100, 500, 2_000)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(UNIVERSE_SIZES))
+    parser.add_argument("--yahoo-latency", type=float, default=0.05, help="Seconds per simulated Yahoo call.")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="stock-bench-")
+    os.environ["REFERENCE_DB_PATH"] = os.path.join(workdir, "reference.sqlite3")
+    os.environ["QUOTE_CACHE_SIZE"] = str(max(args.sizes) * 2)
+    market = FakeYFinance(latency=args.yahoo_latency)
+    install_fake_yfinance(market)
+
+    import ai_service
+    from quote_cache import get_quote_cache
+    from reference_store import get_reference_store
+    from screener import ScreenRequest, rank, run_screen
+    from tokens import estimate_message_tokens
+
+    request = ScreenRequest(metric="gainers", limit=5)
+    print(f"{'universe':>9}  {'screen p50 ms':>14}  {'rank ms':>8}  {'downloads':>10}  {'prompt tok':>11}")
+    for size in args.sizes:
+        symbols = [f"SYM{index}" for index in range(size)]
+        get_reference_store().get_many(symbols)
+
+        samples = []
+        downloads = market.calls["download"]
+        for _ in range(args.repeat):
+            get_quote_cache().clear()
+            started = time.perf_counter()
+            result = run_screen(request, symbols)
+            samples.append(time.perf_counter() - started)
+        downloads = (market.calls["download"] - downloads) / args.repeat
+
+        items = [get_quote_cache().get(symbol) for symbol in symbols]
+        started = time.perf_counter()
+        rank(items, request.metric, request.limit)
+        rank_ms = (time.perf_counter() - started) * 1000
+
+        messages = ai_service._build_messages(result.items, "top gainers today", context=result.describe())
+        print(
+            f"{size:>9,}  {statistics.median(samples) * 1000:>14.1f}  {rank_ms:>8.2f}  "
+            f"{downloads:>10.1f}  {estimate_message_tokens(messages):>11,}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,181 @@
+"""Load test for `server.py` against the offline Yahoo and model stand-ins.
+
+Starts the HTTP service in-process, then drives it with keep-alive client
+connections for a fixed duration and reports sustained requests/sec and
+latency percentiles per endpoint. Caches are disabled by default so every
+request exercises the outbound path; pass --warm-cache to keep them.
+
+Run from the `stock-ai-assistant` directory:
+    python -m benchmarks.bench_server --clients 32 --duration 10 --output bench_server.json
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import statistics
+import tempfile
+import threading
+import time
+from collections import Counter, defaultdict
+from datetime import datetime, timezone
+
+from benchmarks.fakes import FakeYFinance, OpenAIStub, install_fake_yfinance
+
+
+async def _request(reader, writer, method: str, path: str, body: dict | None = None) -> int:
+    payload = json.dumps(body).encode("utf-8") if body is not None else b""
+    writer.write(
+        (
+            f"{method} {path} HTTP/1.1\r\nHost: bench\r\nContent-Type: application/json\r\n"
+            f"Content-Length: {len(payload)}\r\n\r\n"
+        ).encode("latin-1")
+        + payload
+    )
+    await writer.drain()
+    head = await reader.readuntil(b"\r\n\r\n")
+    lines = head.decode("latin-1").split("\r\n")
+    status = int(lines[0].split()[1])
+    headers = {}
+    for line in lines[1:]:
+        name, _, value = line.partition(":")
+        headers[name.strip().lower()] = value.strip()
+    await reader.readexactly(int(headers.get("content-length", "0")))
+    return status
+
+
+def _workload(tickers: list[str], ask_ratio: float, rng: random.Random):
+    while True:
+        roll = rng.random()
+        if roll < ask_ratio:
+            picked = rng.sample(tickers, 2)
+            yield "ask", "POST", "/ask", {"question": f"Compare {picked[0]} and {picked[1]} today"}
+        elif roll < ask_ratio + (1 - ask_ratio) / 2:
+            yield "quotes", "POST", "/quotes", {"symbols": rng.sample(tickers, 5)}
+        else:
+            yield "quote", "GET", f"/quote?symbol={rng.choice(tickers)}", None
+
+
+async def _client(port: int, deadline: float, workload, samples, statuses) -> None:
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    try:
+        while time.perf_counter() < deadline:
+            kind, method, path, body = next(workload)
+            started = time.perf_counter()
+            try:
+                status = await _request(reader, writer, method, path, body)
+            except (ConnectionError, asyncio.IncompleteReadError):
+                statuses[kind]["connection_error"] += 1
+                writer.close()
+                reader, writer = await asyncio.open_connection("127.0.0.1", port)
+                continue
+            statuses[kind][status] += 1
+            if status == 200:
+                samples[kind].append(time.perf_counter() - started)
+            elif status == 503:
+                await asyncio.sleep(0.05)
+    finally:
+        writer.close()
+
+
+async def _drive(port: int, clients: int, duration: float, tickers: list[str], ask_ratio: float):
+    samples: dict[str, list[float]] = defaultdict(list)
+    statuses: dict[str, Counter] = defaultdict(Counter)
+    rng = random.Random(3)
+    workload = _workload(tickers, ask_ratio, rng)
+    deadline = time.perf_counter() + duration
+    started = time.perf_counter()
+    await asyncio.gather(*(_client(port, deadline, workload, samples, statuses) for _ in range(clients)))
+    return time.perf_counter() - started, samples, statuses
+
+
+def _percentile(ordered: list[float], fraction: float) -> float:
+    return ordered[min(len(ordered) - 1, round(fraction * (len(ordered) - 1)))]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--clients", type=int, default=32)
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--ask-ratio", type=float, default=0.2, help="Share of requests that hit /ask.")
+    parser.add_argument("--max-outbound", type=int, default=16)
+    parser.add_argument("--max-pending", type=int, default=64)
+    parser.add_argument("--yahoo-latency", type=float, default=0.05)
+    parser.add_argument("--llm-first-token", type=float, default=0.2)
+    parser.add_argument("--warm-cache", action="store_true")
+    parser.add_argument("--output", default="bench_server.json")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="stock-bench-")
+    os.environ["REFERENCE_DB_PATH"] = os.path.join(workdir, "reference.sqlite3")
+    if not args.warm_cache:
+        for name in ("QUOTE_CACHE_TTL_SECONDS", "QUOTE_CACHE_CLOSED_TTL_SECONDS", "ANSWER_CACHE_TTL_SECONDS"):
+            os.environ[name] = "0"
+
+    import server
+    from config import Config
+    from parsing import SUPPORTED_COMPANIES
+
+    market = FakeYFinance(latency=args.yahoo_latency)
+    install_fake_yfinance(market)
+    tickers = [ticker for _, _, _, ticker in SUPPORTED_COMPANIES]
+
+    with OpenAIStub(first_token_latency=args.llm_first_token, completion_tokens=120) as stub:
+        config = Config(api_key="benchmark", base_url=stub.base_url, model="stub-model")
+        app = server.AssistantServer(config, max_outbound=args.max_outbound, max_pending=args.max_pending)
+
+        loop = asyncio.new_event_loop()
+        ready = threading.Event()
+        ports: list[int] = []
+
+        async def start() -> None:
+            listener = await asyncio.start_server(app.handle_connection, "127.0.0.1", 0)
+            ports.append(listener.sockets[0].getsockname()[1])
+            ready.set()
+            async with listener:
+                await listener.serve_forever()
+
+        thread = threading.Thread(target=lambda: loop.run_until_complete(start()), daemon=True)
+        thread.start()
+        ready.wait()
+
+        elapsed, samples, statuses = asyncio.run(
+            _drive(ports[0], args.clients, args.duration, tickers, args.ask_ratio)
+        )
+        app.close()
+
+    endpoints = {}
+    for kind in sorted(set(samples) | set(statuses)):
+        ordered = sorted(samples.get(kind, []))
+        endpoints[kind] = {
+            "ok": len(ordered),
+            "statuses": {str(status): count for status, count in statuses[kind].items()},
+            "requests_per_second": len(ordered) / elapsed,
+            "p50_ms": statistics.median(ordered) * 1000 if ordered else None,
+            "p95_ms": _percentile(ordered, 0.95) * 1000 if ordered else None,
+        }
+    total_ok = sum(endpoint["ok"] for endpoint in endpoints.values())
+    report = {
+        "benchmark": "server",
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "parameters": vars(args),
+        "elapsed_seconds": elapsed,
+        "requests_per_second": total_ok / elapsed,
+        "upstream_calls": {"yahoo": market.calls, "llm_requests": stub.requests},
+        "endpoints": endpoints,
+    }
+    for kind, endpoint in endpoints.items():
+        p50 = endpoint["p50_ms"]
+        p50_text = f"{p50:8.1f} ms" if p50 is not None else "       -   "
+        print(f"[*] {kind:<7} {endpoint['requests_per_second']:8.1f} req/s  p50 {p50_text}  {endpoint['statuses']}")
+    print(f"[*] total   {report['requests_per_second']:8.1f} req/s over {elapsed:.1f}s")
+    with open(args.output, "w", encoding="utf-8") as handle:
+        json.dump(report, handle, indent=2)
+    print(f"[*] Wrote {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+"""Cold-start cost of the entry points, measured in fresh interpreters.
+
+For each entry module this reports the wall time of `import <module>`, which
+heavy third-party packages that import dragged in, and the CLI's time from
+process launch to its first prompt. The "deferred" row imports the packages
+that are now loaded on first use, i.e. the cost moved off the startup path.
+
+Run from the `stock-ai-assistant` directory:
+    python -m benchmarks.bench_startup --repeat 5 --output bench_startup.json
+"""
+
+import argparse
+import importlib.util
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+
+HEAVY_PACKAGES = ("yfinance", "pandas", "numpy", "openai", "httpx", "streamlit")
+DEFERRED = ("yfinance", "openai", "httpx")
+PROMPT = "Your question"
+
+
+def _environment() -> dict[str, str]:
+    env = dict(os.environ)
+    env.setdefault("OPENAI_API_KEY", "startup-benchmark")
+    env["PYTHONDONTWRITEBYTECODE"] = "1"
+    return env
+
+
+def _import_once(statement: str) -> tuple[float, dict[str, float]]:
+    """Run `statement` under `-X importtime`; return wall ms and cumulative ms per heavy package."""
+    started = time.perf_counter()
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", statement],
+        capture_output=True,
+        text=True,
+        env=_environment(),
+        check=True,
+    )
+    wall_ms = (time.perf_counter() - started) * 1000
+
+    packages = {}
+    for line in completed.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = (part.strip() for part in line.split(":", 1)[1].split("|"))
+        if name in HEAVY_PACKAGES:
+            packages[name] = int(cumulative) / 1000
+    return wall_ms, packages
+
+
+def _time_to_prompt() -> float:
+    started = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, "-u", "stock_assistant.py"],
+        stdin=subprocess.PIPE,
+        stdout=subprocess.PIPE,
+        text=True,
+        env=_environment(),
+    )
+    seen = ""
+    while PROMPT not in seen:
+        chunk = process.stdout.read(1)
+        if not chunk:
+            raise RuntimeError("stock_assistant.py exited before showing a prompt")
+        seen += chunk
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    process.communicate("quit\n", timeout=30)
+    return elapsed_ms
+
+
+def _summary(samples: list[float]) -> dict[str, float]:
+    return {"median_ms": round(statistics.median(samples), 1), "min_ms": round(min(samples), 1)}
+
+
+def run(repeat: int) -> dict:
+    targets = {"stock_assistant": "import stock_assistant", "server": "import server"}
+    if importlib.util.find_spec("streamlit") is not None:
+        targets["app"] = "import app"
+    installed = [name for name in DEFERRED if importlib.util.find_spec(name) is not None]
+    if installed:
+        targets["deferred"] = "import " + ", ".join(installed)
+
+    results = {}
+    for label, statement in targets.items():
+        walls = []
+        packages = {}
+        for _ in range(repeat):
+            wall_ms, packages = _import_once(statement)
+            walls.append(wall_ms)
+        results[label] = {**_summary(walls), "heavy_packages_ms": packages}
+        print(f"[*] {label:<16} {results[label]['median_ms']:>8.1f} ms  loaded: {', '.join(packages) or '-'}")
+
+    prompts = [_time_to_prompt() for _ in range(repeat)]
+    results["cli_first_prompt"] = _summary(prompts)
+    print(f"[*] {'cli_first_prompt':<16} {results['cli_first_prompt']['median_ms']:>8.1f} ms")
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--output", default="bench_startup.json")
+    args = parser.parse_args()
+
+    report = {
+        "benchmark": "startup",
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "parameters": vars(args),
+        "results": run(args.repeat),
+    }
+    with open(args.output, "w", encoding="utf-8") as handle:
+        json.dump(report, handle, indent=2)
+    print(f"[*] Wrote {args.output}")
+
+
+if __name__ == "__main__":
+    main()
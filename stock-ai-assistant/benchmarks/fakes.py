@@ -0,0 +1,342 @@
+"""Offline stand-ins for Yahoo Finance, the model API and Streamlit.
+
+They let the benchmarks exercise the real data, prompt and UI code paths with
+controllable latency and failure rates instead of live network calls.
+"""
+
+import contextlib
+import hashlib
+import json
+import os
+import random
+import sys
+import threading
+import time
+import types
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+_FIELDS = ("Open", "High", "Low", "Close", "Volume")
+
+
+def _seed_for(symbol: str) -> int:
+    return int(hashlib.md5(symbol.encode("utf-8")).hexdigest()[:8], 16)
+
+
+class FakeYFinance:
+    """Drop-in for the parts of the `yfinance` module this project uses."""
+
+    def __init__(self, latency: float = 0.05, failure_rate: float = 0.0, seed: int = 0, sessions: int = 5) -> None:
+        self.latency = latency
+        self.failure_rate = failure_rate
+        self.sessions = sessions
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self.calls = {"history": 0, "info": 0, "download": 0}
+        # Bars are deterministic per symbol; building them is the stand-in's own cost, not Yahoo's.
+        self._bars: dict[str, pd.DataFrame] = {}
+
+    def _round_trip(self, kind: str) -> None:
+        with self._lock:
+            self.calls[kind] += 1
+            failed = self._rng.random() < self.failure_rate
+        time.sleep(self.latency)
+        if failed:
+            raise ConnectionError(f"Simulated Yahoo {kind} failure")
+
+    def bars(self, symbol: str) -> pd.DataFrame:
+        cached = self._bars.get(symbol)
+        if cached is None:
+            cached = self._bars[symbol] = self._make_bars(symbol)
+        return cached
+
+    def _make_bars(self, symbol: str) -> pd.DataFrame:
+        rng = random.Random(_seed_for(symbol))
+        index = pd.bdate_range(end=pd.Timestamp.now(tz="UTC").normalize(), periods=self.sessions)
+        close = rng.uniform(20, 4000)
+        rows = []
+        for _ in index:
+            open_price = close * rng.uniform(0.98, 1.02)
+            close = open_price * rng.uniform(0.97, 1.03)
+            rows.append(
+                {
+                    "Open": open_price,
+                    "High": max(open_price, close) * 1.01,
+                    "Low": min(open_price, close) * 0.99,
+                    "Close": close,
+                    "Volume": rng.randint(100_000, 50_000_000),
+                }
+            )
+        return pd.DataFrame(rows, index=index, columns=list(_FIELDS))
+
+    def info(self, symbol: str) -> dict:
+        rng = random.Random(_seed_for(symbol) + 1)
+        last = float(self.bars(symbol)["Close"].iloc[-1])
+        return {
+            "longName": f"{symbol} Holdings",
+            "currency": "INR" if symbol.endswith((".NS", ".BO")) else "USD",
+            "marketCap": rng.randint(10**10, 3 * 10**12),
+            "fiftyTwoWeekHigh": last * rng.uniform(1.0, 1.5),
+            "fiftyTwoWeekLow": last * rng.uniform(0.5, 1.0),
+        }
+
+    def Ticker(self, symbol: str) -> "FakeTicker":
+        return FakeTicker(self, symbol.upper())
+
+    def download(self, tickers, **kwargs) -> pd.DataFrame:
+        symbols = [tickers] if isinstance(tickers, str) else list(tickers)
+        self._round_trip("download")
+        frames = [self.bars(symbol) for symbol in symbols]
+        # Same (field, ticker) layout as `yf.download(group_by="column")`, built in one step.
+        values = np.stack([frame.to_numpy(dtype=float) for frame in frames], axis=2)
+        columns = pd.MultiIndex.from_product([list(_FIELDS), symbols])
+        return pd.DataFrame(values.reshape(len(frames[0]), -1), index=frames[0].index, columns=columns)
+
+
+class FakeTicker:
+    def __init__(self, market: FakeYFinance, symbol: str) -> None:
+        self._market = market
+        self.ticker = symbol
+
+    def history(self, period: str = "1d", **kwargs) -> pd.DataFrame:
+        self._market._round_trip("history")
+        return self._market.bars(self.ticker)
+
+    @property
+    def info(self) -> dict:
+        self._market._round_trip("info")
+        return self._market.info(self.ticker)
+
+
+def install_fake_yfinance(market: FakeYFinance) -> None:
+    """Point every module that talks to Yahoo at `market`."""
+    import data_service
+    import history_store
+    import reference_store
+
+    data_service.yf = market
+    history_store.yf = market
+    reference_store.yf = market
+    # The stand-in has no rate limit to protect; keep outbound pacing out of the timings.
+    os.environ.setdefault("YAHOO_RATE_PER_SECOND", "10000")
+
+
+class OpenAIStub:
+    """Local OpenAI-compatible `/chat/completions` endpoint with simulated latency.
+
+    `first_token_latency` is the delay before any output, `token_latency` the
+    delay between streamed tokens. Failed requests get a 429 with Retry-After.
+    `rate_limit` caps accepted requests per second like a real endpoint; requests
+    over it are rejected with a 429 whose Retry-After says when a slot frees up.
+    """
+
+    def __init__(
+        self,
+        first_token_latency: float = 0.2,
+        token_latency: float = 0.002,
+        completion_tokens: int = 200,
+        failure_rate: float = 0.0,
+        rate_limit: Optional[float] = None,
+        seed: int = 0,
+    ) -> None:
+        self.first_token_latency = first_token_latency
+        self.token_latency = token_latency
+        self.completion_tokens = completion_tokens
+        self.failure_rate = failure_rate
+        self.rate_limit = rate_limit
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.rejected = 0
+        self._allowance = rate_limit or 0.0
+        self._allowance_at = time.monotonic()
+        self._server: Optional[ThreadingHTTPServer] = None
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def start(self) -> "OpenAIStub":
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args) -> None:
+                pass
+
+            def do_POST(self) -> None:
+                length = int(self.headers.get("Content-Length", 0))
+                body = json.loads(self.rfile.read(length) or b"{}")
+                stub._handle(self, body)
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        if self.rate_limit is None:
+            os.environ.setdefault("LLM_RATE_PER_SECOND", "10000")
+        return self
+
+    def stop(self) -> None:
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+
+    def __enter__(self) -> "OpenAIStub":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+    def _over_limit(self) -> Optional[float]:
+        """Seconds until the next request would be accepted, or None if this one is (call under the lock)."""
+        if self.rate_limit is None:
+            return None
+        now = time.monotonic()
+        self._allowance = min(self.rate_limit, self._allowance + (now - self._allowance_at) * self.rate_limit)
+        self._allowance_at = now
+        if self._allowance >= 1:
+            self._allowance -= 1
+            return None
+        return (1 - self._allowance) / self.rate_limit
+
+    def _reject(self, handler: BaseHTTPRequestHandler, retry_after: float) -> None:
+        payload = json.dumps({"error": {"message": "Simulated rate limit", "type": "rate_limit"}}).encode()
+        handler.send_response(429)
+        handler.send_header("Content-Type", "application/json")
+        handler.send_header("Retry-After", str(max(1, round(retry_after))))
+        handler.send_header("Retry-After-Ms", str(round(retry_after * 1000)))
+        handler.send_header("Content-Length", str(len(payload)))
+        handler.end_headers()
+        handler.wfile.write(payload)
+
+    def _handle(self, handler: BaseHTTPRequestHandler, body: dict) -> None:
+        with self._lock:
+            self.requests += 1
+            wait = self._over_limit()
+            if wait is not None:
+                self.rejected += 1
+            failed = wait is None and self._rng.random() < self.failure_rate
+        if wait is not None:
+            self._reject(handler, wait)
+            return
+        time.sleep(self.first_token_latency)
+
+        if failed:
+            self._reject(handler, 1.0)
+            return
+
+        model = body.get("model", "stub")
+        prompt_tokens = sum(len(str(message.get("content", ""))) // 4 for message in body.get("messages", []))
+        words = [f"word{index % 50}" for index in range(self.completion_tokens)]
+
+        if not body.get("stream"):
+            time.sleep(self.token_latency * self.completion_tokens)
+            payload = json.dumps(
+                {
+                    "id": "chatcmpl-stub",
+                    "object": "chat.completion",
+                    "created": int(time.time()),
+                    "model": model,
+                    "choices": [
+                        {
+                            "index": 0,
+                            "message": {"role": "assistant", "content": " ".join(words)},
+                            "finish_reason": "stop",
+                        }
+                    ],
+                    "usage": {
+                        "prompt_tokens": prompt_tokens,
+                        "completion_tokens": self.completion_tokens,
+                        "total_tokens": prompt_tokens + self.completion_tokens,
+                    },
+                }
+            ).encode()
+            handler.send_response(200)
+            handler.send_header("Content-Type", "application/json")
+            handler.send_header("Content-Length", str(len(payload)))
+            handler.end_headers()
+            handler.wfile.write(payload)
+            return
+
+        handler.send_response(200)
+        handler.send_header("Content-Type", "text/event-stream")
+        handler.send_header("Connection", "close")
+        handler.end_headers()
+        handler.close_connection = True
+        try:
+            for index, word in enumerate(words):
+                chunk = {
+                    "id": "chatcmpl-stub",
+                    "object": "chat.completion.chunk",
+                    "created": int(time.time()),
+                    "model": model,
+                    "choices": [
+                        {
+                            "index": 0,
+                            "delta": {"content": word if index == 0 else f" {word}"},
+                            "finish_reason": None,
+                        }
+                    ],
+                }
+                handler.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode())
+                handler.wfile.flush()
+                time.sleep(self.token_latency)
+            if (body.get("stream_options") or {}).get("include_usage"):
+                chunk = {
+                    "id": "chatcmpl-stub",
+                    "object": "chat.completion.chunk",
+                    "created": int(time.time()),
+                    "model": model,
+                    "choices": [],
+                    "usage": {
+                        "prompt_tokens": prompt_tokens,
+                        "completion_tokens": self.completion_tokens,
+                        "total_tokens": prompt_tokens + self.completion_tokens,
+                    },
+                }
+                handler.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode())
+            handler.wfile.write(b"data: [DONE]\n\n")
+            handler.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            # The client stopped reading, e.g. an answer cut short by its deadline.
+            pass
+
+
+class _SessionState(dict):
+    def __getattr__(self, name):
+        try:
+            return self[name]
+        except KeyError as exc:
+            raise AttributeError(name) from exc
+
+    def __setattr__(self, name, value) -> None:
+        self[name] = value
+
+
+def install_fake_streamlit() -> types.ModuleType:
+    """Register a minimal `streamlit` module so `app` can be imported headless."""
+    module = types.ModuleType("streamlit")
+    module.session_state = _SessionState()
+
+    def _noop(*args, **kwargs):
+        return None
+
+    for name in (
+        "set_page_config", "markdown", "caption", "button", "warning", "rerun", "chat_input", "columns",
+        "text_input", "dataframe",
+    ):
+        setattr(module, name, _noop)
+    module.fragment = lambda *args, **kwargs: (lambda func: func)
+    module.chat_message = lambda *args, **kwargs: contextlib.nullcontext()
+    module.expander = lambda *args, **kwargs: contextlib.nullcontext()
+    module.spinner = lambda *args, **kwargs: contextlib.nullcontext()
+    module.write_stream = lambda stream: "".join(stream)
+    sys.modules["streamlit"] = module
+    return module
@@ -0,0 +1,135 @@
+"""Background refresh of the quote cache for the symbols users ask about most.
+
+Disabled unless CACHE_WARMER=1. Every interval the warmer re-downloads the
+watchlist (CACHE_WARMER_SYMBOLS, default: every ticker in
+`parsing.SUPPORTED_COMPANIES`) in bulk batches, pausing between batches so
+Yahoo is not hit with the whole list at once. Symbols whose market is closed
+are skipped; their cached quotes already live for the longer closed TTL.
+"""
+
+import os
+import threading
+import time
+from typing import Callable, Optional
+
+from data_service import refresh_stock_data
+from markets import is_symbol_market_open
+from metrics import REGISTRY, span
+from parsing import SUPPORTED_COMPANIES
+from quote_cache import normalize_symbol
+
+
+def default_watchlist() -> list[str]:
+    configured = os.getenv("CACHE_WARMER_SYMBOLS", "")
+    symbols = [normalize_symbol(symbol) for symbol in configured.split(",") if symbol.strip()]
+    return symbols or [ticker for _, _, _, ticker in SUPPORTED_COMPANIES]
+
+
+class CacheWarmer:
+    """Daemon thread that keeps cached quotes for `symbols` from expiring.
+
+    `interval_seconds` should stay below QUOTE_CACHE_TTL_SECONDS so entries are
+    renewed before they lapse.
+    """
+
+    def __init__(
+        self,
+        symbols: list[str],
+        interval_seconds: float = 45.0,
+        batch_size: int = 25,
+        batch_pause_seconds: float = 2.0,
+        refresh: Callable[[list[str]], dict] = refresh_stock_data,
+        is_open: Callable[[str], bool] = is_symbol_market_open,
+    ) -> None:
+        self.symbols = list(dict.fromkeys(normalize_symbol(symbol) for symbol in symbols))
+        self.interval_seconds = interval_seconds
+        self.batch_size = max(1, batch_size)
+        self.batch_pause_seconds = batch_pause_seconds
+        self._refresh = refresh
+        self._is_open = is_open
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self.cycles = 0
+        self.refreshed = 0
+        self.failed = 0
+        self.skipped_closed = 0
+        self.last_cycle_ms = 0.0
+
+    def start(self) -> None:
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="cache-warmer", daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        self._stop.set()
+        thread = self._thread
+        if thread is not None:
+            thread.join(timeout)
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            self.run_once()
+            self._stop.wait(self.interval_seconds)
+
+    def run_once(self) -> int:
+        """Refresh every open-market symbol once; return how many quotes were renewed."""
+        started = time.perf_counter()
+        due = [symbol for symbol in self.symbols if self._is_open(symbol)]
+        renewed = 0
+        with span("cache_warm", symbols=len(due)) as attrs:
+            for start in range(0, len(due), self.batch_size):
+                if start and self._stop.wait(self.batch_pause_seconds):
+                    break
+                batch = due[start:start + self.batch_size]
+                try:
+                    count = len(self._refresh(batch))
+                except Exception:
+                    count = 0
+                renewed += count
+                with self._lock:
+                    self.refreshed += count
+                    self.failed += len(batch) - count
+            attrs["renewed"] = renewed
+
+        with self._lock:
+            self.cycles += 1
+            self.skipped_closed += len(self.symbols) - len(due)
+            self.last_cycle_ms = (time.perf_counter() - started) * 1000
+        return renewed
+
+    def stats(self) -> dict[str, float]:
+        with self._lock:
+            return {
+                "symbols": len(self.symbols),
+                "cycles": self.cycles,
+                "refreshed": self.refreshed,
+                "failed": self.failed,
+                "skipped_closed": self.skipped_closed,
+                "last_cycle_ms": round(self.last_cycle_ms, 1),
+            }
+
+
+_default_warmer: Optional[CacheWarmer] = None
+_default_lock = threading.Lock()
+
+
+def start_cache_warmer() -> Optional[CacheWarmer]:
+    """Start the process-wide warmer if CACHE_WARMER=1; safe to call on every rerun."""
+    global _default_warmer
+    if os.getenv("CACHE_WARMER", "").strip().lower() not in ("1", "true", "yes"):
+        return None
+    with _default_lock:
+        if _default_warmer is None:
+            _default_warmer = CacheWarmer(
+                default_watchlist(),
+                interval_seconds=float(os.getenv("CACHE_WARMER_INTERVAL_SECONDS", "45")),
+                batch_size=int(os.getenv("CACHE_WARMER_BATCH_SIZE", "25")),
+                batch_pause_seconds=float(os.getenv("CACHE_WARMER_BATCH_PAUSE_SECONDS", "2")),
+            )
+            REGISTRY.register_collector("cache_warmer", _default_warmer.stats)
+        _default_warmer.start()
+        return _default_warmer
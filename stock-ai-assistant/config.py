@@ -1,6 +1,8 @@
 from dataclasses import dataclass
 import os
 from dotenv import load_dotenv
+
+# The only place .env is read; every entry point imports config before reading settings.
 load_dotenv()
 
 @dataclass(frozen=True)
@@ -8,7 +10,12 @@ class Config:
     api_key: str
     base_url: str
     model: str
+    # Also the budget for a whole question: fetching data plus the model's answer.
     request_timeout_seconds: int = 30
+    # Skip the model and show the plain summary when less than this is left.
+    min_answer_seconds: int = 5
+    max_connections: int = 20
+    max_keepalive_connections: int = 10
 
 
 def load_config() -> Config:
@@ -20,13 +27,20 @@ def load_config() -> Config:
     openai_base_url = os.getenv("OPENAI_BASE_URL", "").strip()
     openai_model = os.getenv("OPENAI_MODEL", "gpt-4o-mini").strip()
 
+    pool = {
+        "request_timeout_seconds": int(os.getenv("AI_REQUEST_TIMEOUT_SECONDS", "30")),
+        "min_answer_seconds": int(os.getenv("AI_MIN_ANSWER_SECONDS", "5")),
+        "max_connections": int(os.getenv("AI_MAX_CONNECTIONS", "20")),
+        "max_keepalive_connections": int(os.getenv("AI_MAX_KEEPALIVE_CONNECTIONS", "10")),
+    }
+
     if github_token:
         base_url = github_base_url or "https://models.github.ai/inference"
         model = github_model or "openai/gpt-4o-mini"
-        return Config(api_key=github_token, base_url=base_url, model=model)
+        return Config(api_key=github_token, base_url=base_url, model=model, **pool)
 
     if openai_key:
-        return Config(api_key=openai_key, base_url=openai_base_url, model=openai_model)
+        return Config(api_key=openai_key, base_url=openai_base_url, model=openai_model, **pool)
 
     raise ValueError(
         "Missing API key. Set GIT_ACCESS_TOKEN (GitHub Models) or OPENAI_API_KEY."
@@ -0,0 +1,69 @@
+import re
+from dataclasses import dataclass
+
+from tokens import estimate_tokens
+
+_SENTENCE_END_RE = re.compile(r"(?<=[.!?])\s")
+_MESSAGE_OVERHEAD_TOKENS = 4
+
+
+@dataclass
+class RollingSummary:
+    """Compressed digest of turns that no longer fit in the history window."""
+
+    covered: int = 0
+    text: str = ""
+
+    def extend(self, turns: list[dict[str, str]], token_budget: int) -> None:
+        lines = [line for line in self.text.splitlines() if line]
+        lines.extend(f"{turn['role'].capitalize()}: {_gist(turn['content'])}" for turn in turns)
+        while len(lines) > 1 and estimate_tokens("\n".join(lines)) > token_budget:
+            lines.pop(0)
+        self.text = "\n".join(lines)
+        self.covered += len(turns)
+
+
+def _gist(content: str, max_chars: int = 160) -> str:
+    flat = " ".join(content.replace("#", " ").replace("*", " ").split())
+    first = _SENTENCE_END_RE.split(flat, maxsplit=1)[0]
+    return first if len(first) <= max_chars else first[: max_chars - 3].rstrip() + "..."
+
+
+def build_history(
+    prior: list[dict],
+    summary: RollingSummary,
+    token_budget: int = 1500,
+    summary_budget: int = 300,
+) -> list[dict[str, str]]:
+    """Return chat history in OpenAI format that fits `token_budget`.
+
+    The newest turns are kept verbatim; older ones are folded into `summary`,
+    which is only extended when turns fall out of the window, so the cost of
+    summarising is paid once per turn rather than on every question.
+    """
+    turns = [
+        {"role": msg["role"], "content": msg["content"]}
+        for msg in prior
+        if msg.get("role") in {"user", "assistant"} and msg.get("content")
+    ]
+
+    window_budget = token_budget - summary_budget
+    used = 0
+    cutoff = len(turns)
+    for index in range(len(turns) - 1, -1, -1):
+        cost = estimate_tokens(turns[index]["content"]) + _MESSAGE_OVERHEAD_TOKENS
+        if used + cost > window_budget:
+            break
+        used += cost
+        cutoff = index
+
+    # Once a turn is summarised it stays summarised, so the window never grows back over it.
+    cutoff = max(cutoff, min(summary.covered, len(turns)))
+    if cutoff > summary.covered:
+        summary.extend(turns[summary.covered:cutoff], summary_budget)
+
+    history: list[dict[str, str]] = []
+    if summary.text and cutoff > 0:
+        history.append({"role": "system", "content": f"Summary of earlier conversation:\n{summary.text}"})
+    history.extend(turns[cutoff:])
+    return history
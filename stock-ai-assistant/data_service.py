@@ -1,13 +1,63 @@
-from typing import Optional
-import yfinance as yf
-from models import StockData
+import contextvars
+import math
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from concurrent.futures import TimeoutError as FutureTimeout
+from typing import TYPE_CHECKING, Optional
+
+from deadline import DeadlineExceeded
+from metrics import REGISTRY, span
+from models import FetchResult, StockData
+from negative_cache import get_negative_cache
+from outbound import call_yahoo, is_missing_ticker, load_yfinance
+from parsing import is_known_symbol, register_known_symbols
+from quote_cache import get_quote_cache, normalize_symbol
+from reference_store import get_reference_store
+from single_flight import SingleFlight
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+    from analytics import Analytics
+    from history_store import PriceHistory
+
+DEFAULT_MAX_WORKERS = 8
+# Five sessions is enough to find the previous close across weekends and holidays.
+HISTORY_PERIOD = "5d"
+BULK_MIN_SYMBOLS = 2
+SKIPPED_MESSAGE = "Skipped: no data found for this symbol recently"
+TIMED_OUT_MESSAGE = "Timed out"
+
+# Shared by every session thread so concurrent requests for a symbol make one upstream call.
+_quote_flights = SingleFlight()
+
+_known_symbols_seeded = False
+_seed_lock = threading.Lock()
+
+_BAR_FIELDS = ("Open", "High", "Low", "Close", "Volume")
+
+# yfinance pulls in pandas, numpy and requests (~1s cold); load it on the first fetch.
+yf = None
+
+
+def _yfinance():
+    global yf
+    if yf is None:
+        yf = load_yfinance()
+    return yf
+
+
+class SymbolNotFound(LookupError):
+    """Yahoo says the symbol does not exist, as opposed to returning nothing this time."""
 
 
 def _safe_float(value, default=0.0) -> float:
     try:
         if value is None:
             return default
-        return float(value)
+        result = float(value)
+        return default if math.isnan(result) else result
     except Exception:
         return default
 
@@ -21,52 +71,404 @@ def _safe_int(value, default=0) -> int:
         return default
 
 
-def get_stock_data(symbol: str) -> Optional[StockData]:
+def _latest_bars(frame: "pd.DataFrame", symbols: list[str]) -> dict[str, dict[str, float]]:
+    """Reduce an OHLCV frame to the last bar (plus previous close) for every ticker column.
+
+    Accepts both the flat frame from `Ticker.history` and the (field, ticker)
+    multi-index frame from `yf.download`. Tickers trade on different calendars,
+    so the last valid row is located per column instead of taking `iloc[-1]`.
+    """
+    import numpy as np
+    import pandas as pd
+
+    if frame is None or frame.empty:
+        return {}
+    if not isinstance(frame.columns, pd.MultiIndex):
+        frame = frame.copy()
+        frame.columns = pd.MultiIndex.from_product([frame.columns, symbols[:1]])
+
+    # Plain arrays rather than DataFrame.where: masking a wide frame per field
+    # dominated bulk fetches of a few hundred tickers.
+    close = frame["Close"]
+    tickers = close.columns
+    closes = close.to_numpy(dtype=float)
+    valid = ~np.isnan(closes)
+    rank_from_end = np.cumsum(valid[::-1], axis=0)[::-1]
+    last = np.argmax(valid & (rank_from_end == 1), axis=0)
+    previous_rows = valid & (rank_from_end == 2)
+    previous = np.argmax(previous_rows, axis=0)
+    columns = np.arange(len(tickers))
+
+    data = frame.to_numpy(dtype=float)
+    values = {}
+    for field in _BAR_FIELDS:
+        positions = frame.columns.get_indexer([(field, ticker) for ticker in tickers])
+        if (positions >= 0).any():
+            picked = data[last, positions]
+            values[field] = np.where(positions >= 0, picked, np.nan)
+    values["PreviousClose"] = np.where(previous_rows.any(axis=0), closes[previous, columns], np.nan)
+    return {
+        normalize_symbol(tickers[index]): {field: float(column[index]) for field, column in values.items()}
+        for index in np.flatnonzero(valid.any(axis=0))
+    }
+
+
+def _build_stock_data(symbol: str, bar: dict[str, float], info: dict) -> StockData:
+    current_price = _safe_float(bar.get("Close"))
+    previous_close = _safe_float(bar.get("PreviousClose"))
+    open_price = _safe_float(bar.get("Open"))
+    day_high = _safe_float(bar.get("High"))
+    day_low = _safe_float(bar.get("Low"))
+    volume = _safe_int(bar.get("Volume"))
+    market_cap = _safe_int(info.get("marketCap", 0))
+    week_52_high = _safe_float(info.get("fiftyTwoWeekHigh", 0))
+    week_52_low = _safe_float(info.get("fiftyTwoWeekLow", 0))
+
+    if previous_close > 0:
+        change = current_price - previous_close
+        change_percent = (change / previous_close) * 100
+    else:
+        change = 0.0
+        change_percent = 0.0
+
+    return StockData(
+        symbol=symbol,
+        name=info.get("longName", symbol),
+        current_price=round(current_price, 2),
+        previous_close=round(previous_close, 2),
+        open_price=round(open_price, 2),
+        day_high=round(day_high, 2),
+        day_low=round(day_low, 2),
+        volume=volume,
+        market_cap=market_cap,
+        week_52_high=round(week_52_high, 2),
+        week_52_low=round(week_52_low, 2),
+        change=round(change, 2),
+        change_percent=round(change_percent, 2),
+    )
+
+
+def _fetch_stock_data(symbol: str) -> StockData:
+    symbol = symbol.upper()
+    ticker = _yfinance().Ticker(symbol)
     try:
-        ticker = yf.Ticker(symbol.upper())
+        hist = call_yahoo(ticker.history, period=HISTORY_PERIOD)
+    except Exception as exc:
+        if is_missing_ticker(exc):
+            raise SymbolNotFound(str(exc)) from exc
+        raise
+    bar = _latest_bars(hist, [symbol]).get(symbol)
+    if not bar:
+        # An empty frame alone may be a hidden network error; only Yahoo's own "no timezone"
+        # verdict, recorded on the ticker when exceptions are hidden, means the symbol is unknown.
+        reason = getattr(getattr(ticker, "_price_history", None), "_last_error", None)
+        if isinstance(reason, str) and "no timezone found" in reason:
+            raise SymbolNotFound(f"{symbol}: {reason}")
+        raise LookupError(f"No price history for {symbol}")
+
+    info = get_reference_store().get(symbol)
+    return _build_stock_data(symbol, bar, info)
+
+
+def _fetch_and_record(symbol: str) -> StockData:
+    # Another flight may have filled the cache between our lookup and this call;
+    # peek so the lookup that already missed is not counted twice.
+    cached = get_quote_cache().peek(symbol)
+    if cached is not None:
+        return cached
+    try:
+        with span("fetch", symbol=symbol):
+            data = _fetch_stock_data(symbol)
+    except SymbolNotFound:
+        if not is_known_symbol(symbol):
+            get_negative_cache().add(symbol)
+        raise
+    register_known_symbols([symbol])
+    get_quote_cache().put(data)
+    return data
+
+
+def _fetch_fresh(symbol: str) -> StockData:
+    data = _quote_flights.do(symbol, lambda: _fetch_and_record(symbol))
+    if data is None:
+        # We joined a bulk download that did not return this symbol; fetch it alone.
+        data = _quote_flights.do(symbol, lambda: _fetch_and_record(symbol))
+    return data
+
+
+def _bulk_and_record(symbols: list[str], max_workers: int) -> dict[str, StockData]:
+    try:
+        bulk = get_stock_data_bulk(symbols, max_workers=max_workers)
+    except Exception:
+        return {}
+    cache = get_quote_cache()
+    for data in bulk.values():
+        cache.put(data)
+    register_known_symbols(bulk)
+    return bulk
 
-        hist = ticker.history(period="1d")
-        if hist.empty:
-            return None
 
-        current_price = _safe_float(hist["Close"].iloc[-1])
+def _seed_known_symbols() -> None:
+    """Mark every symbol the reference store has data for as known, once.
 
-        info = {}
+    Run on the first fetch rather than at import so starting the app does not
+    open (or create) the store.
+    """
+    global _known_symbols_seeded
+    with _seed_lock:
+        if _known_symbols_seeded:
+            return
+        _known_symbols_seeded = True
         try:
-            info = ticker.info or {}
+            register_known_symbols(get_reference_store().symbols())
         except Exception:
-            info = {}
-
-        previous_close = _safe_float(info.get("previousClose", 0))
-        open_price = _safe_float(info.get("open", 0))
-        day_high = _safe_float(info.get("dayHigh", 0))
-        day_low = _safe_float(info.get("dayLow", 0))
-        volume = _safe_int(info.get("volume", 0))
-        market_cap = _safe_int(info.get("marketCap", 0))
-        week_52_high = _safe_float(info.get("fiftyTwoWeekHigh", 0))
-        week_52_low = _safe_float(info.get("fiftyTwoWeekLow", 0))
-
-        if previous_close > 0:
-            change = current_price - previous_close
-            change_percent = (change / previous_close) * 100
-        else:
-            change = 0.0
-            change_percent = 0.0
-
-        return StockData(
-            symbol=symbol.upper(),
-            name=info.get("longName", symbol.upper()),
-            current_price=round(current_price, 2),
-            previous_close=round(previous_close, 2),
-            open_price=round(open_price, 2),
-            day_high=round(day_high, 2),
-            day_low=round(day_low, 2),
-            volume=volume,
-            market_cap=market_cap,
-            week_52_high=round(week_52_high, 2),
-            week_52_low=round(week_52_low, 2),
-            change=round(change, 2),
-            change_percent=round(change_percent, 2),
-        )
+            pass
+
+
+def _recently_missing(symbol: str) -> bool:
+    _seed_known_symbols()
+    # Supported and previously seen symbols are always fetched; a miss for them is transient.
+    return not is_known_symbol(symbol) and get_negative_cache().contains(symbol)
+
+
+def _fetch_cached(symbol: str) -> StockData:
+    cached = get_quote_cache().get(symbol)
+    if cached is not None:
+        return cached
+    if _recently_missing(symbol):
+        raise LookupError(SKIPPED_MESSAGE)
+    return _fetch_fresh(symbol)
+
+
+def get_stock_data(symbol: str) -> Optional[StockData]:
+    try:
+        return _fetch_cached(normalize_symbol(symbol))
     except Exception:
         return None
+
+
+def get_stock_data_bulk(
+    symbols: list[str],
+    max_workers: int = DEFAULT_MAX_WORKERS,
+    timeout: float = 10.0,
+) -> dict[str, StockData]:
+    """Fetch the latest bars for many symbols with a single multi-ticker download.
+
+    Symbols missing from the response are simply absent from the result; callers
+    decide whether to fall back to per-ticker fetches.
+    """
+    keys = list(dict.fromkeys(normalize_symbol(symbol) for symbol in symbols))
+    if not keys:
+        return {}
+
+    with span("fetch_bulk", symbols=len(keys)) as attrs:
+        # yfinance sends one history request per ticker, so the download is paced as that many calls.
+        frame = call_yahoo(
+            _yfinance().download,
+            keys,
+            cost=len(keys),
+            period=HISTORY_PERIOD,
+            group_by="column",
+            auto_adjust=False,
+            progress=False,
+            timeout=timeout,
+        )
+        bars = _latest_bars(frame, keys)
+        attrs["found"] = len(bars)
+    found = [key for key in keys if key in bars]
+    if not found:
+        return {}
+
+    infos = get_reference_store().get_many(found, max_workers=max_workers)
+    return {
+        key: _build_stock_data(key, bars[key], info)
+        for key, info in zip(found, infos)
+    }
+
+
+def _within(func, timeout: Optional[float]):
+    """`func()`, or None if it has not finished within `timeout` seconds (it keeps running)."""
+    if timeout is None:
+        return func()
+    executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="quote-bulk")
+    try:
+        return executor.submit(contextvars.copy_context().run, func).result(timeout=timeout)
+    except FutureTimeout:
+        return None
+    finally:
+        executor.shutdown(wait=False)
+
+
+def get_stock_data_many(
+    symbols: list[str],
+    max_workers: int = DEFAULT_MAX_WORKERS,
+    timeout: Optional[float] = None,
+) -> list[FetchResult]:
+    """Fetch several symbols, returning one result per symbol in input order.
+
+    Cached quotes are served first, symbols that recently had no data are
+    skipped without a network call, the rest go through one bulk download
+    (joining any fetch another session already has in flight), and only
+    symbols missing from that response are fetched one by one on a bounded
+    thread pool. `timeout` bounds the whole call; symbols still pending when
+    it expires are reported as timed out; downloads already under way finish
+    in the background and fill the cache for the next question.
+    """
+    if not symbols:
+        return []
+    started = time.monotonic()
+
+    def time_left() -> Optional[float]:
+        return None if timeout is None else max(0.0, timeout - (time.monotonic() - started))
+
+    keys = [normalize_symbol(symbol) for symbol in symbols]
+    cache = get_quote_cache()
+    found: dict[str, StockData] = {}
+    for key in dict.fromkeys(keys):
+        cached = cache.get(key)
+        if cached is not None:
+            found[key] = cached
+
+    missing: list[str] = []
+    skipped: set[str] = set()
+    for key in dict.fromkeys(keys):
+        if key in found:
+            continue
+        if _recently_missing(key):
+            skipped.add(key)
+        else:
+            missing.append(key)
+
+    errors: dict[str, str] = {key: SKIPPED_MESSAGE for key in skipped}
+    if len(missing) >= BULK_MIN_SYMBOLS:
+        bulk = _within(
+            lambda keys=missing: _quote_flights.do_many(keys, lambda owned: _bulk_and_record(owned, max_workers)),
+            time_left(),
+        )
+        if bulk is None:
+            errors.update((key, TIMED_OUT_MESSAGE) for key in missing)
+            missing = []
+        else:
+            found.update(bulk)
+            missing = [key for key in missing if key not in found]
+
+    if missing:
+        workers = max(1, min(max_workers, len(missing)))
+        executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="quote")
+        try:
+            futures = {
+                key: executor.submit(contextvars.copy_context().run, _fetch_fresh, key)
+                for key in missing
+            }
+            wait(futures.values(), timeout=time_left())
+            for key, future in futures.items():
+                if not future.done():
+                    future.cancel()
+                    errors[key] = TIMED_OUT_MESSAGE
+                    continue
+                exc = future.exception()
+                if exc is not None:
+                    errors[key] = str(exc) or type(exc).__name__
+                    continue
+                found[key] = future.result()
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    return [
+        FetchResult(
+            symbol=key,
+            data=found.get(key),
+            error=None if key in found else errors.get(key),
+            skipped=key in skipped,
+        )
+        for key in keys
+    ]
+
+
+def refresh_stock_data(symbols: list[str], max_workers: int = DEFAULT_MAX_WORKERS) -> dict[str, StockData]:
+    """Re-download `symbols` in one bulk call and overwrite their cached quotes.
+
+    Unlike `get_stock_data_many` this ignores entries that are still fresh, so a
+    background refresh can renew them before they expire. Symbols that recently
+    had no data are left alone.
+    """
+    keys = [
+        key
+        for key in dict.fromkeys(normalize_symbol(symbol) for symbol in symbols)
+        if not _recently_missing(key)
+    ]
+    if not keys:
+        return {}
+    return _quote_flights.do_many(keys, lambda owned: _bulk_and_record(owned, max_workers))
+
+
+def get_price_history(symbol: str, period: str = "1mo", wait: bool = True) -> "PriceHistory":
+    """Daily bars for `period` from the local history store, downloading only missing sessions.
+
+    With `wait=False` nothing is downloaded on the caller's time: missing sessions
+    are synced in the background and only what is already stored is returned.
+    """
+    # Deferred so numpy is only loaded once someone asks about history.
+    from history_store import get_history_store
+
+    return get_history_store().get(normalize_symbol(symbol), period, wait=wait)
+
+
+def _load_histories(
+    keys: list[str], period: str, max_workers: int, wait: bool = True
+) -> list[Optional["PriceHistory"]]:
+    def load(key: str) -> Optional["PriceHistory"]:
+        try:
+            return get_price_history(key, period, wait=wait)
+        except Exception:
+            return None
+
+    if not keys:
+        return []
+    workers = max(1, min(max_workers, len(keys)))
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="history") as executor:
+        return list(executor.map(lambda key: contextvars.copy_context().run(load, key), keys))
+
+
+def get_analytics(
+    symbols: list[str],
+    period: str = "2y",
+    max_workers: int = DEFAULT_MAX_WORKERS,
+    timeout: Optional[float] = None,
+    wait: bool = True,
+) -> Optional["Analytics"]:
+    """Trend, volatility, drawdown and correlation statistics from stored daily history.
+
+    Symbols without history are left out; returns None if none have any.
+    `wait=False` uses only history already on disk and syncs the rest in the
+    background (see `get_price_history`).
+    Raises `DeadlineExceeded` if the statistics are not ready within `timeout`
+    seconds; history syncs already under way finish in the background.
+    """
+    from analytics import align_closes, compute_analytics
+
+    keys = list(dict.fromkeys(normalize_symbol(symbol) for symbol in symbols))
+
+    def compute() -> Optional["Analytics"]:
+        with span("analytics", symbols=len(keys)) as attrs:
+            loaded = [
+                history
+                for history in _load_histories(keys, period, max_workers, wait)
+                if history is not None and len(history)
+            ]
+            attrs["found"] = len(loaded)
+            if not loaded:
+                return None
+            timestamps, closes = align_closes(loaded)
+            return compute_analytics([history.symbol for history in loaded], closes, timestamps)
+
+    # Wrapped in a list so "no history" (None) is distinguishable from a timeout.
+    result = _within(lambda: [compute()], timeout)
+    if result is None:
+        raise DeadlineExceeded("trailing statistics not ready before the deadline")
+    return result[0]
+
+
+REGISTRY.register_collector("quote_cache", lambda: get_quote_cache().stats())
+REGISTRY.register_collector("negative_cache", lambda: get_negative_cache().stats())
+REGISTRY.register_collector("quote_single_flight", _quote_flights.stats)
@@ -0,0 +1,50 @@
+import threading
+import time
+from typing import Callable, Optional
+
+
+class DeadlineExceeded(TimeoutError):
+    pass
+
+
+class Deadline:
+    """Time left for one question, and a record of what was dropped to stay within it.
+
+    Created once per question and passed down to the fetch and model stages, which
+    take what they need from `remaining()` and note anything they gave up via `cut()`.
+    `seconds=None` means no limit.
+    """
+
+    def __init__(self, seconds: Optional[float], clock: Callable[[], float] = time.monotonic) -> None:
+        self._clock = clock
+        self.expires_at = None if seconds is None else clock() + seconds
+        self._lock = threading.Lock()
+        self._cuts: list[str] = []
+
+    def remaining(self, reserve: float = 0.0) -> Optional[float]:
+        """Seconds left after holding back `reserve` for later stages; None when unlimited."""
+        if self.expires_at is None:
+            return None
+        return max(0.0, self.expires_at - self._clock() - reserve)
+
+    @property
+    def expired(self) -> bool:
+        return self.expires_at is not None and self._clock() >= self.expires_at
+
+    def allows(self, seconds: float) -> bool:
+        remaining = self.remaining()
+        return remaining is None or remaining >= seconds
+
+    def cut(self, part: str) -> None:
+        with self._lock:
+            if part not in self._cuts:
+                self._cuts.append(part)
+
+    @property
+    def cuts(self) -> list[str]:
+        with self._lock:
+            return list(self._cuts)
+
+    def describe_cuts(self) -> str:
+        cuts = self.cuts
+        return f"Cut for time: {'; '.join(cuts)}" if cuts else ""
@@ -1,33 +1,145 @@
+import dataclasses
+import math
+from datetime import datetime, timezone
+from typing import TYPE_CHECKING, Optional
+
+from markets import currency_for_symbol, currency_sign_for_symbol
 from models import StockData
 
+if TYPE_CHECKING:
+    from analytics import Analytics
+
+# Prompts for this many symbols or more use the compact table encoding.
+COMPACT_MIN_SYMBOLS = 3
+
+_COMPACT_COLUMNS = (
+    "symbol|name|currency|price|change_pct|prev_close|open|high|low|volume|market_cap_bn|high_52w|low_52w"
+)
+
 
-def format_large_number(num: int) -> str:
+def format_large_number(num: int, currency: str = "$") -> str:
     if num >= 1_000_000_000_000:
-        return f"${num/1_000_000_000_000:.2f}T"
+        return f"{currency}{num/1_000_000_000_000:.2f}T"
     if num >= 1_000_000_000:
-        return f"${num/1_000_000_000:.2f}B"
+        return f"{currency}{num/1_000_000_000:.2f}B"
     if num >= 1_000_000:
-        return f"${num/1_000_000:.2f}M"
-    return f"${num:,.0f}"
+        return f"{currency}{num/1_000_000:.2f}M"
+    return f"{currency}{num:,.0f}"
 
 
 def create_stock_summary(data: StockData) -> str:
+    cur = currency_sign_for_symbol(data.symbol)
     return (
         f"Stock: {data.name} ({data.symbol})\n"
-        f"Current Price: ${data.current_price}\n"
-        f"Change: ${data.change} ({data.change_percent:+.2f}%)\n"
-        f"Previous Close: ${data.previous_close}\n\n"
+        f"Current Price: {cur}{data.current_price}\n"
+        f"Change: {cur}{data.change} ({data.change_percent:+.2f}%)\n"
+        f"Previous Close: {cur}{data.previous_close}\n\n"
         "Today's Trading:\n"
-        f"- Open: ${data.open_price}\n"
-        f"- High: ${data.day_high}\n"
-        f"- Low: ${data.day_low}\n"
+        f"- Open: {cur}{data.open_price}\n"
+        f"- High: {cur}{data.day_high}\n"
+        f"- Low: {cur}{data.day_low}\n"
         f"- Volume: {data.volume:,}\n\n"
         "52-Week Range:\n"
-        f"- High: ${data.week_52_high}\n"
-        f"- Low: ${data.week_52_low}\n\n"
-        f"Market Cap: {format_large_number(data.market_cap)}\n"
+        f"- High: {cur}{data.week_52_high}\n"
+        f"- Low: {cur}{data.week_52_low}\n\n"
+        f"Market Cap: {format_large_number(data.market_cap, cur)}\n"
     )
 
 
 def create_multi_summary(items: list[StockData]) -> str:
     return "\n\n".join(create_stock_summary(item) for item in items)
+
+
+def _compact_row(data: StockData) -> str:
+    name = data.name.replace("|", "/")
+    return (
+        f"{data.symbol}|{name}|{currency_for_symbol(data.symbol)}|{data.current_price:g}|"
+        f"{data.change_percent:+.2f}|{data.previous_close:g}|{data.open_price:g}|{data.day_high:g}|"
+        f"{data.day_low:g}|{data.volume}|{data.market_cap / 1_000_000_000:.1f}|"
+        f"{data.week_52_high:g}|{data.week_52_low:g}"
+    )
+
+
+def create_compact_table(items: list[StockData]) -> str:
+    """One header plus one pipe-separated row per stock, with units stated once."""
+    header = (
+        "Prices are in each row's currency; change_pct is versus the previous close; "
+        "volume is shares traded today; market_cap_bn is in billions of that currency."
+    )
+    return "\n".join([header, _COMPACT_COLUMNS, *(_compact_row(item) for item in items)])
+
+
+# Listing every pair stops being useful (and gets long) beyond this many symbols.
+CORRELATION_MAX_SYMBOLS = 6
+
+
+def _pct(value: float, signed: bool = True) -> str:
+    if math.isnan(value):
+        return "n/a"
+    return f"{value:+.1f}" if signed else f"{value:.1f}"
+
+
+def create_analytics_summary(analytics: "Analytics") -> str:
+    """Trailing statistics as one table row per symbol, plus pairwise correlations for a few."""
+    windows = list(analytics.returns)
+    header = (
+        f"Trailing statistics from daily closes up to {analytics.as_of}. All values are percent: "
+        "ret_* is the change over that window, vol_21d the annualised volatility of the last 21 sessions, "
+        "vs_ma* the distance from the moving average, max_dd the worst fall from a peak, dd_now the current one."
+    )
+    ma_windows = list(analytics.moving_averages)
+    columns = "|".join(
+        ["symbol", *(f"ret_{name}" for name in windows), "vol_21d", *(f"vs_ma{w}" for w in ma_windows), "max_dd", "dd_now"]
+    )
+    rows = []
+    for index, symbol in enumerate(analytics.symbols):
+        last = analytics.last_close[index]
+        cells = [symbol]
+        cells += [_pct(analytics.returns[name][index]) for name in windows]
+        cells.append(_pct(analytics.volatility[index], signed=False))
+        cells += [_pct((last / analytics.moving_averages[w][index] - 1) * 100) for w in ma_windows]
+        cells += [_pct(analytics.max_drawdown[index]), _pct(analytics.drawdown[index])]
+        rows.append("|".join(cells))
+
+    lines = [header, columns, *rows]
+    count = len(analytics.symbols)
+    if analytics.correlation is not None and 1 < count <= CORRELATION_MAX_SYMBOLS:
+        pairs = [
+            f"{analytics.symbols[i]}/{analytics.symbols[j]} {analytics.correlation[i, j]:.2f}"
+            for i in range(count)
+            for j in range(i + 1, count)
+            if not math.isnan(analytics.correlation[i, j])
+        ]
+        if pairs:
+            lines.append("Correlation of daily returns (last year): " + ", ".join(pairs))
+    return "\n".join(lines)
+
+
+def create_prompt_summary(
+    items: list[StockData],
+    encoding: str = "auto",
+    analytics: Optional["Analytics"] = None,
+) -> str:
+    """Render stock data for the model: prose for a few symbols, a compact table for many.
+
+    When `analytics` is given, the trailing statistics table is appended.
+    """
+    if encoding == "auto":
+        encoding = "table" if len(items) >= COMPACT_MIN_SYMBOLS else "prose"
+    summary = create_compact_table(items) if encoding == "table" else create_multi_summary(items)
+    if analytics is not None:
+        summary = f"{summary}\n\n{create_analytics_summary(analytics)}"
+    return summary
+
+
+def format_as_of(items: list[StockData]) -> str:
+    """Timestamp of the oldest quote in `items`, which is what an answer is actually based on."""
+    oldest = min((item.fetched_at for item in items), default=datetime.now(timezone.utc))
+    return oldest.astimezone(timezone.utc).strftime("%Y-%m-%d %H:%M:%S UTC")
+
+
+def quote_to_dict(data: StockData) -> dict:
+    """JSON-serialisable form of a quote, used by the HTTP API and batch output."""
+    payload = dataclasses.asdict(data)
+    payload["fetched_at"] = data.fetched_at.isoformat()
+    return payload
@@ -0,0 +1,407 @@
+"""On-disk daily OHLCV history, one column file per field per symbol.
+
+Each symbol gets a directory of raw little-endian arrays (`timestamp.i8`,
+`close.f8`, ...) that only ever grow. A sync downloads just the sessions after
+the last stored bar, and only sessions that have closed are stored, so a bar is
+never rewritten in place. Yahoo split-adjusts the whole history when a split
+happens, so each sync also re-downloads the last stored bar; if it no longer
+matches (or the new bars report a split) the symbol's history is downloaded again
+and swapped in whole. Reads memory-map the files and slice them, so a range
+query returns views into the page cache instead of copies.
+
+Usage:
+    python history_store.py sync [SYMBOL ...]
+    python history_store.py show SYMBOL [--period 1mo]
+"""
+
+import argparse
+import os
+import shutil
+import threading
+import time
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta, timezone
+from typing import Any, Callable, Optional
+
+import numpy as np
+
+from markets import first_incomplete_session
+from metrics import span
+from outbound import call_yahoo, is_missing_ticker, load_yfinance
+from quote_cache import normalize_symbol
+from single_flight import SingleFlight
+
+DEFAULT_ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "history")
+
+COLUMNS = {
+    "timestamp": np.dtype("<i8"),
+    "open": np.dtype("<f8"),
+    "high": np.dtype("<f8"),
+    "low": np.dtype("<f8"),
+    "close": np.dtype("<f8"),
+    "volume": np.dtype("<i8"),
+}
+_FRAME_COLUMNS = {"open": "Open", "high": "High", "low": "Low", "close": "Close", "volume": "Volume"}
+# A re-downloaded bar further than this from the stored close means the history was re-adjusted.
+ADJUSTMENT_TOLERANCE = 0.01
+
+# Calendar days covered by each period, measured back from the latest bar.
+PERIOD_DAYS = {
+    "5d": 7,
+    "1wk": 7,
+    "1mo": 31,
+    "3mo": 92,
+    "6mo": 183,
+    "1y": 366,
+    "2y": 731,
+    "5y": 1827,
+}
+
+# Imported on first download so reading stored history never pays for yfinance.
+yf = None
+
+
+def _load_history(symbol: str, start: Optional[date], end: date, initial_period: str) -> Any:
+    global yf
+    if yf is None:
+        yf = load_yfinance()
+    ticker = yf.Ticker(symbol)
+    try:
+        if start is None:
+            return call_yahoo(ticker.history, period=initial_period, interval="1d", auto_adjust=False)
+        return call_yahoo(ticker.history, start=start.isoformat(), end=end.isoformat(), interval="1d", auto_adjust=False)
+    except Exception as exc:
+        # No sessions in the requested range (e.g. only holidays) is not a failure.
+        if is_missing_ticker(exc):
+            return None
+        raise
+
+
+def _epoch_day(day: date) -> int:
+    return int(datetime(day.year, day.month, day.day, tzinfo=timezone.utc).timestamp())
+
+
+def period_start(period: str, last: date) -> Optional[date]:
+    """First calendar day inside `period` ending at `last`; None means all history."""
+    if period == "max":
+        return None
+    if period == "ytd":
+        return date(last.year, 1, 1)
+    if period not in PERIOD_DAYS:
+        raise ValueError(f"Unknown period {period!r}; expected one of {', '.join([*PERIOD_DAYS, 'ytd', 'max'])}")
+    return last - timedelta(days=PERIOD_DAYS[period] - 1)
+
+
+@dataclass(frozen=True)
+class PriceHistory:
+    """Daily bars for one symbol. Arrays are read-only views of the stored columns."""
+
+    symbol: str
+    timestamp: np.ndarray
+    open: np.ndarray
+    high: np.ndarray
+    low: np.ndarray
+    close: np.ndarray
+    volume: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.timestamp)
+
+    @property
+    def dates(self) -> np.ndarray:
+        return self.timestamp.astype("datetime64[s]").astype("datetime64[D]")
+
+
+def period_change(history: PriceHistory, period: str) -> Optional[float]:
+    """Percent change from the last close before `period` to the latest close.
+
+    Falls back to the first stored close when history does not reach back that far.
+    """
+    if not len(history):
+        return None
+    last = history.dates[-1].item()
+    start = period_start(period, last)
+    first = 0 if start is None else int(np.searchsorted(history.timestamp, _epoch_day(start), side="left"))
+    base = history.close[max(first - 1, 0)]
+    if not base:
+        return None
+    return float(history.close[-1] / base - 1) * 100
+
+
+def _frame_days(frame: Any) -> np.ndarray:
+    """Session dates of a downloaded frame as epoch seconds at midnight UTC."""
+    index = frame.index
+    if getattr(index, "tz", None) is not None:
+        index = index.tz_localize(None)
+    return index.normalize().values.astype("datetime64[s]").astype(np.int64)
+
+
+def _frame_values(frame: Any, start: Optional[date], cutoff: date) -> Optional[dict[str, np.ndarray]]:
+    """Column arrays for the closed sessions in `frame` from `start` on; None if there are none."""
+    if frame is None or len(frame) == 0:
+        return None
+    stamps = _frame_days(frame)
+    keep = (stamps < _epoch_day(cutoff)) & np.isfinite(frame["Close"].to_numpy(dtype=float))
+    if start is not None:
+        keep &= stamps >= _epoch_day(start)
+    if not keep.any():
+        return None
+    values = {"timestamp": stamps[keep]}
+    for column, source in _FRAME_COLUMNS.items():
+        raw = frame[source].to_numpy(dtype=float)[keep]
+        values[column] = np.nan_to_num(raw, nan=0.0) if column == "volume" else raw
+    return values
+
+
+class HistoryStore:
+    def __init__(
+        self,
+        root: str = DEFAULT_ROOT,
+        initial_period: str = "5y",
+        min_sync_interval: float = 3600.0,
+        loader: Callable[[str, Optional[date], date, str], Any] = _load_history,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        self.root = root
+        self.initial_period = initial_period
+        self.min_sync_interval = min_sync_interval
+        self._loader = loader
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._syncs = SingleFlight()
+        self._checked_at: dict[str, float] = {}
+        self._background: set[str] = set()
+        self._maps: dict[str, tuple[int, dict[str, np.ndarray]]] = {}
+        self.downloads = 0
+
+    def _dir(self, symbol: str) -> str:
+        return os.path.join(self.root, symbol)
+
+    def _path(self, symbol: str, column: str, directory: Optional[str] = None) -> str:
+        name = f"{column}.{COLUMNS[column].kind}{COLUMNS[column].itemsize}"
+        return os.path.join(directory or self._dir(symbol), name)
+
+    def rows(self, symbol: str) -> int:
+        """Complete rows on disk; a column cut short by a crash hides its partial row."""
+        counts = []
+        for column, dtype in COLUMNS.items():
+            try:
+                counts.append(os.path.getsize(self._path(symbol, column)) // dtype.itemsize)
+            except FileNotFoundError:
+                return 0
+        return min(counts)
+
+    def _columns(self, symbol: str) -> dict[str, np.ndarray]:
+        rows = self.rows(symbol)
+        with self._lock:
+            cached = self._maps.get(symbol)
+            if cached is not None and cached[0] == rows:
+                return cached[1]
+        if rows == 0:
+            columns = {column: np.empty(0, dtype=dtype) for column, dtype in COLUMNS.items()}
+        else:
+            columns = {
+                column: np.memmap(self._path(symbol, column), dtype=dtype, mode="r", shape=(rows,))
+                for column, dtype in COLUMNS.items()
+            }
+        with self._lock:
+            self._maps[symbol] = (rows, columns)
+        return columns
+
+    def last_date(self, symbol: str) -> Optional[date]:
+        stamps = self._columns(normalize_symbol(symbol))["timestamp"]
+        if not len(stamps):
+            return None
+        return datetime.fromtimestamp(int(stamps[-1]), tz=timezone.utc).date()
+
+    def _due(self, symbol: str) -> bool:
+        now = self._clock()
+        with self._lock:
+            checked = self._checked_at.get(symbol)
+        return checked is None or now - checked >= self.min_sync_interval
+
+    def sync(self, symbol: str, force: bool = False) -> int:
+        """Append any closed sessions after the last stored bar; return how many were added."""
+        symbol = normalize_symbol(symbol)
+        if not force and not self._due(symbol):
+            return 0
+        added = self._syncs.do(symbol, lambda: self._sync(symbol))
+        return added or 0
+
+    def sync_in_background(self, symbol: str) -> bool:
+        """Start a sync on a daemon thread unless one is already running or none is due."""
+        symbol = normalize_symbol(symbol)
+        if not self._due(symbol):
+            return False
+        with self._lock:
+            if symbol in self._background:
+                return False
+            self._background.add(symbol)
+
+        def run() -> None:
+            try:
+                self.sync(symbol)
+            except Exception:
+                pass
+            finally:
+                with self._lock:
+                    self._background.discard(symbol)
+
+        threading.Thread(target=run, name=f"history-sync-{symbol}", daemon=True).start()
+        return True
+
+    def _sync(self, symbol: str) -> int:
+        cutoff = first_incomplete_session(symbol, datetime.fromtimestamp(self._clock(), tz=timezone.utc))
+        last = self.last_date(symbol)
+        start = last + timedelta(days=1) if last is not None else None
+        if start is not None and start >= cutoff:
+            with self._lock:
+                self._checked_at[symbol] = self._clock()
+            return 0
+
+        with self._lock:
+            self.downloads += 1
+        with span("history_sync", symbol=symbol) as attrs:
+            # Start at the last stored bar so it can be checked against Yahoo's current adjustment.
+            frame = self._loader(symbol, last, cutoff, self.initial_period)
+            if last is not None and self._readjusted(symbol, frame, last):
+                attrs["resync"] = True
+                with self._lock:
+                    self.downloads += 1
+                frame = self._loader(symbol, None, cutoff, self.initial_period)
+                added = self._rewrite(symbol, frame, cutoff)
+            else:
+                added = self._append(symbol, frame, start, cutoff)
+            attrs["added"] = added
+        with self._lock:
+            self._checked_at[symbol] = self._clock()
+        return added
+
+    def _readjusted(self, symbol: str, frame: Any, last: date) -> bool:
+        """True if `frame` shows a split after `last` or prices `last` differently than stored."""
+        if frame is None or len(frame) == 0:
+            return False
+        stamps = _frame_days(frame)
+        splits = frame.get("Stock Splits")
+        if splits is not None and (splits.to_numpy(dtype=float)[stamps > _epoch_day(last)] != 0).any():
+            return True
+        overlap = np.flatnonzero(stamps == _epoch_day(last))
+        stored = self._columns(symbol)["close"]
+        if not len(overlap) or not len(stored):
+            return False
+        fresh = float(frame["Close"].to_numpy(dtype=float)[overlap[-1]])
+        return bool(np.isfinite(fresh)) and not np.isclose(fresh, stored[-1], rtol=ADJUSTMENT_TOLERANCE)
+
+    def _append(self, symbol: str, frame: Any, start: Optional[date], cutoff: date) -> int:
+        values = _frame_values(frame, start, cutoff)
+        if values is None:
+            return 0
+        os.makedirs(self._dir(symbol), exist_ok=True)
+        rows = self.rows(symbol)
+        for column, dtype in COLUMNS.items():
+            with open(self._path(symbol, column), "ab") as handle:
+                # Drop a partial row left by an interrupted append before adding new ones.
+                handle.truncate(rows * dtype.itemsize)
+                values[column].astype(dtype).tofile(handle)
+        return len(values["timestamp"])
+
+    def _rewrite(self, symbol: str, frame: Any, cutoff: date) -> int:
+        """Replace the stored history with `frame`; keeps the old one if Yahoo sent nothing."""
+        values = _frame_values(frame, None, cutoff)
+        if values is None:
+            return 0
+        directory = self._dir(symbol)
+        staging, retired = f"{directory}.resync", f"{directory}.old"
+        for path in (staging, retired):
+            shutil.rmtree(path, ignore_errors=True)
+        os.makedirs(staging)
+        for column, dtype in COLUMNS.items():
+            values[column].astype(dtype).tofile(self._path(symbol, column, staging))
+        # Swap whole directories: open memory maps keep the old files until they are dropped.
+        if os.path.isdir(directory):
+            os.rename(directory, retired)
+        os.rename(staging, directory)
+        shutil.rmtree(retired, ignore_errors=True)
+        with self._lock:
+            self._maps.pop(symbol, None)
+        return len(values["timestamp"])
+
+    def query(self, symbol: str, start: Optional[date] = None, end: Optional[date] = None) -> PriceHistory:
+        """Bars with `start <= date <= end`, sliced from the memory-mapped columns without copying."""
+        symbol = normalize_symbol(symbol)
+        columns = self._columns(symbol)
+        stamps = columns["timestamp"]
+        lo = 0 if start is None else int(np.searchsorted(stamps, _epoch_day(start), side="left"))
+        hi = len(stamps) if end is None else int(np.searchsorted(stamps, _epoch_day(end), side="right"))
+        return PriceHistory(symbol=symbol, **{column: values[lo:hi] for column, values in columns.items()})
+
+    def get(self, symbol: str, period: str = "1mo", wait: bool = True) -> PriceHistory:
+        """Sync if due, then return the bars covering `period` up to the latest stored session.
+
+        With `wait=False` the sync runs in the background and this returns what is
+        already stored, which is empty for a symbol never synced before.
+        """
+        if wait:
+            self.sync(symbol)
+        else:
+            self.sync_in_background(symbol)
+        last = self.last_date(symbol)
+        if last is None:
+            return self.query(symbol)
+        return self.query(symbol, start=period_start(period, last))
+
+
+_default_store: Optional[HistoryStore] = None
+_default_lock = threading.Lock()
+
+
+def get_history_store() -> HistoryStore:
+    global _default_store
+    with _default_lock:
+        if _default_store is None:
+            _default_store = HistoryStore(
+                root=os.getenv("HISTORY_STORE_PATH", DEFAULT_ROOT),
+                initial_period=os.getenv("HISTORY_INITIAL_PERIOD", "5y"),
+            )
+        return _default_store
+
+
+def main(argv: Optional[list[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Sync or inspect the local price history store.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    sync = subparsers.add_parser("sync", help="Download missing sessions (default: supported companies).")
+    sync.add_argument("symbols", nargs="*")
+    show = subparsers.add_parser("show", help="Print stored bars for a symbol.")
+    show.add_argument("symbol")
+    show.add_argument("--period", default="1mo")
+    args = parser.parse_args(argv)
+
+    store = get_history_store()
+    if args.command == "sync":
+        symbols = args.symbols
+        if not symbols:
+            from parsing import SUPPORTED_COMPANIES
+
+            symbols = [ticker for _, _, _, ticker in SUPPORTED_COMPANIES]
+        started = time.perf_counter()
+        added = 0
+        for symbol in symbols:
+            try:
+                added += store.sync(symbol, force=True)
+            except Exception as exc:
+                print(f"[x] {normalize_symbol(symbol)}: {exc}")
+        elapsed = time.perf_counter() - started
+        print(f"[*] Added {added} bars for {len(symbols)} symbols in {elapsed:.1f}s ({store.downloads} downloads)")
+        return
+
+    history = store.get(args.symbol, args.period)
+    print(f"{history.symbol}: {len(history)} bars")
+    for day, close, volume in zip(history.dates, history.close, history.volume):
+        print(f"  {day}  close {close:,.2f}  volume {int(volume):,}")
+    change = period_change(history, args.period)
+    if change is not None:
+        print(f"  change over {args.period}: {change:+.2f}%")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,48 @@
+from datetime import date, datetime, time, timedelta, timezone
+from zoneinfo import ZoneInfo
+
+# Regular cash-session hours; exchange holidays are not modelled.
+_SESSIONS = {
+    "US": (ZoneInfo("America/New_York"), time(9, 30), time(16, 0)),
+    "IN": (ZoneInfo("Asia/Kolkata"), time(9, 15), time(15, 30)),
+}
+
+_INDIA_SUFFIXES = (".NS", ".BO")
+
+_CURRENCIES = {"US": ("USD", "$"), "IN": ("INR", "INR ")}
+
+
+def market_for_symbol(symbol: str) -> str:
+    return "IN" if symbol.upper().endswith(_INDIA_SUFFIXES) else "US"
+
+
+def is_market_open(market: str, now: datetime | None = None) -> bool:
+    tz, open_at, close_at = _SESSIONS[market]
+    local = (now or datetime.now(timezone.utc)).astimezone(tz)
+    if local.weekday() >= 5:
+        return False
+    return open_at <= local.time() < close_at
+
+
+def is_symbol_market_open(symbol: str, now: datetime | None = None) -> bool:
+    return is_market_open(market_for_symbol(symbol), now)
+
+
+def first_incomplete_session(symbol: str, now: datetime | None = None) -> date:
+    """Local date of the earliest session whose daily bar may still change.
+
+    That is today until the market closes, tomorrow afterwards.
+    """
+    tz, _, close_at = _SESSIONS[market_for_symbol(symbol)]
+    local = (now or datetime.now(timezone.utc)).astimezone(tz)
+    if local.time() >= close_at:
+        return local.date() + timedelta(days=1)
+    return local.date()
+
+
+def currency_for_symbol(symbol: str) -> str:
+    return _CURRENCIES[market_for_symbol(symbol)][0]
+
+
+def currency_sign_for_symbol(symbol: str) -> str:
+    return _CURRENCIES[market_for_symbol(symbol)][1]
@@ -0,0 +1,225 @@
+"""Lightweight span timing, a metrics registry, and Prometheus/JSON export.
+
+Wrap a stage in `span("fetch", symbol="AAPL")` to time it. Every span feeds
+the `stage_duration_seconds` histogram and emits one JSON log line on the
+`metrics` logger. Spans opened inside `trace()` are also collected so a single
+question can report its own stage breakdown.
+"""
+
+import contextlib
+import contextvars
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from bisect import bisect_left
+from typing import Any, Callable, Iterator, Optional
+
+logger = logging.getLogger("metrics")
+
+PREFIX = "stock_assistant"
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+_LabelKey = tuple[tuple[str, str], ...]
+
+
+def _label_key(labels: dict[str, Any]) -> _LabelKey:
+    return tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+
+def _escape_label(value: str) -> str:
+    """Escape a label value as the Prometheus text format requires."""
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(key: _LabelKey, extra: Optional[tuple[str, str]] = None) -> str:
+    pairs = list(key) + ([extra] if extra else [])
+    if not pairs:
+        return ""
+    body = ",".join(f'{name}="{_escape_label(value)}"' for name, value in pairs)
+    return "{" + body + "}"
+
+
+class MetricsRegistry:
+    def __init__(self, buckets: tuple[float, ...] = DEFAULT_BUCKETS) -> None:
+        self.buckets = buckets
+        self._lock = threading.Lock()
+        self._counters: dict[str, dict[_LabelKey, float]] = {}
+        self._histograms: dict[str, dict[_LabelKey, list]] = {}
+        self._collectors: dict[str, Callable[[], dict[str, float]]] = {}
+
+    def inc(self, name: str, value: float = 1.0, **labels: Any) -> None:
+        key = _label_key(labels)
+        with self._lock:
+            series = self._counters.setdefault(name, {})
+            series[key] = series.get(key, 0.0) + value
+
+    def observe(self, name: str, value: float, **labels: Any) -> None:
+        key = _label_key(labels)
+        with self._lock:
+            series = self._histograms.setdefault(name, {})
+            state = series.get(key)
+            if state is None:
+                state = series[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            state[0][bisect_left(self.buckets, value)] += 1
+            state[1] += value
+            state[2] += 1
+
+    def register_collector(self, name: str, collect: Callable[[], dict[str, float]]) -> None:
+        """Export values owned elsewhere (e.g. cache stats) as gauges named `<name>_<key>`."""
+        with self._lock:
+            self._collectors[name] = collect
+
+    def _collected(self) -> dict[str, float]:
+        with self._lock:
+            collectors = dict(self._collectors)
+        values: dict[str, float] = {}
+        for name, collect in collectors.items():
+            try:
+                stats = collect()
+            except Exception:
+                continue
+            for key, value in stats.items():
+                values[f"{name}_{key}"] = float(value)
+        return values
+
+    def render_prometheus(self) -> str:
+        lines: list[str] = []
+        with self._lock:
+            counters = {name: dict(series) for name, series in self._counters.items()}
+            histograms = {
+                name: {key: (list(state[0]), state[1], state[2]) for key, state in series.items()}
+                for name, series in self._histograms.items()
+            }
+        for name, series in sorted(counters.items()):
+            lines.append(f"# TYPE {PREFIX}_{name} counter")
+            for key, value in series.items():
+                lines.append(f"{PREFIX}_{name}{_format_labels(key)} {value:g}")
+        for name, series in sorted(histograms.items()):
+            lines.append(f"# TYPE {PREFIX}_{name} histogram")
+            for key, (counts, total, count) in series.items():
+                cumulative = 0
+                for bound, bucket_count in zip((*self.buckets, "+Inf"), counts):
+                    cumulative += bucket_count
+                    le = bound if bound == "+Inf" else f"{bound:g}"
+                    lines.append(f"{PREFIX}_{name}_bucket{_format_labels(key, ('le', le))} {cumulative}")
+                lines.append(f"{PREFIX}_{name}_sum{_format_labels(key)} {total:.6f}")
+                lines.append(f"{PREFIX}_{name}_count{_format_labels(key)} {count}")
+        for name, value in sorted(self._collected().items()):
+            lines.append(f"# TYPE {PREFIX}_{name} gauge")
+            lines.append(f"{PREFIX}_{name} {value:g}")
+        return "\n".join(lines) + "\n"
+
+    def snapshot(self) -> dict[str, Any]:
+        with self._lock:
+            counters = {
+                name: [{"labels": dict(key), "value": value} for key, value in series.items()]
+                for name, series in self._counters.items()
+            }
+            histograms = {
+                name: [
+                    {"labels": dict(key), "count": state[2], "sum": state[1]}
+                    for key, state in series.items()
+                ]
+                for name, series in self._histograms.items()
+            }
+        return {"counters": counters, "histograms": histograms, "gauges": self._collected()}
+
+
+REGISTRY = MetricsRegistry()
+
+
+class Trace:
+    """Spans recorded while handling one question."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.spans: list[dict[str, Any]] = []
+
+    def add(self, record: dict[str, Any]) -> None:
+        with self._lock:
+            self.spans.append(record)
+
+    def stage_totals(self) -> dict[str, float]:
+        """Wall time per stage in seconds; concurrent spans of one stage count once."""
+        with self._lock:
+            spans = list(self.spans)
+        bounds: dict[str, tuple[float, float]] = {}
+        for record in spans:
+            start, end = record["start"], record["start"] + record["duration"]
+            low, high = bounds.get(record["name"], (start, end))
+            bounds[record["name"]] = (min(low, start), max(high, end))
+        return {name: high - low for name, (low, high) in bounds.items()}
+
+    def breakdown(self) -> str:
+        parts = []
+        for name, seconds in self.stage_totals().items():
+            parts.append(f"{name} {seconds * 1000:.0f}ms" if seconds < 1 else f"{name} {seconds:.2f}s")
+        return ", ".join(parts)
+
+
+_current_trace: contextvars.ContextVar[Optional[Trace]] = contextvars.ContextVar("current_trace", default=None)
+
+
+@contextlib.contextmanager
+def trace() -> Iterator[Trace]:
+    current = Trace()
+    token = _current_trace.set(current)
+    try:
+        yield current
+    finally:
+        _current_trace.reset(token)
+
+
+@contextlib.contextmanager
+def span(name: str, **attrs: Any) -> Iterator[dict[str, Any]]:
+    """Time a stage. The yielded dict can be updated with attributes such as token counts."""
+    attributes = dict(attrs)
+    start = time.time()
+    started = time.perf_counter()
+    error: Optional[str] = None
+    try:
+        yield attributes
+    except BaseException as exc:
+        error = type(exc).__name__
+        raise
+    finally:
+        duration = time.perf_counter() - started
+        REGISTRY.observe("stage_duration_seconds", duration, stage=name)
+        if error:
+            REGISTRY.inc("stage_errors_total", stage=name, error=error)
+        record = {"name": name, "start": start, "duration": duration, "error": error, **attributes}
+        current = _current_trace.get()
+        if current is not None:
+            current.add(record)
+        if logger.isEnabledFor(logging.INFO):
+            logger.info(json.dumps({"event": "span", **record, "duration_ms": round(duration * 1000, 3)}, default=str))
+
+
+def export_if_configured() -> None:
+    """Write Prometheus text to METRICS_EXPORT_PATH (for a textfile collector), if set."""
+    path = os.getenv("METRICS_EXPORT_PATH")
+    if not path:
+        return
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as handle:
+        handle.write(REGISTRY.render_prometheus())
+    os.replace(tmp_path, path)
+
+
+def log_if_configured() -> None:
+    """Print the `metrics` logger's JSON lines to stderr when METRICS_LOG=1.
+
+    Safe to call more than once (Streamlit re-runs its script on every interaction).
+    """
+    if os.getenv("METRICS_LOG", "").strip().lower() not in ("1", "true", "yes"):
+        return
+    if any(getattr(handler, "_metrics_log", False) for handler in logger.handlers):
+        return
+    handler = logging.StreamHandler(sys.stderr)
+    handler.setFormatter(logging.Formatter("%(message)s"))
+    handler._metrics_log = True  # type: ignore[attr-defined]
+    logger.addHandler(handler)
+    logger.setLevel(logging.INFO)
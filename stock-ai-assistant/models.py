@@ -1,4 +1,10 @@
-from dataclasses import dataclass
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Optional
+
+
+def _utc_now() -> datetime:
+    return datetime.now(timezone.utc)
 
 
 @dataclass(frozen=True)
@@ -16,3 +22,16 @@ class StockData:
     week_52_low: float
     change: float
     change_percent: float
+    fetched_at: datetime = field(default_factory=_utc_now, compare=False)
+
+
+@dataclass(frozen=True)
+class FetchResult:
+    symbol: str
+    data: Optional[StockData] = None
+    error: Optional[str] = None
+    skipped: bool = False
+
+    @property
+    def ok(self) -> bool:
+        return self.data is not None
@@ -0,0 +1,82 @@
+import os
+import sqlite3
+import threading
+import time
+from typing import Callable, Optional
+
+from reference_store import DEFAULT_DB_PATH
+
+
+class NegativeCache:
+    """Persistent record of symbols Yahoo recently had no data for.
+
+    Lives next to the reference store so junk tokens that once failed are not
+    retried on every question, even after a restart.
+    """
+
+    def __init__(
+        self,
+        path: str = DEFAULT_DB_PATH,
+        ttl_seconds: float = 6 * 60 * 60,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        self.ttl_seconds = ttl_seconds
+        self._clock = clock
+        self._lock = threading.Lock()
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS negative_lookup ("
+            " symbol TEXT PRIMARY KEY,"
+            " failed_at REAL NOT NULL)"
+        )
+        self._conn.commit()
+        self.hits = 0
+        self.misses = 0
+        self.recorded = 0
+
+    def contains(self, symbol: str) -> bool:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT failed_at FROM negative_lookup WHERE symbol = ?",
+                (symbol.upper(),),
+            ).fetchone()
+            if row and self._clock() - row[0] <= self.ttl_seconds:
+                self.hits += 1
+                return True
+            self.misses += 1
+            return False
+
+    def add(self, symbol: str) -> None:
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO negative_lookup (symbol, failed_at) VALUES (?, ?)",
+                (symbol.upper(), self._clock()),
+            )
+            self._conn.commit()
+            self.recorded += 1
+
+    def discard(self, symbol: str) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM negative_lookup WHERE symbol = ?", (symbol.upper(),))
+            self._conn.commit()
+
+    def stats(self) -> dict[str, int]:
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "recorded": self.recorded}
+
+
+_default_cache: Optional[NegativeCache] = None
+_default_lock = threading.Lock()
+
+
+def get_negative_cache() -> NegativeCache:
+    global _default_cache
+    with _default_lock:
+        if _default_cache is None:
+            _default_cache = NegativeCache(
+                os.getenv("REFERENCE_DB_PATH", DEFAULT_DB_PATH),
+                ttl_seconds=float(os.getenv("NEGATIVE_CACHE_TTL_SECONDS", str(6 * 60 * 60))),
+            )
+        return _default_cache
@@ -0,0 +1,309 @@
+"""Shared pacing and retries for calls to Yahoo and the model endpoints.
+
+Each upstream gets one `Upstream`: an adaptive token bucket plus a retry loop.
+Callers block for a token before every attempt, so however many threads or
+sessions are asking, the upstream sees at most `rate` calls per second. A
+throttling response (HTTP 429 or a rate-limit exception) halves the rate and
+pauses the bucket for `Retry-After` (or a jittered backoff) for everyone, so a
+burst of callers does not keep hammering an upstream that has just said no;
+successes raise the rate back step by step. Other transient failures
+(connection errors, timeouts, 5xx) are retried with jittered exponential backoff.
+"""
+
+import os
+import random
+import re
+import sys
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from typing import Any, Callable, Optional, TypeVar
+
+from deadline import Deadline, DeadlineExceeded
+from metrics import REGISTRY
+
+T = TypeVar("T")
+
+RETRYABLE_STATUS = {408, 409, 429, 500, 502, 503, 504}
+# requests' and curl_cffi's network errors (used by yfinance) derive from OSError, not the builtins.
+_TRANSIENT_NAMES = {"ConnectionError", "Timeout", "ConnectTimeout", "ReadTimeout"}
+# Never wait longer than this on a single Retry-After, whatever the server asks for.
+MAX_RETRY_AFTER_SECONDS = 60.0
+
+
+def _status_code(exc: BaseException) -> Optional[int]:
+    status = getattr(exc, "status_code", None)
+    if status is None:
+        status = getattr(getattr(exc, "response", None), "status_code", None)
+    return status if isinstance(status, int) else None
+
+
+def is_throttled(exc: BaseException) -> bool:
+    # yfinance reports throttling as YFRateLimitError rather than a status code.
+    return _status_code(exc) == 429 or "RateLimit" in type(exc).__name__
+
+
+def is_retryable(exc: BaseException) -> bool:
+    if is_throttled(exc):
+        return True
+    status = _status_code(exc)
+    if status is not None:
+        return status in RETRYABLE_STATUS
+    if isinstance(exc, (ConnectionError, TimeoutError)):
+        return True
+    if any(cls.__name__ in _TRANSIENT_NAMES for cls in type(exc).__mro__):
+        return True
+    # The SDK's connection and timeout errors carry no status; only check if it is already loaded.
+    openai = sys.modules.get("openai")
+    return openai is not None and isinstance(exc, openai.APIConnectionError)
+
+
+def retry_after(exc: BaseException, now: Callable[[], float] = time.time) -> Optional[float]:
+    """Seconds the upstream asked us to wait, from a `Retry-After` header (delta or HTTP date)."""
+    headers = getattr(getattr(exc, "response", None), "headers", None)
+    if not headers:
+        return None
+    value = headers.get("retry-after-ms")
+    if value:
+        try:
+            return min(MAX_RETRY_AFTER_SECONDS, max(0.0, float(value) / 1000))
+        except ValueError:
+            pass
+    value = headers.get("retry-after")
+    if not value:
+        return None
+    try:
+        seconds = float(value)
+    except ValueError:
+        try:
+            seconds = parsedate_to_datetime(value).timestamp() - now()
+        except (TypeError, ValueError):
+            return None
+    return min(MAX_RETRY_AFTER_SECONDS, max(0.0, seconds))
+
+
+class TokenBucket:
+    """Token bucket whose refill rate backs off on throttling and recovers on success."""
+
+    def __init__(
+        self,
+        rate: float,
+        burst: float,
+        min_rate: Optional[float] = None,
+        recovery: float = 0.05,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.max_rate = rate
+        self.min_rate = min_rate if min_rate is not None else rate / 16
+        self.rate = rate
+        self.burst = burst
+        # Fraction of `max_rate` added back after each success.
+        self.recovery = recovery
+        self._clock = clock
+        self._tokens = burst
+        self._updated = clock()
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float) -> None:
+        start = max(self._updated, self._paused_until)
+        if now > start:
+            self._tokens = min(self.burst, self._tokens + (now - start) * self.rate)
+        self._updated = max(now, self._updated)
+
+    def reserve(self, cost: float = 1.0) -> float:
+        """Take `cost` tokens; return how long to wait before using them (0 when available now)."""
+        with self._lock:
+            now = self._clock()
+            self._refill(now)
+            self._tokens -= cost
+            wait = max(0.0, self._paused_until - now)
+            if self._tokens < 0:
+                wait += -self._tokens / self.rate
+            return wait
+
+    def throttled(self, pause: float) -> None:
+        with self._lock:
+            now = self._clock()
+            self._refill(now)
+            self.rate = max(self.min_rate, self.rate / 2)
+            self._tokens = min(self._tokens, 0.0)
+            self._paused_until = max(self._paused_until, now + pause)
+
+    def paused_for(self) -> float:
+        with self._lock:
+            return max(0.0, self._paused_until - self._clock())
+
+    def succeeded(self) -> None:
+        with self._lock:
+            self.rate = min(self.max_rate, self.rate + self.max_rate * self.recovery)
+
+
+class Upstream:
+    def __init__(
+        self,
+        name: str,
+        rate: float,
+        burst: Optional[float] = None,
+        max_attempts: int = 4,
+        base_delay: float = 0.5,
+        max_delay: float = 20.0,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], None] = time.sleep,
+    ) -> None:
+        self.name = name
+        self.bucket = TokenBucket(rate, burst if burst is not None else max(1.0, rate), clock=clock)
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self._sleep = sleep
+        self._lock = threading.Lock()
+        self.queued = 0
+        self.in_flight = 0
+        self.calls = 0
+        self.throttled = 0
+        self.retries = 0
+        self.failures = 0
+
+    def backoff(self, attempt: int) -> float:
+        """Full-jitter exponential backoff for the given 1-based attempt."""
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** (attempt - 1)))
+
+    def _acquire(self, deadline: Optional[Deadline] = None, cost: float = 1.0) -> None:
+        wait = self.bucket.reserve(cost)
+        if wait <= 0:
+            return
+        if deadline is not None and not deadline.allows(wait):
+            raise DeadlineExceeded(f"{self.name}: no call slot before the deadline")
+        with self._lock:
+            self.queued += 1
+        try:
+            while wait > 0:
+                self._sleep(wait)
+                # A throttle that arrived while we slept pushes our turn back too.
+                wait = self.bucket.paused_for()
+                if wait > 0 and deadline is not None and not deadline.allows(wait):
+                    raise DeadlineExceeded(f"{self.name}: upstream paused past the deadline")
+        finally:
+            with self._lock:
+                self.queued -= 1
+
+    def call(self, func: Callable[..., T], *args: Any, cost: float = 1.0, **kwargs: Any) -> T:
+        """Run `func` once a token is free, retrying transient failures; the last error propagates.
+
+        `cost` is how many upstream requests one attempt makes, e.g. one per ticker
+        of a multi-ticker download; each attempt takes that many tokens.
+        """
+        return self.call_before(None, func, *args, cost=cost, **kwargs)
+
+    def call_before(
+        self, deadline: Optional[Deadline], func: Callable[..., T], *args: Any, cost: float = 1.0, **kwargs: Any
+    ) -> T:
+        """Like `call`, but raise `DeadlineExceeded` rather than wait or retry past `deadline`."""
+        attempt = 0
+        while True:
+            attempt += 1
+            if deadline is not None and deadline.expired:
+                raise DeadlineExceeded(f"{self.name}: deadline passed before the call")
+            self._acquire(deadline, cost)
+            with self._lock:
+                self.in_flight += 1
+                self.calls += 1
+            try:
+                result = func(*args, **kwargs)
+                error = None
+            except Exception as exc:
+                error = exc
+            finally:
+                with self._lock:
+                    self.in_flight -= 1
+            if error is None:
+                self.bucket.succeeded()
+                return result
+
+            if not is_retryable(error) or attempt >= self.max_attempts:
+                with self._lock:
+                    self.failures += 1
+                REGISTRY.inc("outbound_failures_total", upstream=self.name)
+                raise error
+            delay = retry_after(error)
+            if delay is None:
+                delay = self.backoff(attempt)
+            if is_throttled(error):
+                # Pause the whole bucket so queued callers wait too, instead of each hitting the 429.
+                self.bucket.throttled(delay)
+                with self._lock:
+                    self.throttled += 1
+                REGISTRY.inc("outbound_throttled_total", upstream=self.name)
+            else:
+                if deadline is not None and not deadline.allows(delay):
+                    raise error
+                self._sleep(delay)
+            with self._lock:
+                self.retries += 1
+            REGISTRY.inc("outbound_retries_total", upstream=self.name)
+
+    def stats(self) -> dict[str, float]:
+        with self._lock:
+            return {
+                "queue_depth": self.queued,
+                "in_flight": self.in_flight,
+                "rate_per_second": round(self.bucket.rate, 3),
+                "calls": self.calls,
+                "throttled": self.throttled,
+                "retries": self.retries,
+                "failures": self.failures,
+            }
+
+
+# Per-upstream defaults: (rate env var, default calls/second).
+_LIMITS = {
+    "yahoo": ("YAHOO_RATE_PER_SECOND", 10.0),
+    "llm": ("LLM_RATE_PER_SECOND", 5.0),
+}
+
+_upstreams: dict[str, Upstream] = {}
+_upstreams_lock = threading.Lock()
+
+
+def get_upstream(name: str) -> Upstream:
+    """Shared `Upstream` for `name`: "yahoo", or "llm:<endpoint>" for each model endpoint."""
+    with _upstreams_lock:
+        upstream = _upstreams.get(name)
+        if upstream is None:
+            env, default = _LIMITS[name.split(":", 1)[0]]
+            rate = float(os.getenv(env, str(default)))
+            upstream = Upstream(
+                name,
+                rate=rate,
+                burst=float(os.getenv(env.replace("RATE_PER_SECOND", "BURST"), str(max(1.0, rate * 2)))),
+                max_attempts=int(os.getenv("OUTBOUND_MAX_ATTEMPTS", "4")),
+            )
+            _upstreams[name] = upstream
+            REGISTRY.register_collector(f"outbound_{re.sub(r'[^A-Za-z0-9]+', '_', name).strip('_')}", upstream.stats)
+        return upstream
+
+
+def load_yfinance() -> Any:
+    """Import yfinance with its errors surfaced, so `call_yahoo` can tell a failure from no data.
+
+    By default yfinance logs network errors and timeouts and returns an empty frame,
+    which would look like a symbol with no data and never be retried.
+    """
+    import yfinance
+
+    config = getattr(yfinance, "config", None)
+    if config is None:
+        # Older releases cannot surface errors, which would silently turn off retries.
+        raise ImportError(f"yfinance {yfinance.__version__} is too old; install yfinance>=1.0 (see requirements.txt)")
+    config.debug.hide_exceptions = False
+    return yfinance
+
+
+def is_missing_ticker(exc: BaseException) -> bool:
+    """yfinance's YFTzMissingError / YFPricesMissingError: Yahoo answered and had no data."""
+    return any(cls.__name__ == "YFTickerMissingError" for cls in type(exc).__mro__)
+
+
+def call_yahoo(func: Callable[..., T], *args: Any, cost: float = 1.0, **kwargs: Any) -> T:
+    return get_upstream("yahoo").call(func, *args, cost=cost, **kwargs)
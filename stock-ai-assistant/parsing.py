@@ -1,5 +1,7 @@
 import re
 
+from metrics import span
+
 
 _STOPWORDS = {
     "I",
@@ -46,7 +48,7 @@ _STOPWORDS = {
 }
 
 # Supports common Yahoo Finance formats like BRK-B, RELIANCE.NS, BAJAJ-AUTO.NS.
-_TICKER_RE = re.compile(r"\b\$?[A-Z&]{1,10}(?:[.-][A-Z]{1,10})?\b", re.IGNORECASE)
+_TICKER_RE = re.compile(r"(?:\$|\b)[A-Z&]{1,10}(?:[.-][A-Z]{1,10})?\b", re.IGNORECASE)
 
 
 SUPPORTED_COMPANIES = [
@@ -202,6 +204,76 @@ _ALIASES = {
 _COMPANY_MAP.update(_ALIASES)
 
 
+def _build_name_pattern(names) -> re.Pattern:
+    """Compile company names into one trie-shaped regex.
+
+    Sharing prefixes keeps matching roughly linear in the text length even for
+    very large name lists, and the greedy optional suffixes make the longest
+    name win at each position. Names only match on word boundaries, so "lic"
+    no longer fires inside "public".
+    """
+    trie: dict = {}
+    for name in names:
+        node = trie
+        for char in name:
+            node = node.setdefault(char, {})
+        node[""] = {}
+
+    def build(node: dict) -> str:
+        terminal = "" in node
+        branches = [re.escape(char) + build(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ""
+        if len(branches) == 1 and not terminal:
+            return branches[0]
+        group = "(?:" + "|".join(branches) + ")"
+        return group + "?" if terminal else group
+
+    return re.compile(r"(?<![a-z0-9])(?:" + build(trie) + r")(?![a-z0-9])")
+
+
+_NAME_RE = _build_name_pattern(_COMPANY_MAP)
+
+# Tickers we have seen real data for. Ordinary words are only treated as
+# tickers when they are in this set or typed the way tickers usually are.
+_KNOWN_SYMBOLS = {ticker for _, _, _, ticker in SUPPORTED_COMPANIES}
+_KNOWN_SYMBOLS.update(_ALIASES.values())
+
+
+def is_known_symbol(symbol: str) -> bool:
+    return symbol.upper() in _KNOWN_SYMBOLS
+
+
+def register_known_symbols(symbols) -> None:
+    _KNOWN_SYMBOLS.update(symbol.upper() for symbol in symbols)
+
+
+def _looks_explicit(raw: str) -> bool:
+    """True for `$aapl`, `AAPL`, `reliance.ns` style tokens rather than plain words."""
+    return raw.startswith("$") or raw.isupper() or "." in raw
+
+
+_MONTHS = (
+    r"jan(?:uary)?|feb(?:ruary)?|mar(?:ch)?|apr(?:il)?|may|june?|july?|aug(?:ust)?|sept?(?:ember)?|"
+    r"oct(?:ober)?|nov(?:ember)?|dec(?:ember)?"
+)
+
+# Questions that need more than today's quote: trends, ranges of time, risk.
+# "Performing" and "since" alone are not enough ("How is AAPL performing today?",
+# "Has TSLA moved since the open?"); they need a period, which the first group
+# already catches, or a date.
+_HISTORY_RE = re.compile(
+    r"\b(weeks?|weekly|months?|monthly|quarters?|quarterly|years?|yearly|ytd|trend\w*|volatil\w*|"
+    r"moving averages?|drawdowns?|correlat\w*|momentum|historic\w*|long[- ]term|"
+    rf"since (?:(?:\d{{1,2}} )?(?:{_MONTHS})|(?:19|20)\d\d|inception|(?:its |the )?ipo|listing))\b",
+    re.IGNORECASE,
+)
+
+
+def asks_about_history(text: str) -> bool:
+    return bool(_HISTORY_RE.search(text))
+
+
 def get_supported_companies() -> dict[str, list[dict[str, str]]]:
     grouped: dict[str, list[dict[str, str]]] = {"USA": [], "India": []}
     for country, rank, name, ticker in SUPPORTED_COMPANIES:
@@ -210,14 +282,26 @@ def get_supported_companies() -> dict[str, list[dict[str, str]]]:
 
 
 def extract_symbols(text: str) -> list[str]:
-    symbols: list[str] = []
+    with span("parse") as attrs:
+        result = _extract_symbols(text)
+        attrs["symbols"] = len(result)
+        return result
 
-    lowered = text.lower()
-    for name, ticker in _COMPANY_MAP.items():
-        if name in lowered:
-            symbols.append(ticker)
+
+def _extract_symbols(text: str) -> list[str]:
+    # (position in text, symbol), so names and tickers come back in the order they were written.
+    found: list[tuple[int, str]] = []
+    name_spans: list[tuple[int, int]] = []
+
+    for match in _NAME_RE.finditer(text.lower()):
+        found.append((match.start(), _COMPANY_MAP[match.group(0)]))
+        name_spans.append(match.span())
 
     for match in _TICKER_RE.finditer(text):
+        # Words that are part of a recognised company name are not tickers.
+        if any(start <= match.start() and match.end() <= end for start, end in name_spans):
+            continue
+
         raw = match.group(0)
         token = raw[1:] if raw.startswith("$") else raw
         token = token.upper()
@@ -225,16 +309,20 @@ def extract_symbols(text: str) -> list[str]:
         if token in _STOPWORDS:
             continue
 
+        if not _looks_explicit(raw) and token not in _KNOWN_SYMBOLS:
+            continue
+
         if len(token) == 1:
             prev = text[match.start() - 1] if match.start() > 0 else ""
             if prev in ("'", "’"):
                 continue
 
-        symbols.append(token)
+        found.append((match.start(), token))
 
+    found.sort()
     seen = set()
     result = []
-    for sym in symbols:
+    for _, sym in found:
         if sym not in seen:
             result.append(sym)
             seen.add(sym)
@@ -0,0 +1,107 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Optional
+
+from markets import is_symbol_market_open
+from models import StockData
+
+
+def normalize_symbol(symbol: str) -> str:
+    return symbol.strip().lstrip("$").upper()
+
+
+class QuoteCache:
+    """Thread-safe LRU cache of quotes with a shorter TTL while the symbol's market is open."""
+
+    def __init__(
+        self,
+        max_entries: int = 256,
+        ttl_seconds: float = 60.0,
+        closed_ttl_seconds: float = 900.0,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.closed_ttl_seconds = closed_ttl_seconds
+        self._clock = clock
+        self._entries: OrderedDict[str, tuple[float, StockData]] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def _ttl_for(self, symbol: str) -> float:
+        return self.ttl_seconds if is_symbol_market_open(symbol) else self.closed_ttl_seconds
+
+    def get(self, symbol: str) -> Optional[StockData]:
+        key = normalize_symbol(symbol)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            stored_at, data = entry
+            if self._clock() - stored_at > self._ttl_for(key):
+                del self._entries[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return data
+
+    def peek(self, symbol: str) -> Optional[StockData]:
+        """The fresh cached quote, if any, without counting a hit or miss or refreshing its LRU slot."""
+        key = normalize_symbol(symbol)
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry is None or self._clock() - entry[0] > self._ttl_for(key):
+            return None
+        return entry[1]
+
+    def put(self, data: StockData) -> None:
+        key = normalize_symbol(data.symbol)
+        with self._lock:
+            self._entries[key] = (self._clock(), data)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, symbol: str) -> None:
+        with self._lock:
+            self._entries.pop(normalize_symbol(symbol), None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict[str, int]:
+        with self._lock:
+            return {
+                "size": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+            }
+
+
+_default_cache: Optional[QuoteCache] = None
+_default_lock = threading.Lock()
+
+
+def get_quote_cache() -> QuoteCache:
+    """Return the process-wide cache, configured from the environment on first use."""
+    global _default_cache
+    with _default_lock:
+        if _default_cache is None:
+            _default_cache = QuoteCache(
+                max_entries=int(os.getenv("QUOTE_CACHE_SIZE", "256")),
+                ttl_seconds=float(os.getenv("QUOTE_CACHE_TTL_SECONDS", "60")),
+                closed_ttl_seconds=float(os.getenv("QUOTE_CACHE_CLOSED_TTL_SECONDS", "900")),
+            )
+        return _default_cache
@@ -0,0 +1,227 @@
+"""Column-per-field storage for many quotes at once.
+
+A list of `StockData` keeps one Python object per field per quote. `QuoteTable`
+keeps one NumPy array per field instead, so thousands of quotes take a few
+contiguous buffers and can be ranked or filtered with whole-array operations.
+Slicing a table returns views of the same buffers; filtering records which rows
+are selected and leaves the buffers alone. Rows are exposed as lightweight
+`QuoteRow` views that read like `StockData`.
+
+The table is a standalone container for callers holding many quotes at once;
+the screener still ranks its few hundred `StockData` directly, which measured
+faster than building a table first at that size.
+"""
+
+from dataclasses import fields
+from datetime import datetime, timedelta, timezone
+from typing import Iterable, Iterator, Optional, Sequence, Union
+
+import numpy as np
+
+from models import StockData
+
+FIELDS = {
+    "symbol": np.dtype(object),
+    "name": np.dtype(object),
+    "current_price": np.dtype("f8"),
+    "previous_close": np.dtype("f8"),
+    "open_price": np.dtype("f8"),
+    "day_high": np.dtype("f8"),
+    "day_low": np.dtype("f8"),
+    "volume": np.dtype("i8"),
+    "market_cap": np.dtype("i8"),
+    "week_52_high": np.dtype("f8"),
+    "week_52_low": np.dtype("f8"),
+    "change": np.dtype("f8"),
+    "change_percent": np.dtype("f8"),
+    # Microseconds since the epoch, UTC.
+    "fetched_at": np.dtype("datetime64[us]"),
+}
+# A plain check rather than an assert, which `python -O` would strip.
+if list(FIELDS) != [item.name for item in fields(StockData)]:
+    raise RuntimeError("quote_table.FIELDS must list the StockData fields in order")
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+Rows = Union[slice, np.ndarray]
+
+
+def _epoch_micros(value: datetime) -> int:
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    # Exact: a float64 timestamp resolves well below a microsecond for present-day dates.
+    return round(value.timestamp() * 1_000_000)
+
+
+def _to_datetime(value: np.datetime64) -> datetime:
+    return _EPOCH + timedelta(microseconds=int(value.astype(np.int64)))
+
+
+def _python(name: str, value):
+    kind = FIELDS[name].kind
+    if kind == "f":
+        return float(value)
+    if kind == "i":
+        return int(value)
+    if kind == "M":
+        return _to_datetime(value)
+    return value
+
+
+class QuoteRow:
+    """One row of a `QuoteTable`, read through to the table's columns."""
+
+    __slots__ = ("_table", "_row")
+
+    def __init__(self, table: "QuoteTable", row: int) -> None:
+        self._table = table
+        self._row = row
+
+    def __getattr__(self, name: str):
+        if name not in FIELDS:
+            raise AttributeError(f"{type(self).__name__!r} object has no attribute {name!r}")
+        return _python(name, self._table._base[name][self._row])
+
+    def __repr__(self) -> str:
+        return f"QuoteRow(symbol={self.symbol!r}, current_price={self.current_price!r})"
+
+    def to_stock_data(self) -> StockData:
+        return StockData(**{name: _python(name, column[self._row]) for name, column in self._table._base.items()})
+
+
+class QuoteTable:
+    """Quotes stored as one array per `StockData` field, plus a symbol -> row index."""
+
+    __slots__ = ("_base", "_rows", "_index")
+
+    def __init__(self, columns: dict[str, np.ndarray], rows: Optional[Rows] = None) -> None:
+        missing = FIELDS.keys() - columns.keys()
+        if missing:
+            raise ValueError(f"Missing quote columns: {', '.join(sorted(missing))}")
+        lengths = {len(columns[name]) for name in FIELDS}
+        if len(lengths) > 1:
+            raise ValueError("Quote columns must all have the same length")
+        self._base = {name: columns[name] for name in FIELDS}
+        # Positions in the base columns this table covers: a slice (views) or an index array.
+        self._rows = slice(0, lengths.pop() if lengths else 0) if rows is None else rows
+        self._index: Optional[dict[str, int]] = None
+
+    @classmethod
+    def empty(cls) -> "QuoteTable":
+        return cls({name: np.empty(0, dtype=dtype) for name, dtype in FIELDS.items()})
+
+    @classmethod
+    def from_columns(cls, **columns: Iterable) -> "QuoteTable":
+        """Build from per-field sequences; `fetched_at` defaults to now for every row."""
+        arrays = {}
+        for name, dtype in FIELDS.items():
+            if name == "fetched_at" and name not in columns:
+                continue
+            values = columns[name]
+            arrays[name] = np.asarray(values if isinstance(values, (list, np.ndarray)) else list(values), dtype=dtype)
+        if "fetched_at" not in arrays:
+            now = _epoch_micros(datetime.now(timezone.utc))
+            arrays["fetched_at"] = np.full(len(arrays["symbol"]), now, dtype="i8").astype(FIELDS["fetched_at"])
+        return cls(arrays)
+
+    @classmethod
+    def from_stock_data(cls, items: Sequence[StockData]) -> "QuoteTable":
+        count = len(items)
+        columns = {}
+        for name, dtype in FIELDS.items():
+            if dtype.kind == "O":
+                columns[name] = np.array([getattr(item, name) for item in items], dtype=object)
+            elif dtype.kind == "M":
+                micros = np.fromiter((_epoch_micros(item.fetched_at) for item in items), dtype=np.int64, count=count)
+                columns[name] = micros.astype(dtype)
+            else:
+                columns[name] = np.fromiter((getattr(item, name) for item in items), dtype=dtype, count=count)
+        return cls(columns)
+
+    def __len__(self) -> int:
+        if isinstance(self._rows, slice):
+            return len(range(*self._rows.indices(len(self._base["symbol"]))))
+        return len(self._rows)
+
+    def column(self, name: str) -> np.ndarray:
+        """The values of one field; a view of the stored buffer unless the table was filtered."""
+        return self._base[name][self._rows]
+
+    def _positions(self) -> np.ndarray:
+        if isinstance(self._rows, slice):
+            return np.arange(len(self._base["symbol"]))[self._rows]
+        return self._rows
+
+    def _select(self, key: Union[slice, Sequence[int], np.ndarray]) -> "QuoteTable":
+        table = QuoteTable.__new__(QuoteTable)
+        table._base = self._base
+        table._index = None
+        if isinstance(key, slice) and isinstance(self._rows, slice):
+            covered = range(*self._rows.indices(len(self._base["symbol"])))[key]
+            stop = covered.stop if covered.stop >= 0 else None
+            table._rows = slice(covered.start, stop, covered.step)
+        else:
+            table._rows = self._positions()[key]
+        return table
+
+    def __getitem__(self, key):
+        if isinstance(key, (int, np.integer)):
+            return self.row(int(key))
+        return self._select(key)
+
+    def row(self, position: int) -> QuoteRow:
+        count = len(self)
+        if not -count <= position < count:
+            raise IndexError("quote row out of range")
+        if isinstance(self._rows, slice):
+            start, _, step = self._rows.indices(len(self._base["symbol"]))
+            return QuoteRow(self, start + (position % count) * step)
+        return QuoteRow(self, int(self._rows[position]))
+
+    def __iter__(self) -> Iterator[QuoteRow]:
+        for position in self._positions():
+            yield QuoteRow(self, int(position))
+
+    def filter(self, mask: np.ndarray) -> "QuoteTable":
+        """Rows where `mask` is true; shares the stored buffers with this table."""
+        mask = np.asarray(mask, dtype=bool)
+        if mask.shape != (len(self),):
+            raise ValueError(f"Mask has shape {mask.shape}, expected ({len(self)},)")
+        return self._select(np.flatnonzero(mask))
+
+    def take(self, positions: Union[Sequence[int], np.ndarray]) -> "QuoteTable":
+        """Rows at `positions`, in that order."""
+        return self._select(np.asarray(positions, dtype=np.intp))
+
+    @property
+    def symbols(self) -> list[str]:
+        return list(self.column("symbol"))
+
+    def index_of(self, symbol: str) -> Optional[int]:
+        """Position of `symbol` in this table; built on first use."""
+        if self._index is None:
+            self._index = {symbol: position for position, symbol in enumerate(self.column("symbol"))}
+        return self._index.get(symbol)
+
+    def get(self, symbol: str) -> Optional[QuoteRow]:
+        position = self.index_of(symbol)
+        return None if position is None else self.row(position)
+
+    def __contains__(self, symbol: object) -> bool:
+        return isinstance(symbol, str) and self.index_of(symbol) is not None
+
+    def to_stock_data(self) -> list[StockData]:
+        columns = [self.column(name) for name in FIELDS]
+        # tolist() converts whole columns to Python floats / ints / objects at C speed.
+        converted = [values.tolist() for values in columns[:-1]]
+        # A bulk fetch stamps many quotes alike, so build each distinct datetime once.
+        stamps, inverse = np.unique(columns[-1].astype(np.int64), return_inverse=True)
+        moments = [_EPOCH + timedelta(microseconds=micros) for micros in stamps.tolist()]
+        converted.append([moments[position] for position in inverse.tolist()])
+        return [StockData(*values) for values in zip(*converted)]
+
+    @property
+    def nbytes(self) -> int:
+        """Bytes held by the column buffers this table covers (object columns count their pointers)."""
+        return sum(self.column(name).nbytes for name in FIELDS)
+
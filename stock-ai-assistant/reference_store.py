@@ -0,0 +1,243 @@
+"""Persistent store for slow-changing reference data from `Ticker.info`.
+
+Quotes are cheap to fetch from price history, but names, market caps and
+52-week ranges only come from `.info`, which is slow and heavily rate limited.
+This store keeps those fields in SQLite so `.info` is called at most once per
+symbol per refresh interval, across process restarts. Failed refreshes are
+recorded too: a symbol Yahoo has nothing for is not asked about again until the
+shortest refresh interval has passed, and one that hit a rate limit or network
+error waits a few minutes.
+
+Usage:
+    python reference_store.py warm [SYMBOL ...] [--force]
+    python reference_store.py show SYMBOL [SYMBOL ...]
+"""
+
+import argparse
+import contextvars
+import json
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Optional
+
+from metrics import span
+from outbound import call_yahoo, is_missing_ticker, load_yfinance
+from single_flight import SingleFlight
+
+DAY_SECONDS = 24 * 60 * 60
+
+# Maximum age in seconds before a field is refreshed from `.info`.
+REFRESH_POLICIES: dict[str, float] = {
+    "longName": 30 * DAY_SECONDS,
+    "currency": 30 * DAY_SECONDS,
+    "marketCap": DAY_SECONDS,
+    "fiftyTwoWeekHigh": DAY_SECONDS,
+    "fiftyTwoWeekLow": DAY_SECONDS,
+}
+
+# Back-off after a refresh that failed for a reason other than Yahoo having no data.
+TRANSIENT_FAILURE_SECONDS = 5 * 60
+
+DEFAULT_DB_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "reference.sqlite3")
+
+
+# Imported on first refresh so reading stored fields never pays for yfinance.
+yf = None
+
+
+def _load_info(symbol: str) -> dict[str, Any]:
+    global yf
+    if yf is None:
+        yf = load_yfinance()
+    return call_yahoo(lambda: yf.Ticker(symbol).info) or {}
+
+
+class ReferenceStore:
+    def __init__(
+        self,
+        path: str = DEFAULT_DB_PATH,
+        policies: Optional[dict[str, float]] = None,
+        loader: Callable[[str], dict[str, Any]] = _load_info,
+        clock: Callable[[], float] = time.time,
+        failure_interval: Optional[float] = None,
+        transient_failure_interval: float = TRANSIENT_FAILURE_SECONDS,
+    ) -> None:
+        self.path = path
+        self.policies = policies or REFRESH_POLICIES
+        # Seconds before a symbol whose `.info` came back empty is tried again.
+        self.failure_interval = failure_interval if failure_interval is not None else min(self.policies.values())
+        # The same after a rate limit, timeout or other error that says nothing about the symbol.
+        self.transient_failure_interval = transient_failure_interval
+        self._loader = loader
+        self._clock = clock
+        self._lock = threading.Lock()
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS reference ("
+            " symbol TEXT NOT NULL,"
+            " field TEXT NOT NULL,"
+            " value TEXT,"
+            " updated_at REAL NOT NULL,"
+            " PRIMARY KEY (symbol, field))"
+        )
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS refresh_failures (symbol TEXT PRIMARY KEY, retry_at REAL NOT NULL)"
+        )
+        self._conn.commit()
+        self._refreshes = SingleFlight()
+        self.info_calls = 0
+
+    def _read(self, symbol: str) -> dict[str, tuple[Any, float]]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT field, value, updated_at FROM reference WHERE symbol = ?",
+                (symbol,),
+            ).fetchall()
+        return {field: (json.loads(value), updated_at) for field, value, updated_at in rows}
+
+    def _write(self, symbol: str, info: dict[str, Any]) -> None:
+        now = self._clock()
+        rows = [
+            (symbol, field, json.dumps(info.get(field)), now)
+            for field in self.policies
+        ]
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO reference (symbol, field, value, updated_at) VALUES (?, ?, ?, ?)",
+                rows,
+            )
+            self._conn.execute("DELETE FROM refresh_failures WHERE symbol = ?", (symbol,))
+            self._conn.commit()
+
+    def _record_failure(self, symbol: str, interval: float) -> None:
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO refresh_failures (symbol, retry_at) VALUES (?, ?)",
+                (symbol, self._clock() + interval),
+            )
+            self._conn.commit()
+
+    def _recently_failed(self, symbol: str) -> bool:
+        with self._lock:
+            row = self._conn.execute("SELECT retry_at FROM refresh_failures WHERE symbol = ?", (symbol,)).fetchone()
+        return row is not None and self._clock() < row[0]
+
+    def _stale_fields(self, stored: dict[str, tuple[Any, float]]) -> list[str]:
+        now = self._clock()
+        return [
+            field
+            for field, max_age in self.policies.items()
+            if field not in stored or now - stored[field][1] > max_age
+        ]
+
+    def get(self, symbol: str, force: bool = False) -> dict[str, Any]:
+        """Return reference fields for `symbol`, refreshing from `.info` only if a field is stale.
+
+        A failed refresh falls back to whatever was stored previously and is not
+        retried unless `force` is set: for `failure_interval` seconds if Yahoo had
+        no data, for `transient_failure_interval` seconds after any other error.
+        """
+        symbol = symbol.upper()
+        stored = self._read(symbol)
+        if force or (self._stale_fields(stored) and not self._recently_failed(symbol)):
+            self._refreshes.do(symbol, lambda: self._refresh(symbol))
+            stored = self._read(symbol)
+        return {field: value for field, (value, _) in stored.items() if value is not None}
+
+    def _refresh(self, symbol: str) -> None:
+        with self._lock:
+            self.info_calls += 1
+        try:
+            with span("reference_info", symbol=symbol):
+                info = self._loader(symbol)
+        except Exception as exc:
+            # Only Yahoo saying it has no such ticker is worth the long back-off.
+            self._record_failure(
+                symbol, self.failure_interval if is_missing_ticker(exc) else self.transient_failure_interval
+            )
+            return
+        if info:
+            self._write(symbol, info)
+        else:
+            self._record_failure(symbol, self.failure_interval)
+
+    def get_many(self, symbols: list[str], max_workers: int = 8, force: bool = False) -> list[dict[str, Any]]:
+        if not symbols:
+            return []
+        workers = max(1, min(max_workers, len(symbols)))
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="reference") as executor:
+            contexts = [contextvars.copy_context() for _ in symbols]
+            return list(
+                executor.map(lambda ctx, symbol: ctx.run(self.get, symbol, force), contexts, symbols)
+            )
+
+    def symbols(self) -> list[str]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT DISTINCT symbol FROM reference WHERE field = 'longName' AND value != 'null'"
+            ).fetchall()
+        return [symbol for (symbol,) in rows]
+
+    def describe(self, symbol: str) -> dict[str, tuple[Any, float]]:
+        """Stored values with their age in seconds, without triggering a refresh."""
+        now = self._clock()
+        return {field: (value, now - updated_at) for field, (value, updated_at) in self._read(symbol.upper()).items()}
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+_default_store: Optional[ReferenceStore] = None
+_default_lock = threading.Lock()
+
+
+def get_reference_store() -> ReferenceStore:
+    global _default_store
+    with _default_lock:
+        if _default_store is None:
+            _default_store = ReferenceStore(os.getenv("REFERENCE_DB_PATH", DEFAULT_DB_PATH))
+        return _default_store
+
+
+def main(argv: Optional[list[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Warm or inspect the reference-data store.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    warm = subparsers.add_parser("warm", help="Fetch reference data for symbols (default: supported companies).")
+    warm.add_argument("symbols", nargs="*")
+    warm.add_argument("--force", action="store_true", help="Refresh even if stored fields are fresh.")
+    show = subparsers.add_parser("show", help="Print stored reference data and its age.")
+    show.add_argument("symbols", nargs="+")
+    args = parser.parse_args(argv)
+
+    store = get_reference_store()
+    if args.command == "warm":
+        symbols = args.symbols
+        if not symbols:
+            from parsing import SUPPORTED_COMPANIES
+
+            symbols = [ticker for _, _, _, ticker in SUPPORTED_COMPANIES]
+        started = time.perf_counter()
+        results = store.get_many([symbol.upper() for symbol in symbols], force=args.force)
+        elapsed = time.perf_counter() - started
+        filled = sum(1 for result in results if result)
+        print(f"[*] Warmed {filled}/{len(symbols)} symbols in {elapsed:.1f}s ({store.info_calls} .info calls)")
+        return
+
+    for symbol in args.symbols:
+        stored = store.describe(symbol)
+        print(f"{symbol.upper()}:")
+        if not stored:
+            print("  (not stored)")
+            continue
+        for field, (value, age) in stored.items():
+            print(f"  {field}: {value!r} (age {age / 3600:.1f}h)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,186 @@
+"""Rank the supported universe for "top gainers" / "fell most" style questions.
+
+The whole universe (or one country's slice) is fetched through
+`get_stock_data_many`, which serves cached quotes and downloads the rest in one
+bulk call, then ranked with array operations. Only the top rows go to the model,
+so the prompt stays the same size however large the universe is.
+"""
+
+import re
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Callable, Optional
+
+from data_service import TIMED_OUT_MESSAGE, get_stock_data_many
+from models import FetchResult, StockData
+from parsing import SUPPORTED_COMPANIES
+
+if TYPE_CHECKING:
+    import numpy as np
+
+DEFAULT_LIMIT = 5
+MAX_LIMIT = 20
+
+METRIC_LABELS = {
+    "gainers": "biggest daily % gain",
+    "losers": "biggest daily % fall",
+    "movers": "largest daily % move either way",
+    "active": "highest volume today",
+    "near_high": "closest to the 52-week high",
+    "near_low": "closest to the 52-week low",
+}
+
+# Checked in order; the first metric whose pattern matches wins.
+_METRIC_PATTERNS = [
+    ("near_high", r"\b(near|close to|closest to|at)\s+(?:(?:a|its|their|the)\s+)?52[- ]?week\s+highs?\b|\bnew highs?\b"),
+    ("near_low", r"\b(near|close to|closest to|at)\s+(?:(?:a|its|their|the)\s+)?52[- ]?week\s+lows?\b|\bnew lows?\b"),
+    ("losers", r"\blosers?\b|\b(fell|fall|fallen|dropped|drop|declined|lost|down)\s+(the\s+)?most\b|\bworst\b"),
+    ("gainers", r"\bgainers?\b|\b(gained|gain|rose|risen|rise|up)\s+(the\s+)?most\b|\b(top|best)\s+performers?\b"),
+    ("movers", r"\bmovers?\b|\bmoved\s+(the\s+)?most\b|\bmost\s+volatile\b"),
+    ("active", r"\bmost\s+(active|traded)\b|\b(highest|most|top)\s+volume\b|\bby\s+volume\b"),
+]
+_METRIC_RES = [(metric, re.compile(pattern, re.IGNORECASE)) for metric, pattern in _METRIC_PATTERNS]
+_LIMIT_RE = re.compile(r"\b(?:top|best|worst|biggest)\s+(\d{1,3})\b|\b(\d{1,3})\s+(?:top|best|worst|biggest|stocks|companies)\b", re.IGNORECASE)
+_INDIA_RE = re.compile(r"\b(india|indian|nse|bse|nifty|sensex)\b", re.IGNORECASE)
+_USA_RE = re.compile(r"\b(usa|american|united states|wall street|nasdaq)\b", re.IGNORECASE)
+# "US" only counts in capitals so "show us the top gainers" is not a country filter.
+_US_RE = re.compile(r"\bUS\b|\bU\.S\.")
+
+
+@dataclass(frozen=True)
+class ScreenRequest:
+    metric: str
+    country: Optional[str] = None
+    limit: int = DEFAULT_LIMIT
+
+
+@dataclass(frozen=True)
+class ScreenResult:
+    request: ScreenRequest
+    items: list[StockData]
+    universe: int
+    missing: int
+    # Of `missing`, how many were dropped because the fetch ran out of time.
+    timed_out: int = 0
+
+    def describe(self) -> str:
+        scope = f"{self.request.country} " if self.request.country else ""
+        text = (
+            f"Screened {self.universe} supported {scope}companies; showing the top {len(self.items)} "
+            f"by {METRIC_LABELS[self.request.metric]}, best first."
+        )
+        no_data = self.missing - self.timed_out
+        if no_data:
+            text += f" {no_data} companies had no data and were left out."
+        if self.timed_out:
+            text += f" {self.timed_out} companies did not respond in time and were left out."
+        return text
+
+
+def parse_screen(question: str) -> Optional[ScreenRequest]:
+    """Recognise a ranking question; None when the question is about specific stocks."""
+    metric = next((metric for metric, pattern in _METRIC_RES if pattern.search(question)), None)
+    if metric is None:
+        return None
+
+    country = None
+    if _INDIA_RE.search(question):
+        country = "India"
+    elif _USA_RE.search(question) or _US_RE.search(question):
+        country = "USA"
+
+    limit = DEFAULT_LIMIT
+    match = _LIMIT_RE.search(question)
+    if match:
+        requested = int(match.group(1) or match.group(2))
+        # "the top 50 US companies" names the universe, not how many rows to show.
+        if requested < 50:
+            limit = max(1, min(MAX_LIMIT, requested))
+    return ScreenRequest(metric=metric, country=country, limit=limit)
+
+
+def universe(country: Optional[str] = None) -> list[str]:
+    return [ticker for code, _, _, ticker in SUPPORTED_COMPANIES if country is None or code == country]
+
+
+def _scores(items: list[StockData], metric: str) -> "np.ndarray":
+    import numpy as np
+
+    count = len(items)
+    change = np.fromiter((item.change_percent for item in items), dtype=float, count=count)
+    if metric == "gainers":
+        return change
+    if metric == "losers":
+        return -change
+    if metric == "movers":
+        return np.abs(change)
+    if metric == "active":
+        return np.fromiter((item.volume for item in items), dtype=float, count=count)
+
+    price = np.fromiter((item.current_price for item in items), dtype=float, count=count)
+    if metric == "near_high":
+        high = np.fromiter((item.week_52_high for item in items), dtype=float, count=count)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return np.where(high > 0, price / high - 1, -np.inf)
+    low = np.fromiter((item.week_52_low for item in items), dtype=float, count=count)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(low > 0, 1 - price / low, -np.inf)
+
+
+def rank(items: list[StockData], metric: str, limit: int) -> list[StockData]:
+    """The `limit` best items for `metric`, best first, without sorting the whole list."""
+    # Deferred like the other numerical imports so the entry points start quickly.
+    import numpy as np
+
+    if not items or limit <= 0:
+        return []
+    scores = np.nan_to_num(_scores(items, metric), nan=-np.inf)
+    if limit < len(items):
+        top = np.argpartition(-scores, limit - 1)[:limit]
+    else:
+        top = np.arange(len(items))
+    ordered = top[np.argsort(-scores[top], kind="stable")]
+    return [items[index] for index in ordered]
+
+
+def run_screen(
+    request: ScreenRequest,
+    symbols: Optional[list[str]] = None,
+    fetch: Callable[..., list[FetchResult]] = get_stock_data_many,
+    timeout: Optional[float] = None,
+) -> ScreenResult:
+    """Fetch `symbols` (default: the request's slice of the supported universe) and rank them.
+
+    Companies still loading after `timeout` seconds are ranked without.
+    """
+    keys = symbols or universe(request.country)
+    results = fetch(keys, timeout=timeout)
+    items = [result.data for result in results if result.data is not None]
+    return ScreenResult(
+        request=request,
+        items=rank(items, request.metric, request.limit),
+        universe=len(keys),
+        missing=len(keys) - len(items),
+        timed_out=sum(result.error == TIMED_OUT_MESSAGE for result in results),
+    )
+
+
+def _names_market(symbol: str) -> bool:
+    """True for tokens like "US" or "NSE" that scope the screen rather than name a stock."""
+    return any(pattern.fullmatch(symbol) for pattern in (_INDIA_RE, _USA_RE, _US_RE))
+
+
+def screen_question(question: str, symbols: list[str], timeout: Optional[float] = None) -> Optional[ScreenResult]:
+    """Run a screen if `question` asks for one.
+
+    Two or more symbols in the question narrow the universe to them ("which
+    fell most: Apple, Tesla or Nvidia?"); a single one, supported or not, means
+    the question is about that stock, not a ranking. Only a question naming no
+    stock screens the whole supported list.
+    """
+    request = parse_screen(question)
+    if request is None:
+        return None
+    symbols = [symbol for symbol in symbols if not _names_market(symbol)]
+    if len(symbols) == 1:
+        return None
+    return run_screen(request, symbols or None, timeout=timeout)
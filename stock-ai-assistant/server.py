@@ -0,0 +1,404 @@
+"""Headless HTTP API for the question pipeline, built on asyncio streams.
+
+Endpoints:
+    GET  /quote?symbol=AAPL
+    GET  /quotes?symbols=AAPL,MSFT    (or POST {"symbols": [...]})
+    POST /ask   {"question": "...", "stream": false}
+    GET  /metrics                     Prometheus text
+    GET  /healthz
+
+Data and model calls are blocking, so they run on a bounded thread pool.
+When more than `max_pending` calls are waiting, new requests get a 503 with
+Retry-After instead of queueing without limit.
+
+Usage:
+    python server.py --host 127.0.0.1 --port 8000
+"""
+
+import argparse
+import asyncio
+import functools
+import json
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from http import HTTPStatus
+from typing import Any, Callable, Optional
+from urllib.parse import parse_qs, urlsplit
+
+from ai_service import explain_with_ai, stream_explanation
+from cache_warmer import start_cache_warmer
+from config import Config, load_config
+from data_service import get_stock_data_many
+from formatting import create_multi_summary, format_as_of, quote_to_dict
+from metrics import REGISTRY, log_if_configured, span
+from models import FetchResult, StockData
+from parsing import extract_symbols
+from screener import screen_question
+
+MAX_BODY_BYTES = 64 * 1024
+MAX_HEADERS = 100
+MAX_BATCH_SYMBOLS = 200
+
+
+class HTTPError(Exception):
+    def __init__(self, status: int, message: str, headers: Optional[dict[str, str]] = None) -> None:
+        super().__init__(message)
+        self.status = status
+        self.message = message
+        self.headers = headers or {}
+
+
+@dataclass
+class Request:
+    method: str
+    path: str
+    query: dict[str, list[str]]
+    headers: dict[str, str]
+    body: bytes = b""
+    keep_alive: bool = True
+
+    def json(self) -> dict[str, Any]:
+        if not self.body:
+            return {}
+        try:
+            payload = json.loads(self.body)
+        except ValueError as exc:
+            raise HTTPError(400, "Request body must be JSON") from exc
+        if not isinstance(payload, dict):
+            raise HTTPError(400, "Request body must be a JSON object")
+        return payload
+
+
+@dataclass
+class Response:
+    status: int = 200
+    body: bytes = b""
+    content_type: str = "application/json"
+    headers: dict[str, str] = field(default_factory=dict)
+
+
+def _json_response(payload: Any, status: int = 200, headers: Optional[dict[str, str]] = None) -> Response:
+    return Response(status=status, body=json.dumps(payload).encode("utf-8"), headers=headers or {})
+
+
+def result_to_dict(result: FetchResult) -> dict[str, Any]:
+    return {
+        "symbol": result.symbol,
+        "quote": quote_to_dict(result.data) if result.data else None,
+        "error": result.error,
+        "skipped": result.skipped,
+    }
+
+
+async def _read_line(reader: asyncio.StreamReader, status: int, message: str) -> bytes:
+    try:
+        return await reader.readline()
+    except ValueError as exc:
+        # StreamReader's line limit was hit; the rest of the stream is unusable.
+        raise HTTPError(status, message) from exc
+
+
+async def _read_request(reader: asyncio.StreamReader) -> Optional[Request]:
+    try:
+        request_line = await _read_line(reader, 400, "Request line too long")
+    except (ConnectionError, asyncio.IncompleteReadError):
+        return None
+    if not request_line:
+        return None
+    try:
+        method, target, version = request_line.decode("latin-1").split()
+    except ValueError as exc:
+        raise HTTPError(400, "Malformed request line") from exc
+
+    headers: dict[str, str] = {}
+    while True:
+        line = await _read_line(reader, 431, "Request header too long")
+        if line in (b"\r\n", b"\n", b""):
+            break
+        if len(headers) >= MAX_HEADERS:
+            raise HTTPError(431, "Too many request headers")
+        name, _, value = line.decode("latin-1").partition(":")
+        headers[name.strip().lower()] = value.strip()
+
+    try:
+        length = int(headers.get("content-length", "0") or 0)
+    except ValueError as exc:
+        raise HTTPError(400, "Invalid Content-Length") from exc
+    if length < 0:
+        raise HTTPError(400, "Invalid Content-Length")
+    if length > MAX_BODY_BYTES:
+        raise HTTPError(413, "Request body too large")
+    body = await reader.readexactly(length) if length else b""
+
+    connection = headers.get("connection", "").lower()
+    keep_alive = connection != "close" if version == "HTTP/1.1" else connection == "keep-alive"
+    url = urlsplit(target)
+    return Request(method.upper(), url.path, parse_qs(url.query), headers, body, keep_alive)
+
+
+def _head(status: int, content_type: str, headers: dict[str, str], length: Optional[int], keep_alive: bool) -> bytes:
+    lines = [f"HTTP/1.1 {status} {HTTPStatus(status).phrase}", f"Content-Type: {content_type}"]
+    if length is not None:
+        lines.append(f"Content-Length: {length}")
+    lines.append("Connection: keep-alive" if keep_alive else "Connection: close")
+    lines.extend(f"{name}: {value}" for name, value in headers.items())
+    return ("\r\n".join(lines) + "\r\n\r\n").encode("latin-1")
+
+
+class AssistantServer:
+    def __init__(
+        self,
+        config: Optional[Config] = None,
+        max_outbound: int = 16,
+        max_pending: int = 64,
+        fetch_timeout: Optional[float] = None,
+    ) -> None:
+        self.config = config
+        self.max_pending = max_pending
+        self.fetch_timeout = fetch_timeout
+        self._executor = ThreadPoolExecutor(max_workers=max_outbound, thread_name_prefix="outbound")
+        self._outbound = asyncio.Semaphore(max_outbound)
+        self._pending = 0
+        self._routes: dict[tuple[str, str], Callable] = {
+            ("GET", "/quote"): self._quote,
+            ("GET", "/quotes"): self._quotes,
+            ("POST", "/quotes"): self._quotes,
+            ("POST", "/ask"): self._ask,
+            ("GET", "/metrics"): self._metrics,
+            ("GET", "/healthz"): self._health,
+        }
+        REGISTRY.register_collector("server", lambda: {"pending_outbound": self._pending})
+
+    async def _offload(self, func: Callable, *args: Any) -> Any:
+        """Run a blocking call on the outbound pool, shedding load once the queue is full."""
+        if self._pending >= self.max_pending:
+            REGISTRY.inc("server_rejected_total")
+            raise HTTPError(503, "Server is busy, retry shortly", {"Retry-After": "1"})
+        self._pending += 1
+        try:
+            async with self._outbound:
+                loop = asyncio.get_running_loop()
+                return await loop.run_in_executor(self._executor, functools.partial(func, *args))
+        finally:
+            self._pending -= 1
+
+    async def handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            while True:
+                try:
+                    request = await _read_request(reader)
+                except HTTPError as exc:
+                    writer.write(self._encode(_json_response({"error": exc.message}, exc.status), False))
+                    await writer.drain()
+                    break
+                if request is None:
+                    break
+                keep_alive = await self._dispatch(request, writer)
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except ConnectionError:
+                pass
+
+    def _encode(self, response: Response, keep_alive: bool) -> bytes:
+        head = _head(response.status, response.content_type, response.headers, len(response.body), keep_alive)
+        return head + response.body
+
+    async def _dispatch(self, request: Request, writer: asyncio.StreamWriter) -> bool:
+        handler = self._routes.get((request.method, request.path))
+        # Label metrics with the route, not the raw path, so clients cannot mint new series.
+        route = request.path if handler is not None else "unmatched"
+        with span("http_request", route=route) as attrs:
+            try:
+                if handler is None:
+                    raise HTTPError(404, f"No route for {request.method} {request.path}")
+                response = await handler(request, writer)
+            except HTTPError as exc:
+                response = _json_response({"error": exc.message}, exc.status, exc.headers)
+            except Exception as exc:
+                response = _json_response({"error": f"Internal error ({type(exc).__name__})"}, 500)
+            # Streaming handlers write their own 200 response and close the connection.
+            status = 200 if response is None else response.status
+            attrs["status"] = status
+        REGISTRY.inc("http_requests_total", route=route, status=status)
+        if response is None:
+            return False
+        writer.write(self._encode(response, request.keep_alive))
+        await writer.drain()
+        return request.keep_alive
+
+    async def _health(self, request: Request, writer: asyncio.StreamWriter) -> Response:
+        return _json_response({"status": "ok", "pending_outbound": self._pending})
+
+    async def _metrics(self, request: Request, writer: asyncio.StreamWriter) -> Response:
+        return Response(body=REGISTRY.render_prometheus().encode("utf-8"), content_type="text/plain; version=0.0.4")
+
+    async def _fetch(self, symbols: list[str]) -> list[FetchResult]:
+        return await self._offload(get_stock_data_many, symbols, 8, self.fetch_timeout)
+
+    async def _quote(self, request: Request, writer: asyncio.StreamWriter) -> Response:
+        symbol = (request.query.get("symbol") or [""])[0].strip()
+        if not symbol:
+            raise HTTPError(400, "Missing 'symbol' query parameter")
+        [result] = await self._fetch([symbol])
+        if not result.data:
+            raise HTTPError(404, result.error or f"No data for {result.symbol}")
+        return _json_response(quote_to_dict(result.data))
+
+    async def _quotes(self, request: Request, writer: asyncio.StreamWriter) -> Response:
+        if request.method == "POST":
+            symbols = request.json().get("symbols") or []
+            if not isinstance(symbols, list):
+                raise HTTPError(400, "'symbols' must be a list")
+        else:
+            raw = ",".join(request.query.get("symbols", []))
+            symbols = [symbol for symbol in raw.split(",") if symbol.strip()]
+        symbols = [str(symbol).strip() for symbol in symbols if str(symbol).strip()]
+        if not symbols:
+            raise HTTPError(400, "No symbols given")
+        if len(symbols) > MAX_BATCH_SYMBOLS:
+            raise HTTPError(400, f"At most {MAX_BATCH_SYMBOLS} symbols per request")
+        results = await self._fetch(symbols)
+        return _json_response({"results": [result_to_dict(result) for result in results]})
+
+    async def _ask(self, request: Request, writer: asyncio.StreamWriter) -> Optional[Response]:
+        payload = request.json()
+        question = str(payload.get("question", "")).strip()
+        if not question:
+            raise HTTPError(400, "Missing 'question'")
+        if self.config is None:
+            raise HTTPError(503, "Missing API key. Set GIT_ACCESS_TOKEN or OPENAI_API_KEY.")
+
+        symbols = extract_symbols(question)
+        screen = await self._offload(screen_question, question, symbols)
+        context = None
+        if screen is not None:
+            stock_items = screen.items
+            context = screen.describe()
+        elif not symbols:
+            raise HTTPError(422, "No stock symbol or company name found in the question")
+        else:
+            results = await self._fetch(symbols)
+            stock_items = [result.data for result in results if result.data]
+        if not stock_items:
+            raise HTTPError(404, "Couldn't fetch data for the detected symbols")
+
+        base = {
+            "question": question,
+            "symbols": [item.symbol for item in stock_items],
+            "quotes": [quote_to_dict(item) for item in stock_items],
+            "as_of": format_as_of(stock_items),
+        }
+        if context:
+            base["screen"] = context
+        if payload.get("stream"):
+            await self._stream_answer(writer, base, stock_items, question, context)
+            return None
+
+        try:
+            answer = await self._offload(
+                functools.partial(explain_with_ai, context=context), stock_items, question, self.config
+            )
+            if not answer:
+                raise ValueError("Empty AI response")
+            fallback = False
+        except HTTPError:
+            raise
+        except Exception:
+            answer = create_multi_summary(stock_items)
+            fallback = True
+        return _json_response({**base, "answer": answer, "fallback": fallback})
+
+    async def _stream_answer(
+        self,
+        writer: asyncio.StreamWriter,
+        base: dict[str, Any],
+        stock_items: list[StockData],
+        question: str,
+        context: Optional[str] = None,
+    ) -> None:
+        """Send the answer as server-sent events: `meta`, then `token`s, then `done`."""
+        loop = asyncio.get_running_loop()
+        queue: asyncio.Queue = asyncio.Queue()
+
+        def produce() -> None:
+            try:
+                for text in stream_explanation(stock_items, question, self.config, context=context):
+                    loop.call_soon_threadsafe(queue.put_nowait, ("token", text))
+                loop.call_soon_threadsafe(queue.put_nowait, ("done", None))
+            except Exception as exc:
+                loop.call_soon_threadsafe(queue.put_nowait, ("error", exc))
+
+        if self._pending >= self.max_pending:
+            raise HTTPError(503, "Server is busy, retry shortly", {"Retry-After": "1"})
+
+        def on_done(task: asyncio.Future) -> None:
+            if not task.cancelled() and task.exception() is not None:
+                queue.put_nowait(("error", task.exception()))
+
+        producer = asyncio.ensure_future(self._offload(produce))
+        producer.add_done_callback(on_done)
+        writer.write(_head(200, "text/event-stream", {"Cache-Control": "no-cache"}, None, False))
+        writer.write(f"event: meta\ndata: {json.dumps(base)}\n\n".encode("utf-8"))
+        await writer.drain()
+
+        streamed = False
+        while True:
+            kind, value = await queue.get()
+            if kind == "token":
+                streamed = True
+                writer.write(f"event: token\ndata: {json.dumps({'text': value})}\n\n".encode("utf-8"))
+                await writer.drain()
+                continue
+            if kind == "error" and not streamed:
+                summary = create_multi_summary(stock_items)
+                writer.write(f"event: fallback\ndata: {json.dumps({'answer': summary})}\n\n".encode("utf-8"))
+            writer.write(f"event: done\ndata: {json.dumps({'ok': kind == 'done'})}\n\n".encode("utf-8"))
+            await writer.drain()
+            break
+
+    def close(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+async def serve(host: str, port: int, server: AssistantServer) -> None:
+    listener = await asyncio.start_server(server.handle_connection, host, port)
+    addresses = ", ".join(str(sock.getsockname()) for sock in listener.sockets)
+    print(f"[*] Listening on {addresses}")
+    async with listener:
+        await listener.serve_forever()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Serve the stock assistant over HTTP.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--max-outbound", type=int, default=16, help="Concurrent data/model calls.")
+    parser.add_argument("--max-pending", type=int, default=64, help="Queued calls before returning 503.")
+    args = parser.parse_args()
+    log_if_configured()
+
+    try:
+        config: Optional[Config] = load_config()
+    except ValueError as exc:
+        print(f"[!] {exc} /ask is disabled; quote endpoints still work.")
+        config = None
+
+    server = AssistantServer(config, max_outbound=args.max_outbound, max_pending=args.max_pending)
+    if start_cache_warmer() is not None:
+        print("[*] Cache warmer running")
+    try:
+        asyncio.run(serve(args.host, args.port, server))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.close()
+
+
+if __name__ == "__main__":
+    main()
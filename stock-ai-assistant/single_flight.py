@@ -0,0 +1,97 @@
+import threading
+from typing import Any, Callable, Hashable, Iterable
+
+
+class _Call:
+    __slots__ = ("event", "result", "error")
+
+    def __init__(self) -> None:
+        self.event = threading.Event()
+        self.result: Any = None
+        self.error: BaseException | None = None
+
+
+class SingleFlight:
+    """Collapse concurrent calls for the same key into one execution.
+
+    The first caller for a key runs the function; callers that arrive while it
+    is in flight block and receive the same result (or exception). Safe to share
+    across threads, e.g. Streamlit's per-session script threads.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._calls: dict[Hashable, _Call] = {}
+        self.executed = 0
+        self.coalesced = 0
+
+    def do(self, key: Hashable, func: Callable[[], Any]) -> Any:
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+                self.executed += 1
+            else:
+                self.coalesced += 1
+
+        if not leader:
+            call.event.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = func()
+            return call.result
+        except BaseException as exc:
+            call.error = exc
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.event.set()
+
+    def do_many(self, keys: Iterable[Hashable], func: Callable[[list], dict]) -> dict:
+        """Batch variant: `func` receives the keys nobody else is fetching and returns a dict.
+
+        Keys already in flight elsewhere are awaited instead. The returned dict only
+        contains keys that produced a non-None result; failures are left to the caller.
+        """
+        owned: list[tuple[Hashable, _Call]] = []
+        waiting: list[tuple[Hashable, _Call]] = []
+        with self._lock:
+            for key in dict.fromkeys(keys):
+                call = self._calls.get(key)
+                if call is None:
+                    call = self._calls[key] = _Call()
+                    owned.append((key, call))
+                    self.executed += 1
+                else:
+                    waiting.append((key, call))
+                    self.coalesced += 1
+
+        produced: dict = {}
+        try:
+            if owned:
+                produced = func([key for key, _ in owned]) or {}
+        except Exception:
+            produced = {}
+        finally:
+            with self._lock:
+                for key, call in owned:
+                    call.result = produced.get(key)
+                    del self._calls[key]
+            for _, call in owned:
+                call.event.set()
+
+        results = {key: value for key, value in produced.items() if value is not None}
+        for key, call in waiting:
+            call.event.wait()
+            if call.error is None and call.result is not None:
+                results[key] = call.result
+        return results
+
+    def stats(self) -> dict[str, int]:
+        with self._lock:
+            return {"executed": self.executed, "coalesced": self.coalesced, "in_flight": len(self._calls)}
@@ -4,17 +4,39 @@ Stock Data AI Assistant
 An AI assistant that helps you understand stock market data.
 Uses real stock information and explains it in simple terms.
 
+Batch mode answers a file of questions (one per line, or "-" for stdin)
+concurrently and writes one JSON object per question:
+
+    python stock_assistant.py --batch questions.txt --concurrency 8 > answers.jsonl
+
+Watch mode follows a list of symbols and prints a line whenever a quote
+changes, without calling the AI model:
+
+    python stock_assistant.py --watch "AAPL, MSFT, Reliance"
+
 DISCLAIMER: This is for educational purposes only. Not financial advice.
 """
 
-from datetime import datetime, timezone
-from dotenv import load_dotenv
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import IO, Optional
 
-from ai_service import explain_with_ai
-from config import load_config
-from data_service import get_stock_data
-from formatting import create_multi_summary
+from ai_service import explain_with_ai, stream_explanation
+from cache_warmer import start_cache_warmer
+from config import Config, load_config
+from data_service import TIMED_OUT_MESSAGE, get_stock_data_many
+from deadline import Deadline
+from formatting import create_multi_summary, format_as_of, quote_to_dict
+from metrics import export_if_configured, log_if_configured, trace
+from models import FetchResult
 from parsing import extract_symbols
+from screener import screen_question
+from watchlist import Watchlist, format_delta
 
 
 def _choose_symbols(symbols: list[str]) -> list[str]:
@@ -34,8 +56,204 @@ def _choose_symbols(symbols: list[str]) -> list[str]:
     return selected or symbols
 
 
-def main() -> None:
-    load_dotenv()
+def _answer_question(question: str, config: Config) -> None:
+    symbols = extract_symbols(question)
+    deadline = Deadline(config.request_timeout_seconds)
+    screen = screen_question(question, symbols, timeout=deadline.remaining(reserve=config.min_answer_seconds))
+    context = None
+    if screen is not None:
+        stock_items = screen.items
+        context = screen.describe()
+        print(f"\n[*] {context}")
+        if screen.timed_out:
+            deadline.cut(f"{screen.timed_out} of {screen.universe} screened companies")
+    elif not symbols:
+        print("\n[?] I couldn't find a stock symbol in your question.")
+        print("Please include a ticker symbol (e.g., AAPL, TSLA, MSFT).")
+        return
+    else:
+        selected_symbols = _choose_symbols(symbols)
+
+        print(f"\n[*] Fetching data for: {', '.join(selected_symbols)}")
+        # The budget starts once the symbols are chosen, not while waiting for input.
+        deadline = Deadline(config.request_timeout_seconds)
+        stock_items = []
+        results = get_stock_data_many(selected_symbols, timeout=deadline.remaining(reserve=config.min_answer_seconds))
+        for result in results:
+            if result.skipped:
+                print(f"[x] Skipped {result.symbol}: no data was found for it recently.")
+                continue
+            if result.error == TIMED_OUT_MESSAGE:
+                print(f"[x] Dropped {result.symbol}: its data did not arrive in time.")
+                deadline.cut(f"data for {result.symbol}")
+                continue
+            if not result.data:
+                print(f"[x] Couldn't find data for {result.symbol}.")
+                continue
+            stock_items.append(result.data)
+
+    if not stock_items:
+        if deadline.cuts:
+            print("The stock data didn't arrive in time. Please try again in a moment.")
+            return
+        print("Make sure you're using valid stock ticker symbols.")
+        return
+
+    print("\n[*] Analyzing...")
+    print("\n" + "=" * 60)
+    print("ANSWER:")
+    print("=" * 60)
+    explanation = ""
+    if not deadline.allows(config.min_answer_seconds):
+        deadline.cut("AI explanation")
+        print("[x] Out of time for an AI explanation; showing raw stock summary instead.")
+    else:
+        try:
+            for chunk in stream_explanation(stock_items, question, config, context=context, deadline=deadline):
+                print(chunk, end="", flush=True)
+                explanation += chunk
+            print()
+        except Exception as exc:
+            if deadline.expired:
+                deadline.cut("AI explanation")
+            print("\n[x] There was a problem getting an AI explanation.")
+            print("This might be a network issue, rate limit, or API key problem.")
+            print(f"Technical details: {exc}")
+            print("\nShowing raw stock summary instead.")
+            explanation = ""
+    if not explanation:
+        print(create_multi_summary(stock_items))
+    print("\n" + "=" * 60)
+    if deadline.cuts:
+        print(f"\n[!] {deadline.describe_cuts()}")
+    print(f"\nData as of: {format_as_of(stock_items)}")
+    print("[!] For educational purposes only")
+
+
+def _read_questions(source: str) -> list[str]:
+    handle = sys.stdin if source == "-" else open(source, encoding="utf-8")
+    try:
+        lines = [line.strip() for line in handle]
+    finally:
+        if handle is not sys.stdin:
+            handle.close()
+    return [line for line in lines if line and not line.startswith("#")]
+
+
+def _answer_batch_question(
+    index: int,
+    question: str,
+    symbols: list[str],
+    quotes: dict[str, FetchResult],
+    config: Config,
+) -> dict:
+    record: dict = {"index": index, "question": question, "symbols": symbols, "errors": []}
+    started = time.perf_counter()
+    with trace() as question_trace:
+        screen = screen_question(question, symbols)
+        context = None
+        if screen is not None:
+            stock_items = screen.items
+            context = record["screen"] = screen.describe()
+        else:
+            stock_items = []
+            for symbol in symbols:
+                result = quotes.get(symbol)
+                if result and result.data:
+                    stock_items.append(result.data)
+                else:
+                    record["errors"].append(f"{symbol}: {result.error if result else 'not fetched'}")
+        record["quotes"] = [quote_to_dict(item) for item in stock_items]
+
+        answer = None
+        fallback = False
+        if screen is None and not symbols:
+            record["errors"].append("No stock symbol found in the question")
+        elif stock_items:
+            try:
+                answer = explain_with_ai(stock_items, question, config, context=context)
+                if not answer:
+                    raise ValueError("Empty AI response")
+            except Exception as exc:
+                record["errors"].append(f"AI explanation failed: {type(exc).__name__}: {exc}")
+                answer = create_multi_summary(stock_items)
+                fallback = True
+        record["answer"] = answer
+        record["fallback"] = fallback
+        record["as_of"] = format_as_of(stock_items) if stock_items else None
+    timings = {name: round(seconds * 1000, 1) for name, seconds in question_trace.stage_totals().items()}
+    timings["total"] = round((time.perf_counter() - started) * 1000, 1)
+    record["timings_ms"] = timings
+    return record
+
+
+def run_batch(source: str, config: Config, concurrency: int, output: IO[str]) -> None:
+    """Answer every question in `source` concurrently, streaming JSONL records to `output`.
+
+    Symbols are extracted for all questions first and fetched once as a single
+    batch, so questions that mention the same company share one quote. Ranking
+    questions ("top gainers today") are screened as in interactive mode; their
+    quotes come from the same cache, so overlapping screens fetch each company once.
+    """
+    started = time.perf_counter()
+    questions = _read_questions(source)
+    symbols_per_question = [extract_symbols(question) for question in questions]
+    unique_symbols = list(dict.fromkeys(symbol for symbols in symbols_per_question for symbol in symbols))
+
+    quotes = {result.symbol: result for result in get_stock_data_many(unique_symbols, max_workers=max(concurrency, 8))}
+    fetched_at = time.perf_counter()
+    print(
+        f"[*] Fetched {sum(1 for r in quotes.values() if r.data)}/{len(unique_symbols)} symbols "
+        f"for {len(questions)} questions in {fetched_at - started:.1f}s",
+        file=sys.stderr,
+    )
+
+    write_lock = threading.Lock()
+
+    def work(index: int) -> None:
+        record = _answer_batch_question(index, questions[index], symbols_per_question[index], quotes, config)
+        with write_lock:
+            output.write(json.dumps(record) + "\n")
+            output.flush()
+
+    with ThreadPoolExecutor(max_workers=max(1, concurrency), thread_name_prefix="batch") as executor:
+        list(executor.map(work, range(len(questions))))
+
+    elapsed = time.perf_counter() - started
+    rate = len(questions) / elapsed if elapsed else 0.0
+    print(f"[*] Answered {len(questions)} questions in {elapsed:.1f}s ({rate:.2f} questions/s)", file=sys.stderr)
+    export_if_configured()
+
+
+def run_watch(text: str) -> None:
+    symbols = extract_symbols(text)
+    if not symbols:
+        print("[x] No stock symbols found to watch.")
+        return
+
+    watchlist = Watchlist(symbols)
+    print(f"[*] Watching {', '.join(symbols)} (Ctrl+C to stop)")
+    try:
+        while True:
+            for delta in watchlist.poll():
+                print(format_delta(delta), flush=True)
+            time.sleep(max(1.0, watchlist.seconds_until_next()))
+    except KeyboardInterrupt:
+        print("\nStopped watching.")
+
+
+def main(argv: Optional[list[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Stock Data AI Assistant")
+    parser.add_argument("--batch", metavar="FILE", help="Answer questions from FILE ('-' for stdin) as JSONL.")
+    parser.add_argument("--concurrency", type=int, default=4, help="Questions answered in parallel in batch mode.")
+    parser.add_argument("--output", metavar="FILE", help="Write batch results to FILE instead of stdout.")
+    parser.add_argument("--watch", metavar="SYMBOLS", help="Follow these tickers or company names and print changes.")
+    args = parser.parse_args(argv)
+    log_if_configured()
+
+    if args.watch:
+        run_watch(args.watch)
+        return
 
     try:
         config = load_config()
@@ -44,6 +262,16 @@ def main() -> None:
         print("Add GIT_ACCESS_TOKEN or OPENAI_API_KEY to your .env file and try again.")
         return
 
+    if args.batch:
+        if args.output:
+            with open(args.output, "w", encoding="utf-8") as output:
+                run_batch(args.batch, config, args.concurrency, output)
+        else:
+            run_batch(args.batch, config, args.concurrency, sys.stdout)
+        return
+
+    start_cache_warmer()
+
     print("=" * 60)
     print("Stock Data AI Assistant")
     print("=" * 60)
@@ -67,48 +295,11 @@ def main() -> None:
         if not question:
             continue
 
-        symbols = extract_symbols(question)
-        if not symbols:
-            print("\n[?] I couldn't find a stock symbol in your question.")
-            print("Please include a ticker symbol (e.g., AAPL, TSLA, MSFT).")
-            continue
-
-        selected_symbols = _choose_symbols(symbols)
-
-        print(f"\n[*] Fetching data for: {', '.join(selected_symbols)}")
-        stock_items = []
-        for symbol in selected_symbols:
-            item = get_stock_data(symbol)
-            if not item:
-                print(f"[x] Couldn't find data for {symbol}.")
-                continue
-            stock_items.append(item)
-
-        if not stock_items:
-            print("Make sure you're using valid stock ticker symbols.")
-            continue
-
-        print("\n[*] Analyzing...")
-        explanation = None
-        try:
-            explanation = explain_with_ai(stock_items, question, config)
-        except Exception as exc:
-            print("\n[x] There was a problem getting an AI explanation.")
-            print("This might be a network issue, rate limit, or API key problem.")
-            print(f"Technical details: {exc}")
-            print("\nShowing raw stock summary instead.")
-
-        print("\n" + "=" * 60)
-        print("ANSWER:")
-        print("=" * 60)
-        if explanation:
-            print(explanation)
-        else:
-            print(create_multi_summary(stock_items))
-        print("\n" + "=" * 60)
-        now_utc = datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M:%S UTC")
-        print(f"\nData as of: {now_utc}")
-        print("[!] For educational purposes only")
+        with trace() as question_trace:
+            _answer_question(question, config)
+        if os.getenv("SHOW_STAGE_TIMINGS"):
+            print(f"[*] Timings: {question_trace.breakdown()}")
+        export_if_configured()
 
 
 if __name__ == "__main__":
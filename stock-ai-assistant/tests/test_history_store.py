@@ -0,0 +1,74 @@
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+
+from history_store import HistoryStore
+
+SESSIONS = pd.bdate_range("2026-01-01", "2026-03-31")
+CLOSES = np.linspace(100, 200, len(SESSIONS))
+
+
+class FakeYahoo:
+    """Daily bars as Yahoo serves them: the whole history is re-adjusted once a split happens."""
+
+    def __init__(self, split_columns: bool = True) -> None:
+        self.adjustment = 1.0
+        self.splits = np.zeros(len(SESSIONS))
+        self.split_columns = split_columns
+        self.starts: list = []
+
+    def split(self, day: str, ratio: float) -> None:
+        self.adjustment /= ratio
+        self.splits[SESSIONS.get_loc(pd.Timestamp(day))] = ratio
+
+    def load(self, symbol, start, end, initial_period):
+        self.starts.append(start)
+        closes = CLOSES * self.adjustment
+        frame = pd.DataFrame(
+            {"Open": closes, "High": closes, "Low": closes, "Close": closes, "Volume": 1000}, index=SESSIONS
+        )
+        if self.split_columns:
+            frame["Stock Splits"] = self.splits
+        low = pd.Timestamp(start) if start else SESSIONS[0]
+        return frame[(frame.index >= low) & (frame.index < pd.Timestamp(end))]
+
+
+def _at(day: str) -> float:
+    return datetime.fromisoformat(f"{day}T23:00:00+00:00").astimezone(timezone.utc).timestamp()
+
+
+def _store(tmp_path, yahoo: FakeYahoo, now: list) -> HistoryStore:
+    return HistoryStore(root=str(tmp_path), loader=yahoo.load, clock=lambda: now[0], min_sync_interval=0)
+
+
+def test_sync_appends_only_new_sessions(tmp_path):
+    yahoo = FakeYahoo()
+    now = [_at("2026-02-16")]
+    store = _store(tmp_path, yahoo, now)
+    first = store.sync("AAPL")
+
+    now[0] = _at("2026-02-20")
+    assert store.sync("AAPL") == 4
+    assert store.rows("AAPL") == first + 4
+    # The incremental download starts at the last stored bar, to check it is unchanged.
+    assert yahoo.starts[-1].isoformat() == "2026-02-16"
+
+
+def test_split_resyncs_full_history(tmp_path):
+    for split_columns in (True, False):
+        yahoo = FakeYahoo(split_columns=split_columns)
+        now = [_at("2026-02-16")]
+        store = _store(tmp_path / str(split_columns), yahoo, now)
+        store.sync("AAPL")
+        held = store.query("AAPL").close
+
+        yahoo.split("2026-03-02", 2)
+        now[0] = _at("2026-03-10")
+        store.sync("AAPL")
+
+        closes = store.query("AAPL").close
+        assert yahoo.starts[-1] is None
+        np.testing.assert_allclose(closes, CLOSES[: len(closes)] / 2)
+        # Views taken before the resync still read the old files.
+        assert held[-1] == CLOSES[len(held) - 1]
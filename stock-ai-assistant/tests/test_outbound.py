@@ -0,0 +1,217 @@
+import pytest
+
+from deadline import Deadline, DeadlineExceeded
+from outbound import TokenBucket, Upstream, is_retryable, is_throttled, retry_after
+
+
+class FakeClock:
+    """Monotonic time that only moves when something sleeps."""
+
+    def __init__(self) -> None:
+        self.now = 1000.0
+        self.sleeps: list[float] = []
+
+    def __call__(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float) -> None:
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+class _Response:
+    def __init__(self, status_code: int, headers: dict[str, str]) -> None:
+        self.status_code = status_code
+        self.headers = headers
+
+
+class APIError(Exception):
+    def __init__(self, status_code: int, headers: dict[str, str] | None = None) -> None:
+        super().__init__(f"HTTP {status_code}")
+        self.response = _Response(status_code, headers or {})
+
+
+def _upstream(clock: FakeClock, rate: float = 10.0, burst: float = 2.0, **kwargs) -> Upstream:
+    return Upstream("test", rate=rate, burst=burst, clock=clock, sleep=clock.sleep, **kwargs)
+
+
+def _flaky(*errors: Exception, result="ok"):
+    """A call that raises each of `errors` in turn, then returns `result`."""
+    pending = list(errors)
+    calls: list[int] = []
+
+    def call():
+        calls.append(len(calls))
+        if pending:
+            raise pending.pop(0)
+        return result
+
+    call.calls = calls
+    return call
+
+
+def test_bucket_serves_burst_then_paces_at_rate():
+    clock = FakeClock()
+    bucket = TokenBucket(rate=10, burst=2, clock=clock)
+
+    assert [bucket.reserve() for _ in range(2)] == [0.0, 0.0]
+    assert bucket.reserve() == pytest.approx(0.1)
+    assert bucket.reserve() == pytest.approx(0.2)
+
+    clock.now += 1.0
+    assert bucket.reserve() == 0.0
+
+
+def test_bucket_charges_cost_tokens():
+    clock = FakeClock()
+    bucket = TokenBucket(rate=10, burst=5, clock=clock)
+
+    assert bucket.reserve(cost=5) == 0.0
+    assert bucket.reserve(cost=20) == pytest.approx(2.0)
+
+
+def test_call_paces_by_cost():
+    clock = FakeClock()
+    upstream = _upstream(clock, rate=10, burst=10)
+
+    upstream.call(lambda: None, cost=10)
+    upstream.call(lambda: None, cost=30)
+    assert sum(clock.sleeps) == pytest.approx(3.0)
+
+
+def test_bucket_throttle_pauses_and_halves_rate_down_to_floor():
+    clock = FakeClock()
+    bucket = TokenBucket(rate=8, burst=4, min_rate=2, clock=clock)
+
+    bucket.throttled(pause=3.0)
+    assert bucket.rate == 4
+    assert bucket.paused_for() == pytest.approx(3.0)
+    # No tokens accrue while paused, so the next caller waits out the pause and then a refill.
+    assert bucket.reserve() == pytest.approx(3.0 + 1 / 4)
+
+    bucket.throttled(pause=0.0)
+    bucket.throttled(pause=0.0)
+    assert bucket.rate == 2
+
+
+def test_bucket_recovers_rate_on_success():
+    clock = FakeClock()
+    bucket = TokenBucket(rate=10, burst=1, recovery=0.25, clock=clock)
+    bucket.throttled(pause=0.0)
+    assert bucket.rate == 5
+
+    bucket.succeeded()
+    assert bucket.rate == pytest.approx(7.5)
+    for _ in range(5):
+        bucket.succeeded()
+    assert bucket.rate == 10
+
+
+def test_classifies_errors():
+    assert is_throttled(APIError(429))
+    assert is_retryable(APIError(503))
+    assert not is_retryable(APIError(400))
+    assert is_retryable(ConnectionResetError())
+    assert not is_retryable(ValueError("bad symbol"))
+
+    class YFRateLimitError(Exception):
+        pass
+
+    assert is_throttled(YFRateLimitError())
+
+
+def test_retry_after_reads_headers():
+    assert retry_after(APIError(429, {"retry-after": "2"})) == 2.0
+    assert retry_after(APIError(429, {"retry-after-ms": "250", "retry-after": "9"})) == 0.25
+    assert retry_after(APIError(429, {"retry-after": "Wed, 21 Oct 2015 07:28:05 GMT"}), now=lambda: 1445412480.0) == 5.0
+    assert retry_after(APIError(429, {"retry-after": "3600"})) == 60.0
+    assert retry_after(APIError(429, {"retry-after": "soon"})) is None
+    assert retry_after(APIError(429)) is None
+
+
+def test_throttle_pauses_the_upstream_then_recovers():
+    clock = FakeClock()
+    upstream = _upstream(clock, rate=10, burst=1)
+    call = _flaky(APIError(429, {"retry-after": "2"}))
+
+    assert upstream.call(call) == "ok"
+    assert len(call.calls) == 2
+    # The retry waited out the Retry-After pause before its token.
+    assert sum(clock.sleeps) >= 2.0
+    stats = upstream.stats()
+    assert (stats["throttled"], stats["retries"], stats["failures"]) == (1, 1, 0)
+    # Halved by the 429, then nudged back up by the success.
+    assert 5 < upstream.bucket.rate < 10
+
+    for _ in range(40):
+        upstream.call(lambda: None)
+    assert upstream.bucket.rate == 10
+
+
+def test_transient_errors_back_off_and_give_up_after_max_attempts():
+    clock = FakeClock()
+    upstream = _upstream(clock, burst=5, max_attempts=3, base_delay=0.5)
+    call = _flaky(*(APIError(503) for _ in range(3)))
+
+    with pytest.raises(APIError):
+        upstream.call(call)
+    assert len(call.calls) == 3
+    assert len(clock.sleeps) == 2
+    assert all(0 <= delay <= 0.5 * 2**attempt for attempt, delay in enumerate(clock.sleeps))
+    assert upstream.stats()["failures"] == 1
+
+
+def test_non_retryable_errors_propagate_at_once():
+    clock = FakeClock()
+    upstream = _upstream(clock)
+    call = _flaky(ValueError("bad request"))
+
+    with pytest.raises(ValueError):
+        upstream.call(call)
+    assert len(call.calls) == 1
+    assert clock.sleeps == []
+
+
+def test_call_before_refuses_an_expired_deadline():
+    clock = FakeClock()
+    upstream = _upstream(clock)
+    deadline = Deadline(1.0, clock=clock)
+    clock.now += 2.0
+
+    with pytest.raises(DeadlineExceeded):
+        upstream.call_before(deadline, lambda: pytest.fail("must not call past the deadline"))
+
+
+def test_call_before_refuses_to_queue_past_the_deadline():
+    clock = FakeClock()
+    upstream = _upstream(clock, rate=1, burst=1)
+    upstream.call(lambda: None)
+    deadline = Deadline(0.5, clock=clock)
+
+    # The next token is a second away, beyond the deadline.
+    with pytest.raises(DeadlineExceeded):
+        upstream.call_before(deadline, lambda: pytest.fail("must not call past the deadline"))
+    assert clock.sleeps == []
+
+
+def test_call_before_refuses_a_throttle_pause_past_the_deadline():
+    clock = FakeClock()
+    upstream = _upstream(clock, rate=10, burst=5)
+    deadline = Deadline(5.0, clock=clock)
+    call = _flaky(APIError(429, {"retry-after": "30"}))
+
+    with pytest.raises(DeadlineExceeded):
+        upstream.call_before(deadline, call)
+    assert len(call.calls) == 1
+    assert clock.now < deadline.expires_at
+
+
+def test_call_before_does_not_sleep_past_the_deadline_for_a_retry():
+    clock = FakeClock()
+    upstream = _upstream(clock, base_delay=10.0)
+    deadline = Deadline(0.001, clock=clock)
+    call = _flaky(APIError(503), APIError(503))
+
+    with pytest.raises((APIError, DeadlineExceeded)):
+        upstream.call_before(deadline, call)
+    assert clock.now <= deadline.expires_at
@@ -0,0 +1,178 @@
+import threading
+import time
+
+import pytest
+
+from single_flight import SingleFlight
+
+
+def _wait_for(condition, timeout: float = 5.0) -> None:
+    stop = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > stop:
+            raise AssertionError("condition not reached")
+        time.sleep(0.001)
+
+
+def _start(target, *args) -> tuple[threading.Thread, dict]:
+    """Run `target(*args)` on a thread; the returned dict gets its "result" or "error"."""
+    outcome: dict = {}
+
+    def run() -> None:
+        try:
+            outcome["result"] = target(*args)
+        except BaseException as exc:
+            outcome["error"] = exc
+
+    thread = threading.Thread(target=run)
+    thread.start()
+    return thread, outcome
+
+
+def _blocking(release: threading.Event, value, calls: list):
+    def func():
+        calls.append(value)
+        assert release.wait(5)
+        return value
+
+    return func
+
+
+def test_do_runs_once_for_concurrent_callers():
+    flight = SingleFlight()
+    release = threading.Event()
+    calls: list = []
+    started = [_start(flight.do, "AAPL", _blocking(release, 42, calls)) for _ in range(8)]
+    _wait_for(lambda: flight.stats()["coalesced"] == 7)
+
+    release.set()
+    for thread, _ in started:
+        thread.join()
+
+    assert calls == [42]
+    assert [outcome["result"] for _, outcome in started] == [42] * 8
+    assert flight.stats() == {"executed": 1, "coalesced": 7, "in_flight": 0}
+
+
+def test_do_runs_different_keys_separately():
+    flight = SingleFlight()
+
+    assert flight.do("AAPL", lambda: 1) == 1
+    assert flight.do("MSFT", lambda: 2) == 2
+    assert flight.stats()["executed"] == 2
+
+
+def test_do_runs_again_once_the_flight_lands():
+    flight = SingleFlight()
+    calls: list = []
+
+    for value in (1, 2):
+        assert flight.do("AAPL", lambda value=value: calls.append(value) or value) == value
+    assert calls == [1, 2]
+
+
+def test_do_error_reaches_every_waiter():
+    flight = SingleFlight()
+    release = threading.Event()
+
+    def fail():
+        assert release.wait(5)
+        raise LookupError("no data")
+
+    leader = _start(flight.do, "AAPL", fail)
+    _wait_for(lambda: flight.stats()["in_flight"] == 1)
+    waiters = [_start(flight.do, "AAPL", lambda: pytest.fail("joined call must not run")) for _ in range(3)]
+    _wait_for(lambda: flight.stats()["coalesced"] == 3)
+
+    release.set()
+    for thread, _ in [leader, *waiters]:
+        thread.join()
+
+    errors = [outcome["error"] for _, outcome in [leader, *waiters]]
+    assert all(isinstance(error, LookupError) for error in errors)
+    assert len({id(error) for error in errors}) == 1
+    # A failed flight is not remembered; the next call runs again.
+    assert flight.do("AAPL", lambda: "ok") == "ok"
+
+
+def test_do_many_passes_only_unowned_keys_and_deduplicates():
+    flight = SingleFlight()
+    seen: list = []
+
+    def fetch(keys):
+        seen.append(keys)
+        return {key: key.lower() for key in keys}
+
+    assert flight.do_many(["AAPL", "MSFT", "AAPL"], fetch) == {"AAPL": "aapl", "MSFT": "msft"}
+    assert seen == [["AAPL", "MSFT"]]
+
+
+def test_do_many_leaves_out_missing_and_failed_keys():
+    flight = SingleFlight()
+
+    assert flight.do_many(["AAPL", "NOPE"], lambda keys: {"AAPL": 1, "NOPE": None}) == {"AAPL": 1}
+
+    def fail(keys):
+        raise ConnectionError("down")
+
+    assert flight.do_many(["AAPL"], fail) == {}
+    assert flight.stats()["in_flight"] == 0
+
+
+def test_do_many_awaits_keys_already_in_flight_with_do():
+    flight = SingleFlight()
+    release = threading.Event()
+    calls: list = []
+    single = _start(flight.do, "AAPL", _blocking(release, "single", calls))
+    _wait_for(lambda: flight.stats()["in_flight"] == 1)
+
+    batches: list = []
+    batch = _start(flight.do_many, ["AAPL", "MSFT"], lambda keys: batches.append(keys) or {key: "bulk" for key in keys})
+    _wait_for(lambda: batches)
+    assert batches == [["MSFT"]]
+
+    release.set()
+    for thread, _ in (single, batch):
+        thread.join()
+    assert batch[1]["result"] == {"AAPL": "single", "MSFT": "bulk"}
+    assert calls == ["single"]
+
+
+def test_do_many_skips_a_key_whose_do_failed():
+    flight = SingleFlight()
+    release = threading.Event()
+
+    def fail():
+        assert release.wait(5)
+        raise LookupError("no data")
+
+    single = _start(flight.do, "AAPL", fail)
+    _wait_for(lambda: flight.stats()["in_flight"] == 1)
+    batch = _start(flight.do_many, ["AAPL"], lambda keys: pytest.fail("AAPL is already in flight"))
+    _wait_for(lambda: flight.stats()["coalesced"] == 1)
+
+    release.set()
+    for thread, _ in (single, batch):
+        thread.join()
+    assert isinstance(single[1]["error"], LookupError)
+    assert batch[1]["result"] == {}
+
+
+def test_do_joining_a_batch_gets_its_result_or_none():
+    flight = SingleFlight()
+    release = threading.Event()
+
+    def fetch(keys):
+        assert release.wait(5)
+        return {"AAPL": "bulk"}
+
+    batch = _start(flight.do_many, ["AAPL", "MSFT"], fetch)
+    _wait_for(lambda: flight.stats()["in_flight"] == 2)
+    joined = [_start(flight.do, key, lambda: pytest.fail("key is in the batch")) for key in ("AAPL", "MSFT")]
+    _wait_for(lambda: flight.stats()["coalesced"] == 2)
+
+    release.set()
+    for thread, _ in [batch, *joined]:
+        thread.join()
+    # The batch did not return MSFT, so its waiter sees None and must fetch it alone.
+    assert [outcome["result"] for _, outcome in joined] == ["bulk", None]
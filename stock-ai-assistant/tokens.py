@@ -0,0 +1,19 @@
+import re
+
+_PIECE_RE = re.compile(r"\w+|[^\w\s]", re.UNICODE)
+
+
+def estimate_tokens(text: str) -> int:
+    """Cheap local approximation of the model's token count.
+
+    Counts words and punctuation, charging long words roughly one token per four
+    characters, which lands within a few percent of BPE tokenizers on English prose.
+    """
+    if not text:
+        return 0
+    return sum(max(1, (len(piece) + 3) // 4) for piece in _PIECE_RE.findall(text))
+
+
+def estimate_message_tokens(messages: list[dict[str, str]]) -> int:
+    # Chat formatting adds a few tokens per message on top of the content.
+    return sum(estimate_tokens(message.get("content", "")) + 4 for message in messages)
@@ -0,0 +1,191 @@
+"""Follow a set of symbols over time, reporting only the fields that changed.
+
+Each symbol has its own next-poll time. Symbols that have been moving are polled
+sooner, quiet ones and closed markets less often, and polls go through
+`get_stock_data_many`, so a quote that is still fresh in the cache costs no
+network call.
+"""
+
+import threading
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Callable, Optional
+
+from data_service import get_stock_data_many
+from markets import currency_sign_for_symbol, is_symbol_market_open
+from models import FetchResult, StockData
+from quote_cache import normalize_symbol
+
+WATCH_FIELDS = (
+    "current_price",
+    "change",
+    "change_percent",
+    "day_high",
+    "day_low",
+    "volume",
+    "market_cap",
+)
+
+
+@dataclass(frozen=True)
+class QuoteDelta:
+    symbol: str
+    data: Optional[StockData]
+    changes: dict[str, tuple[Any, Any]] = field(default_factory=dict)
+    error: Optional[str] = None
+
+    @property
+    def first(self) -> bool:
+        return bool(self.changes) and all(old is None for old, _ in self.changes.values())
+
+
+def diff_quotes(previous: Optional[StockData], current: StockData) -> dict[str, tuple[Any, Any]]:
+    """Map each watched field that differs to `(old, new)`; `old` is None on the first quote."""
+    changes = {}
+    for name in WATCH_FIELDS:
+        new = getattr(current, name)
+        old = getattr(previous, name) if previous is not None else None
+        if old != new:
+            changes[name] = (old, new)
+    return changes
+
+
+@dataclass
+class _Watched:
+    data: Optional[StockData] = None
+    error: Optional[str] = None
+    next_due: float = 0.0
+    # Smoothed absolute % price move between consecutive polls.
+    volatility: Optional[float] = None
+
+
+class Watchlist:
+    """Adaptive poller for a fixed set of symbols.
+
+    A symbol whose price moved about `reference_move` percent between polls is
+    polled every `base_interval` seconds; faster movers proportionally sooner,
+    down to `min_interval`, and quiet ones up to `max_interval`. Symbols whose
+    market is closed are polled every `closed_interval`.
+    """
+
+    def __init__(
+        self,
+        symbols: list[str],
+        base_interval: float = 60.0,
+        min_interval: float = 10.0,
+        max_interval: float = 300.0,
+        closed_interval: float = 900.0,
+        reference_move: float = 0.1,
+        fetch: Callable[[list[str]], list[FetchResult]] = get_stock_data_many,
+        is_open: Callable[[str], bool] = is_symbol_market_open,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.base_interval = base_interval
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.closed_interval = closed_interval
+        self.reference_move = reference_move
+        self._fetch = fetch
+        self._is_open = is_open
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._watched: dict[str, _Watched] = {}
+        self.set_symbols(symbols)
+
+    @property
+    def symbols(self) -> list[str]:
+        with self._lock:
+            return list(self._watched)
+
+    def set_symbols(self, symbols: list[str]) -> None:
+        """Replace the watched set, keeping state for symbols that stay on it."""
+        keys = list(dict.fromkeys(normalize_symbol(symbol) for symbol in symbols if symbol.strip()))
+        with self._lock:
+            self._watched = {key: self._watched.get(key) or _Watched() for key in keys}
+
+    def interval_for(self, symbol: str) -> float:
+        with self._lock:
+            watched = self._watched.get(normalize_symbol(symbol))
+            volatility = watched.volatility if watched is not None else None
+        return self._interval(symbol, volatility)
+
+    def _interval(self, symbol: str, volatility: Optional[float]) -> float:
+        if not self._is_open(symbol):
+            return self.closed_interval
+        if volatility is None:
+            return self.base_interval
+        ratio = max(volatility / self.reference_move, 1e-6)
+        return min(self.max_interval, max(self.min_interval, self.base_interval / ratio))
+
+    def due(self) -> list[str]:
+        now = self._clock()
+        with self._lock:
+            return [key for key, watched in self._watched.items() if watched.next_due <= now]
+
+    def seconds_until_next(self) -> float:
+        now = self._clock()
+        with self._lock:
+            if not self._watched:
+                return self.base_interval
+            return max(0.0, min(watched.next_due for watched in self._watched.values()) - now)
+
+    def snapshot(self) -> list[tuple[str, Optional[StockData], Optional[str]]]:
+        """Latest known quote (or error) per symbol, in watch order."""
+        with self._lock:
+            return [(key, watched.data, watched.error) for key, watched in self._watched.items()]
+
+    def poll(self) -> list[QuoteDelta]:
+        """Fetch the symbols that are due and return a delta for each one that changed."""
+        due = self.due()
+        if not due:
+            return []
+        results = self._fetch(due)
+        now = self._clock()
+
+        deltas = []
+        with self._lock:
+            for result in results:
+                watched = self._watched.get(result.symbol)
+                if watched is None:
+                    continue
+                previous = watched.data
+                if result.data is None:
+                    if result.error != watched.error:
+                        deltas.append(QuoteDelta(result.symbol, previous, error=result.error))
+                    watched.error = result.error
+                    watched.next_due = now + self._interval(result.symbol, watched.volatility)
+                    continue
+
+                changes = diff_quotes(previous, result.data)
+                if previous is None:
+                    # Seed from the day's move: a 1% day maps to `base_interval`.
+                    watched.volatility = abs(result.data.change_percent) * self.reference_move
+                elif previous.current_price:
+                    move = abs(result.data.current_price / previous.current_price - 1) * 100
+                    # Ignore repeats of a cached quote; they say nothing about volatility.
+                    if result.data.fetched_at != previous.fetched_at:
+                        watched.volatility = 0.5 * (watched.volatility or move) + 0.5 * move
+                watched.data = result.data
+                watched.error = None
+                watched.next_due = now + self._interval(result.symbol, watched.volatility)
+                if changes:
+                    deltas.append(QuoteDelta(result.symbol, result.data, changes))
+        return deltas
+
+
+def format_delta(delta: QuoteDelta, at: Optional[datetime] = None) -> str:
+    """One console line describing a delta, used by the CLI watch mode."""
+    stamp = (at or datetime.now()).strftime("%H:%M:%S")
+    if delta.error:
+        return f"[x] {stamp} {delta.symbol}: {delta.error}"
+    data = delta.data
+    cur = currency_sign_for_symbol(data.symbol)
+    line = f"[*] {stamp} {data.symbol:<12} {cur}{data.current_price:,.2f} ({data.change_percent:+.2f}% today)"
+    if not delta.first and "current_price" in delta.changes:
+        old, new = delta.changes["current_price"]
+        line += f"  {cur}{old:,.2f} -> {cur}{new:,.2f}"
+    if not delta.first and "volume" in delta.changes:
+        old, new = delta.changes["volume"]
+        line += f"  vol {new - old:+,}"
+    return line